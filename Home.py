@@ -2,11 +2,15 @@
 # This is the main entry point for the Streamlit web app
 
 import streamlit as st
-from app.services.user_service import register_user, validate_username, validate_password, verify_password
 from app.services.database_manager import DatabaseManager
+from app.services.auth_manager import AuthManager
+from app.services.session_manager import log_in, log_out, check_login, get_client_id
 
 # Week 11 - Create DatabaseManager instance for OOP
 db_manager = DatabaseManager()
+# Week 12 - AuthManager checks passwords in the hashing process pool, so a burst
+# of logins is spread over the CPU cores instead of waiting in one line
+auth_manager = AuthManager(db_manager)
 
 # Page configuration
 st.set_page_config(
@@ -49,6 +53,10 @@ if 'show_registration_success' not in st.session_state:
 if 'registered_username' not in st.session_state:
     st.session_state.registered_username = None
 
+# Week 12 - after a reconnect, log back in from the session token in the URL
+if not st.session_state.logged_in:
+    check_login()
+
 # Main app
 st.markdown('<h1 class="main-header">🔐 Intelligence Platform</h1>', unsafe_allow_html=True)
 
@@ -71,8 +79,7 @@ if st.session_state.logged_in:
     with col2:
         st.markdown("### 🔓 Account")
         if st.button("Logout", type="primary", use_container_width=True):
-            st.session_state.logged_in = False
-            st.session_state.username = None
+            log_out()
             st.rerun()
 else:
     # Check if we need to show success and switch to login
@@ -93,21 +100,17 @@ else:
                 if not username or not password:
                     st.error("❌ Please fill in all fields.")
                 else:
-                    # Week 11 - Use DatabaseManager to get User object
-                    user = db_manager.get_user_by_username(username)
-                    if user:
-                        if verify_password(password, user.get_password_hash()):
-                            # Clear registration success flags BEFORE setting logged in
-                            st.session_state.show_registration_success = False
-                            st.session_state.registered_username = None
-                            # Now set logged in
-                            st.session_state.logged_in = True
-                            st.session_state.username = username
-                            st.rerun()
-                        else:
-                            st.error("❌ Invalid password.")
+                    # Week 12 - AuthManager gets the User object and checks the password
+                    success, user, message = auth_manager.login(username, password, get_client_id())
+                    if success:
+                        # Clear registration success flags BEFORE setting logged in
+                        st.session_state.show_registration_success = False
+                        st.session_state.registered_username = None
+                        # Now set logged in (Week 12 - also starts a session)
+                        log_in(username)
+                        st.rerun()
                     else:
-                        st.error("❌ Username not found.")
+                        st.error(f"❌ {message}.")
         
         # Link to go back to tabs
         if st.button("↩️ Back to Register"):
@@ -132,17 +135,13 @@ else:
                     if not username or not password:
                         st.error("❌ Please fill in all fields.")
                     else:
-                        # Week 11 - Use DatabaseManager to get User object
-                        user = db_manager.get_user_by_username(username)
-                        if user:
-                            if verify_password(password, user.get_password_hash()):
-                                st.session_state.logged_in = True
-                                st.session_state.username = username
-                                st.rerun()
-                            else:
-                                st.error("❌ Invalid password.")
+                        # Week 12 - AuthManager gets the User object and checks the password
+                        success, user, message = auth_manager.login(username, password, get_client_id())
+                        if success:
+                            log_in(username)
+                            st.rerun()
                         else:
-                            st.error("❌ Username not found.")
+                            st.error(f"❌ {message}.")
         
         # REGISTER TAB
         with tab2:
@@ -160,21 +159,15 @@ else:
                     elif new_password != confirm_password:
                         st.error("❌ Passwords do not match.")
                     else:
-                        valid_user, user_msg = validate_username(new_username)
-                        if not valid_user:
-                            st.error(f"❌ {user_msg}")
+                        # Week 12 - AuthManager validates, hashes (in the pool) and saves
+                        success, message = auth_manager.register(new_username, new_password)
+                        if success:
+                            # Set flag and rerun to show login section
+                            st.session_state.show_registration_success = True
+                            st.session_state.registered_username = new_username
+                            st.rerun()
                         else:
-                            valid_pass, pass_msg = validate_password(new_password)
-                            if not valid_pass:
-                                st.error(f"❌ {pass_msg}")
-                            else:
-                                if register_user(new_username, new_password):
-                                    # Set flag and rerun to show login section
-                                    st.session_state.show_registration_success = True
-                                    st.session_state.registered_username = new_username
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ Username '{new_username}' already exists.")
+                            st.error(f"❌ {message}")
             
             # Show password requirements
             with st.expander("ℹ️ Password Requirements"):
@@ -0,0 +1,218 @@
+# Week 12 - AI response cache
+# Remembers the answers AIAssistant gets from Groq / HuggingFace, so asking the
+# same thing again (Quick Question buttons, re-analysing an unchanged incident)
+# comes back in milliseconds instead of 10-20 seconds
+#
+# Two levels:
+#   1. an in-memory LRU shared by the whole process (fastest)
+#   2. the ai_response_cache table in SQLite (survives restarts, shared by processes)
+# Every answer expires after a time that depends on what kind of call it was
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from app.data.db import DB_PATH, pooled_connection
+
+# How long (seconds) answers are kept, per kind of call
+AI_CACHE_TTLS = {
+    "incident": 7 * 24 * 60 * 60,   # the same incident text gets the same analysis
+    "tips": 6 * 60 * 60,            # tips use web search, so refresh a few times a day
+    "chat": 24 * 60 * 60,
+}
+DEFAULT_AI_CACHE_TTL = 60 * 60
+
+AI_CACHE_MAX_ENTRIES = 256          # answers kept in memory
+PURGE_EVERY = 100                   # delete expired rows after this many saves
+
+
+def make_cache_key(model, messages, temperature, max_tokens, search_query=None):
+    # SHA-256 of everything that changes the answer
+    # search_query is included because web results are added to the prompt after the lookup
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "search_query": search_query,
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-level cache of AI answers (memory LRU in front of a SQLite table)
+    Each entry keeps where the answer came from (provider, model, when, how long it took)
+    """
+
+    def __init__(self, db_path=DB_PATH, max_entries=AI_CACHE_MAX_ENTRIES, ttls=None):
+        """
+        Constructor - set up an empty memory cache
+
+        Parameters:
+            db_path (str or Path) - database with the ai_response_cache table
+            max_entries (int) - most answers to keep in memory
+            ttls (dict) - call type -> seconds (defaults to AI_CACHE_TTLS)
+        """
+        self.__db_path = db_path
+        self.__max_entries = max_entries
+        self.__ttls = dict(AI_CACHE_TTLS if ttls is None else ttls)
+        self.__entries = OrderedDict()      # key -> entry dict
+        self.__lock = threading.Lock()
+        self.__saves = 0
+
+        # Statistics
+        self.__memory_hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+
+    def get_ttl(self, call_type):
+        """
+        Get how long answers of one kind are kept
+
+        Parameters:
+            call_type (str) - "incident", "tips" or "chat"
+
+        Returns:
+            int - seconds
+        """
+        return self.__ttls.get(call_type, DEFAULT_AI_CACHE_TTL)
+
+    def get(self, key):
+        """
+        Look up an answer (memory first, then SQLite)
+
+        Parameters:
+            key (str) - from make_cache_key()
+
+        Returns:
+            dict or None - answer plus provenance, None if missing or expired
+        """
+        now = time.time()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self.__entries.move_to_end(key)
+                    self.__memory_hits += 1
+                    return dict(entry, cache_level="memory")
+                del self.__entries[key]
+
+        with pooled_connection(self.__db_path) as conn:
+            row = conn.execute(
+                "SELECT call_type, answer, provider, model, used_web_search, latency_ms, "
+                "created_at, expires_at FROM ai_response_cache "
+                "WHERE cache_key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+
+        with self.__lock:
+            if row is None:
+                self.__misses += 1
+                return None
+            self.__disk_hits += 1
+            entry = self.__entry_from_row(row)
+            self.__remember(key, entry)
+        return dict(entry, cache_level="disk")
+
+    def put(self, key, answer, call_type, provider=None, model=None,
+            used_web_search=False, latency_ms=None):
+        """
+        Save an answer in both levels
+
+        Parameters:
+            key (str) - from make_cache_key()
+            answer (str) - the AI's answer
+            call_type (str) - "incident", "tips" or "chat" (picks the TTL)
+            provider (str) - "groq" or "huggingface"
+            model (str) - model that wrote the answer
+            used_web_search (bool) - were web results added to the prompt?
+            latency_ms (float) - how long the provider took
+        """
+        now = time.time()
+        entry = {
+            "answer": answer,
+            "call_type": call_type,
+            "provider": provider,
+            "model": model,
+            "used_web_search": bool(used_web_search),
+            "latency_ms": latency_ms,
+            "created_at": now,
+            "expires_at": now + self.get_ttl(call_type),
+        }
+
+        with self.__lock:
+            self.__remember(key, entry)
+            self.__saves += 1
+            purge = self.__saves % PURGE_EVERY == 0
+
+        with pooled_connection(self.__db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_response_cache "
+                "(cache_key, call_type, answer, provider, model, used_web_search, "
+                "latency_ms, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, call_type, answer, provider, model, int(entry["used_web_search"]),
+                 latency_ms, entry["created_at"], entry["expires_at"])
+            )
+            if purge:
+                conn.execute("DELETE FROM ai_response_cache WHERE expires_at <= ?", (now,))
+            conn.commit()
+
+    def clear(self):
+        """Forget every answer (memory and SQLite)"""
+        with self.__lock:
+            self.__entries.clear()
+        with pooled_connection(self.__db_path) as conn:
+            conn.execute("DELETE FROM ai_response_cache")
+            conn.commit()
+
+    def __remember(self, key, entry):
+        """HELPER METHOD: add to the memory LRU (lock must already be held)"""
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+    @staticmethod
+    def __entry_from_row(row):
+        """HELPER METHOD: turn an ai_response_cache row into an entry dict"""
+        (call_type, answer, provider, model, used_web_search,
+         latency_ms, created_at, expires_at) = row
+        return {
+            "answer": answer,
+            "call_type": call_type,
+            "provider": provider,
+            "model": model,
+            "used_web_search": bool(used_web_search),
+            "latency_ms": latency_ms,
+            "created_at": created_at,
+            "expires_at": expires_at,
+        }
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict - entries in memory and hits per level
+        """
+        with self.__lock:
+            lookups = self.__memory_hits + self.__disk_hits + self.__misses
+            hits = self.__memory_hits + self.__disk_hits
+            return {
+                'entries': len(self.__entries),
+                'memory_hits': self.__memory_hits,
+                'disk_hits': self.__disk_hits,
+                'misses': self.__misses,
+                'hit_rate': hits / lookups if lookups else 0.0
+            }
+
+
+# One cache shared by the whole process
+response_cache = ResponseCache()
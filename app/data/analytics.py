@@ -0,0 +1,202 @@
+# Week 12 - Analytics queries
+# Every chart on the Analytics page gets its numbers straight from SQLite
+# using GROUP BY, so only the grouped results (not every row) come back to Python
+# Weekly trends, backlog and staff workload come from the rollup tables (rollups.py)
+
+from datetime import date
+import pandas as pd
+from app.data.cache import read_sql_cached, fetch_one_cached
+from app.data.stats import get_platform_stats
+from models.codes import RESOLVED_CODE
+
+# Columns that can be counted with count_by() - column names can't be ? parameters
+COUNTABLE_COLUMNS = {
+    "cyber_incidents": ("incident_type", "severity", "status"),
+    "it_tickets": ("priority", "status", "category"),
+    "datasets_metadata": ("category", "source"),
+}
+
+# Statuses that mean an incident is finished
+RESOLVED_STATUSES = ("Resolved", "Closed")
+
+
+def _read(query, params=()):
+    # Run a query and return the result as a DataFrame (through the query cache)
+    return read_sql_cached(query, params)
+
+
+def get_summary_counts():
+    # Row counts of all three tables (one cached read of the table_counts table)
+    return get_platform_stats()
+
+
+def count_by(table, column):
+    # Count how many rows have each value of a column (like value_counts)
+    if column not in COUNTABLE_COLUMNS.get(table, ()):
+        raise ValueError(f"Cannot count {table} by: {column}")
+    query = f"""
+    SELECT {column} AS value, COUNT(*) AS count
+    FROM {table}
+    WHERE {column} IS NOT NULL
+    GROUP BY {column}
+    ORDER BY count DESC
+    """
+    return _read(query)
+
+
+# INCIDENT ANALYTICS
+
+def get_weekly_incident_trends():
+    # Incidents per week (ending Sunday) and type - read from the rollup table
+    query = """
+    SELECT week, incident_type, count
+    FROM incident_weekly_rollup
+    ORDER BY week
+    """
+    df = _read(query)
+    df['week'] = pd.to_datetime(df['week'])
+    return df
+
+
+def get_avg_resolution_days_by_type():
+    # Average whole days between the incident date and resolved_date, per type
+    query = """
+    SELECT incident_type,
+           AVG(CAST(julianday(resolved_date) - julianday(date) AS INTEGER)) AS avg_days
+    FROM cyber_incidents
+    WHERE status IN (?, ?)
+      AND resolved_date IS NOT NULL
+      AND date IS NOT NULL
+    GROUP BY incident_type
+    ORDER BY avg_days DESC
+    """
+    return _read(query, RESOLVED_STATUSES)
+
+
+def get_incident_backlog():
+    # Unresolved incidents grouped by type and severity - read from the rollup table
+    query = """
+    SELECT incident_type, severity, count AS backlog_count
+    FROM backlog_rollup
+    ORDER BY incident_type, severity
+    """
+    return _read(query)
+
+
+def get_urgent_incidents(limit=20):
+    # Unresolved incidents, most severe first, then oldest first
+    # severity_level / status_code are generated columns (migration 6) and the
+    # idx_incidents_open_urgency index already has them in this order
+    # Today's date is a parameter (not 'now') so cached results only live for one day
+    query = f"""
+    SELECT id, date, incident_type, severity, status,
+           CAST(julianday(?) - julianday(date) AS INTEGER) AS age_days
+    FROM cyber_incidents
+    WHERE status_code < {RESOLVED_CODE}
+    ORDER BY severity_level DESC, date, id
+    LIMIT ?
+    """
+    return _read(query, (date.today().isoformat(), limit))
+
+
+# TICKET ANALYTICS
+
+def get_staff_workload():
+    # Tickets per staff member and status - read from the rollup table
+    query = """
+    SELECT assigned_to, status, count AS ticket_count
+    FROM staff_workload_rollup
+    ORDER BY assigned_to, status
+    """
+    return _read(query)
+
+
+def get_ticket_queue(limit=20):
+    # Unresolved tickets, highest priority first, then oldest first
+    # (uses the idx_tickets_open_urgency index, see migration 6)
+    query = f"""
+    SELECT id, subject, priority, status, assigned_to, created_date,
+           CAST(julianday(?) - julianday(created_date) AS INTEGER) AS age_days
+    FROM it_tickets
+    WHERE status_code < {RESOLVED_CODE}
+    ORDER BY priority_level DESC, created_date, id
+    LIMIT ?
+    """
+    return _read(query, (date.today().isoformat(), limit))
+
+
+def get_avg_ticket_resolution_days_by_staff():
+    # Average whole days from created_date to resolved_date for closed tickets
+    query = """
+    SELECT assigned_to,
+           AVG(CAST(julianday(resolved_date) - julianday(created_date) AS INTEGER)) AS avg_days
+    FROM it_tickets
+    WHERE status = 'Closed'
+      AND assigned_to IS NOT NULL
+    GROUP BY assigned_to
+    HAVING avg_days IS NOT NULL
+    ORDER BY avg_days DESC
+    """
+    return _read(query)
+
+
+def count_closed_tickets():
+    # How many tickets are closed (to know if there's anything to analyse)
+    return fetch_one_cached("SELECT COUNT(*) FROM it_tickets WHERE status = 'Closed'")[0]
+
+
+# DATASET ANALYTICS
+
+def get_dataset_totals():
+    # Total records and total size across all datasets
+    query = """
+    SELECT COALESCE(SUM(record_count), 0) AS total_records,
+           COALESCE(SUM(file_size_mb), 0) AS total_size_mb
+    FROM datasets_metadata
+    """
+    return _read(query).iloc[0].to_dict()
+
+
+def get_largest_datasets(limit=5):
+    # The biggest datasets by file size
+    query = """
+    SELECT dataset_name, file_size_mb
+    FROM datasets_metadata
+    WHERE file_size_mb IS NOT NULL
+    ORDER BY file_size_mb DESC
+    LIMIT ?
+    """
+    return _read(query, (limit,))
+
+
+def get_large_dataset_summary(min_size_mb=100):
+    # How many datasets are bigger than min_size_mb and how much space they use
+    query = """
+    SELECT COUNT(*) AS count, COALESCE(SUM(file_size_mb), 0) AS total_size_mb
+    FROM datasets_metadata
+    WHERE file_size_mb > ?
+    """
+    return _read(query, (min_size_mb,)).iloc[0].to_dict()
+
+
+def get_storage_by_source():
+    # Total storage used by each source, biggest first
+    query = """
+    SELECT source, SUM(file_size_mb) AS total_size_mb
+    FROM datasets_metadata
+    WHERE source IS NOT NULL
+    GROUP BY source
+    ORDER BY total_size_mb DESC
+    """
+    return _read(query)
+
+
+def count_dataset_quality_issues(max_bytes_per_record=10000):
+    # Datasets whose file size is unusually big for their number of records
+    # (written as a multiplication so datasets with 0 records still count)
+    query = """
+    SELECT COUNT(*)
+    FROM datasets_metadata
+    WHERE file_size_mb * 1024 * 1024 > ? * record_count
+    """
+    return fetch_one_cached(query, (max_bytes_per_record,))[0]
@@ -0,0 +1,317 @@
+# Week 12 - Query result cache
+# Keeps the results of read queries in memory for the whole process, so a
+# Streamlit rerun (or another analyst opening the same page) doesn't hit the database
+#
+# How it stays correct:
+#   - every cached result remembers which tables its SQL reads from
+#   - every write bumps a "generation" number for the table it changed
+#     (plus the rollup/counter tables its triggers update)
+#   - bumping a table throws away exactly the cached results that read it
+#   - writes from OUTSIDE this process (another Streamlit process, the sqlite3
+#     command line, ...) are spotted with PRAGMA data_version before any cached
+#     result is used - any change at all clears the whole cache
+#   - as a last safety net no result is kept longer than CACHE_TTL
+#
+# The cache is an LRU with a memory budget, so old results are dropped first
+
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import pandas as pd
+from app.data.db import DB_PATH, pooled_connection, get_pool
+from app.data.rollups import DEPENDENT_TABLES
+from app.data.stats import STATS_TABLES, invalidate_stats
+
+CACHE_MAX_BYTES = 64 * 1024 * 1024     # 64 MB of cached results
+CACHE_MAX_ENTRIES = 2000
+CACHE_TTL = 60                          # seconds - upper limit on how stale a result can be
+
+# Finds table names after FROM / JOIN (reads) and INSERT / UPDATE / DELETE (writes)
+READ_TABLES_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+WRITE_TABLE_PATTERN = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM|REPLACE\s+INTO)\s+([A-Za-z_][A-Za-z0-9_]*)",
+    re.IGNORECASE
+)
+
+
+def estimate_size(value):
+    # Rough number of bytes a cached result uses
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    An LRU cache of query results with a memory budget
+    Results are thrown away as soon as a table they read from changes
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        """
+        Constructor - set up an empty cache
+
+        Parameters:
+            max_bytes (int) - memory budget for all cached results
+            max_entries (int) - most results to keep
+            ttl (float) - most seconds a result is kept
+        """
+        self.__max_bytes = max_bytes
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__entries = OrderedDict()      # key -> (value, size, tables, expires_at)
+        self.__keys_by_table = {}           # table -> set of keys that read it
+        self.__generations = {}             # table -> write counter
+        self.__epoch = 0                    # goes up when everything is cleared
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+        # Statistics
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    def get_generations(self, tables):
+        """
+        Get the current write counter of each table
+
+        Parameters:
+            tables (iterable) - table names
+
+        Returns:
+            tuple - the cache epoch followed by one number per table
+        """
+        with self.__lock:
+            return self.__current_generations(tables)
+
+    def get(self, key):
+        """
+        Look up a cached result
+
+        Parameters:
+            key (tuple) - cache key
+
+        Returns:
+            tuple - (found: bool, value)
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[3] <= time.monotonic():
+                self.__remove(key)
+                entry = None
+            if entry is None:
+                self.__misses += 1
+                return False, None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, tables, generations):
+        """
+        Store a result, unless one of its tables changed while it was being read
+
+        Parameters:
+            key (tuple) - cache key
+            value - the result to keep
+            tables (tuple) - tables the query reads
+            generations (tuple) - get_generations(tables) from BEFORE the query ran
+        """
+        size = estimate_size(value)
+        # One huge result shouldn't push everything else out
+        if size > self.__max_bytes // 4:
+            return
+
+        with self.__lock:
+            if self.__current_generations(tables) != generations:
+                return
+
+            self.__remove(key)
+            self.__entries[key] = (value, size, tables, time.monotonic() + self.__ttl)
+            self.__bytes += size
+            for table in tables:
+                self.__keys_by_table.setdefault(table, set()).add(key)
+
+            # Drop the least recently used results until we fit again
+            while self.__bytes > self.__max_bytes or len(self.__entries) > self.__max_entries:
+                oldest_key = next(iter(self.__entries))
+                self.__remove(oldest_key)
+                self.__evictions += 1
+
+    def invalidate(self, tables):
+        """
+        A write changed these tables - forget every result that read them
+
+        Parameters:
+            tables (iterable) - table names
+        """
+        with self.__lock:
+            for table in tables:
+                self.__generations[table] = self.__generations.get(table, 0) + 1
+                for key in list(self.__keys_by_table.get(table, ())):
+                    self.__remove(key)
+                    self.__invalidations += 1
+
+    def clear(self):
+        """Forget everything"""
+        with self.__lock:
+            self.__epoch += 1
+            self.__entries.clear()
+            self.__keys_by_table.clear()
+            self.__bytes = 0
+
+    def __current_generations(self, tables):
+        """HELPER METHOD: epoch + write counters (lock must already be held)"""
+        return (self.__epoch,) + tuple(self.__generations.get(table, 0) for table in tables)
+
+    def __remove(self, key):
+        """HELPER METHOD: remove one entry (lock must already be held)"""
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return
+        self.__bytes -= entry[1]
+        for table in entry[2]:
+            keys = self.__keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict - hits, misses, evictions, invalidations and memory use
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                'entries': len(self.__entries),
+                'bytes': self.__bytes,
+                'max_bytes': self.__max_bytes,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hit_rate': self.__hits / lookups if lookups else 0.0,
+                'evictions': self.__evictions,
+                'invalidations': self.__invalidations
+            }
+
+
+# One cache shared by the whole process
+query_cache = QueryCache()
+
+
+def tables_read_by(sql):
+    # Every table name a SELECT reads from
+    return tuple(sorted({name.lower() for name in READ_TABLES_PATTERN.findall(sql)}))
+
+
+def table_written_by(sql):
+    # The table an INSERT / UPDATE / DELETE changes (None for anything else)
+    match = WRITE_TABLE_PATTERN.match(sql)
+    return match.group(1).lower() if match else None
+
+
+# Week 12 - Spotting writes from other processes
+# PRAGMA data_version (asked on a connection kept only for this) changes when
+# ANY other connection commits - including this process's own pool connections.
+# The numbers are per connection, so one of our commits can't be told apart from
+# an outside one that landed at the same moment. Any change therefore clears the
+# whole cache (our own writes have already invalidated their tables, this only
+# costs a few extra misses after them)
+
+_watchers = {}      # db path -> [connection, data_version]
+_watchers_lock = threading.Lock()
+
+
+def check_outside_writes(db_path=DB_PATH):
+    # Clear the cache if the database changed since the last check
+    # Returns True if it did
+    key = str(db_path)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            # Make sure the file exists and is migrated before watching it
+            get_pool(db_path)
+            conn = sqlite3.connect(str(Path(db_path).resolve()), check_same_thread=False)
+            watcher = [conn, None]
+            _watchers[key] = watcher
+        version = watcher[0].execute("PRAGMA data_version").fetchone()[0]
+        changed = watcher[1] is not None and version != watcher[1]
+        watcher[1] = version
+
+    if changed:
+        query_cache.clear()
+        invalidate_stats()
+    return changed
+
+
+def _cached(kind, sql, params, db_path, run):
+    # Shared code for the three cached read functions below
+    check_outside_writes(db_path)
+    tables = tables_read_by(sql)
+    key = (kind, str(db_path), sql, tuple(params))
+
+    found, value = query_cache.get(key)
+    if found:
+        return value
+
+    generations = query_cache.get_generations(tables)
+    with pooled_connection(db_path) as conn:
+        value = run(conn)
+    query_cache.put(key, value, tables, generations)
+    return value
+
+
+def read_sql_cached(sql, params=(), db_path=DB_PATH):
+    # Cached pd.read_sql_query - returns a copy so callers can change it safely
+    df = _cached("df", sql, params, db_path,
+                 lambda conn: pd.read_sql_query(sql, conn, params=tuple(params)))
+    return df.copy()
+
+
+def fetch_all_cached(sql, params=(), db_path=DB_PATH):
+    # Cached cursor.fetchall() - rows are tuples so they can't be changed
+    rows = _cached("all", sql, params, db_path,
+                   lambda conn: tuple(conn.execute(sql, params).fetchall()))
+    return list(rows)
+
+
+def fetch_one_cached(sql, params=(), db_path=DB_PATH):
+    # Cached cursor.fetchone()
+    return _cached("one", sql, params, db_path,
+                   lambda conn: conn.execute(sql, params).fetchone())
+
+
+def invalidate_tables(*tables):
+    # Call after writing to these tables
+    # Also clears the tables that triggers update (rollups, counters)
+    changed = set()
+    for table in tables:
+        changed.add(table)
+        changed.update(DEPENDENT_TABLES.get(table, ()))
+    query_cache.invalidate(changed)
+
+    if changed & set(STATS_TABLES.values()):
+        invalidate_stats()
+
+
+def invalidate_for_sql(sql):
+    # Work out which table a write statement changed and invalidate it
+    table = table_written_by(sql)
+    if table is not None:
+        invalidate_tables(table)
+    else:
+        # Not sure what changed - safest to forget everything
+        query_cache.clear()
+        invalidate_stats()
+
+
+def get_cache_stats():
+    # Hit / miss / eviction statistics for monitoring
+    return query_cache.get_stats()
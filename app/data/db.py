@@ -1,13 +1,286 @@
 # Week 8 - Database connection file
 # This file connects to the SQLite database
+# Week 12 - Connections now come from a small pool instead of being opened
+# and closed on every single function call
 
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from app.data.migrations import run_migrations
 
 # Where the database file will be saved
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 
+# Pool settings
+POOL_SIZE = 8              # most connections open at the same time
+POOL_TIMEOUT = 30          # seconds to wait for a free connection
+BUSY_TIMEOUT = 10          # seconds SQLite waits on a locked database
+
+# PRAGMAs applied once when a connection is first opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",       # readers don't block the writer
+    "PRAGMA synchronous = NORMAL",     # safe with WAL and much faster
+    "PRAGMA mmap_size = 268435456",    # memory-map up to 256 MB
+    "PRAGMA cache_size = -65536",      # 64 MB page cache (negative = KB)
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A normal sqlite3 connection that goes back to its pool when closed
+    Because it is still a real sqlite3.Connection, pandas and cursors work as before
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def close(self):
+        """Give the connection back to the pool instead of closing it"""
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    def close_for_real(self):
+        """Actually close the underlying SQLite connection"""
+        super().close()
+
+
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections
+
+    Each thread (Streamlit runs every script in its own thread) gets one
+    connection and keeps it until it has released it as many times as it
+    asked for it, so nested calls share the same connection.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        """
+        Constructor - set up an empty pool
+
+        Parameters:
+            db_path (str or Path) - database file the pool connects to
+            max_size (int) - most connections that can exist at once
+            timeout (float) - seconds to wait before giving up on a checkout
+        """
+        self.__db_path = str(db_path)
+        self.__max_size = max_size
+        self.__timeout = timeout
+        self.__idle = []
+        self.__owners = {}       # thread id -> [connection, depth, broken]
+        self.__created = 0
+        self.__condition = threading.Condition()
+
+        # Statistics for sizing the pool
+        self.__checkouts = 0
+        self.__waits = 0
+        self.__wait_time = 0.0
+        self.__max_wait = 0.0
+        self.__recycled = 0
+
+    def __open_connection(self):
+        """Open a new connection and apply the PRAGMAs once"""
+        conn = sqlite3.connect(
+            self.__db_path,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,
+            factory=PooledConnection
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        """
+        Check out a connection for the current thread
+
+        Returns:
+            PooledConnection - the thread's connection
+        """
+        thread_id = threading.get_ident()
+        started = time.perf_counter()
+        waited = False
+
+        with self.__condition:
+            # Same thread asking again - hand back the same connection
+            owned = self.__owners.get(thread_id)
+            if owned is not None:
+                owned[1] += 1
+                self.__checkouts += 1
+                return owned[0]
+
+            while not self.__idle and self.__created >= self.__max_size:
+                waited = True
+                remaining = self.__timeout - (time.perf_counter() - started)
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Connection pool exhausted ({self.__max_size} connections in use)"
+                    )
+                self.__condition.wait(remaining)
+
+            if self.__idle:
+                conn = self.__idle.pop()
+            else:
+                # Reserve the slot now, open the connection outside the lock
+                self.__created += 1
+                conn = None
+
+            self.__checkouts += 1
+            if waited:
+                wait_time = time.perf_counter() - started
+                self.__waits += 1
+                self.__wait_time += wait_time
+                self.__max_wait = max(self.__max_wait, wait_time)
+
+        if conn is None:
+            try:
+                conn = self.__open_connection()
+            except Exception:
+                with self.__condition:
+                    self.__created -= 1
+                    self.__condition.notify()
+                raise
+
+        with self.__condition:
+            self.__owners[thread_id] = [conn, 1, False]
+        return conn
+
+    def release(self, conn, broken=False):
+        """
+        Give a connection back to the pool
+
+        Parameters:
+            conn (PooledConnection) - connection from acquire()
+            broken (bool) - True if it hit an error and should be replaced
+                            (a nested checkout only marks it - it is replaced
+                            when the outermost caller gives it back)
+
+        Raises:
+            RuntimeError - if another thread checked the connection out
+        """
+        thread_id = threading.get_ident()
+
+        with self.__condition:
+            owned = self.__owners.get(thread_id)
+            if owned is None or owned[0] is not conn:
+                if any(other[0] is conn for other in self.__owners.values()):
+                    # Checked out by another thread - ignoring this would leak the
+                    # connection (and that thread may still be using it)
+                    raise RuntimeError("Connection released by a thread that didn't check it out")
+                # Not checked out at all (already released) - nothing to do
+                return
+            owned[1] -= 1
+            owned[2] = owned[2] or broken
+            if owned[1] > 0:
+                # An outer caller on this thread is still using it
+                return
+            del self.__owners[thread_id]
+            broken = owned[2]
+
+        # Don't leave a half-finished transaction for the next user
+        if not broken and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                broken = True
+
+        with self.__condition:
+            if broken:
+                self.__created -= 1
+                self.__recycled += 1
+            else:
+                self.__idle.append(conn)
+            self.__condition.notify()
+
+        if broken:
+            try:
+                conn.close_for_real()
+            except sqlite3.Error:
+                pass
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown or in scripts)"""
+        with self.__condition:
+            idle = self.__idle
+            self.__idle = []
+            self.__created -= len(idle)
+            self.__condition.notify_all()
+        for conn in idle:
+            conn.close_for_real()
+
+    def get_stats(self):
+        """
+        Get pool statistics
+
+        Returns:
+            dict - checkouts, wait times and connection counts
+        """
+        with self.__condition:
+            return {
+                'max_size': self.__max_size,
+                'created': self.__created,
+                'in_use': len(self.__owners),
+                'idle': len(self.__idle),
+                'checkouts': self.__checkouts,
+                'waits': self.__waits,
+                'total_wait_seconds': self.__wait_time,
+                'max_wait_seconds': self.__max_wait,
+                'recycled': self.__recycled
+            }
+
+
+# One pool per database file, shared by the whole process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH):
+    # Find (or make) the pool for this database file
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            # Week 12 - bring the schema up to date the first time we see this file
+            conn = pool.acquire()
+            try:
+                run_migrations(conn)
+            finally:
+                pool.release(conn)
+            _pools[key] = pool
+        return pool
+
 
 def connect_database(db_path=DB_PATH):
     # Connect to database (makes it if it doesn't exist)
-    return sqlite3.connect(str(db_path))
+    # Week 12 - comes from the pool, conn.close() hands it back
+    return get_pool(db_path).acquire()
+
+
+@contextmanager
+def pooled_connection(db_path=DB_PATH):
+    # Borrow a connection for a "with" block and always give it back
+    # Connections that hit a database error are thrown away and replaced
+    pool = get_pool(db_path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    except sqlite3.Error as e:
+        # Constraint errors (like a duplicate ticket ID) don't hurt the connection
+        pool.release(conn, broken=not isinstance(e, sqlite3.IntegrityError))
+        raise
+    except BaseException:
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
+
+
+def get_pool_stats(db_path=DB_PATH):
+    # Pool statistics for monitoring (checkouts, waits, in-use count)
+    return get_pool(db_path).get_stats()
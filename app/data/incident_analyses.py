@@ -0,0 +1,31 @@
+# Week 12 - Functions for saved AI incident analyses
+# Batch triage saves every analysis here, keyed by incident id and a hash of
+# the text that was analysed, so unchanged incidents are never analysed twice
+
+from app.data.db import pooled_connection
+from app.data.cache import invalidate_tables, fetch_one_cached
+
+
+def save_analysis(incident_id, content_hash, analysis, provider=None, model=None):
+    # Save (or replace) the analysis of one version of an incident
+    with pooled_connection() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO incident_analyses
+            (incident_id, content_hash, analysis, provider, model)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (incident_id, content_hash, analysis, provider, model)
+        )
+        conn.commit()
+        invalidate_tables("incident_analyses")
+
+
+def get_analysis(incident_id, content_hash):
+    # The saved analysis for this exact version of the incident (None if there isn't one)
+    row = fetch_one_cached(
+        "SELECT analysis FROM incident_analyses WHERE incident_id = ? AND content_hash = ?",
+        (incident_id, content_hash)
+    )
+    return row[0] if row else None
+
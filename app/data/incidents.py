@@ -1,108 +1,93 @@
 # Week 8 - Functions for cyber incidents
 # CRUD operations for incidents table
+# Week 12 - Uses pooled connections instead of opening a new one every call
+# and reads go through the query cache (writes clear the cached results)
 
-import pandas as pd
-from app.data.db import connect_database
+from app.data.db import pooled_connection
+from app.data.cache import invalidate_tables, read_sql_cached
 
 
 def insert_incident(date, incident_type, severity, status, description, reported_by=None):
     # Add a new incident to the database
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    # SQL to insert incident
-    insert_sql = """
-    INSERT INTO cyber_incidents 
-    (date, incident_type, severity, status, description, reported_by)
-    VALUES (?, ?, ?, ?, ?, ?)
-    """
-    
-    # Run SQL and save
-    cursor.execute(insert_sql, (date, incident_type, severity, status, description, reported_by))
-    conn.commit()
-    
-    # Get the ID of the new incident
-    incident_id = cursor.lastrowid
-    conn.close()
-    return incident_id
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        
+        # SQL to insert incident
+        insert_sql = """
+        INSERT INTO cyber_incidents 
+        (date, incident_type, severity, status, description, reported_by)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        
+        # Run SQL and save
+        cursor.execute(insert_sql, (date, incident_type, severity, status, description, reported_by))
+        conn.commit()
+        invalidate_tables("cyber_incidents")
+        
+        # Get the ID of the new incident
+        return cursor.lastrowid
 
 
 def get_all_incidents():
     # Get all incidents from database
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM cyber_incidents ORDER BY id DESC",
-        conn
-    )
-    conn.close()
-    return df
+    return read_sql_cached("SELECT * FROM cyber_incidents ORDER BY id DESC")
 
 
 def get_incident_by_id(incident_id):
     # Get one specific incident
-    conn = connect_database()
-    df = pd.read_sql_query(
+    return read_sql_cached(
         "SELECT * FROM cyber_incidents WHERE id = ?",
-        conn,
-        params=(incident_id,)
+        (incident_id,)
     )
-    conn.close()
-    return df
 
 
 def update_incident_status(incident_id, new_status):
     # Change the status of an incident
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    # SQL to update status
-    update_sql = "UPDATE cyber_incidents SET status = ? WHERE id = ?"
-    
-    # Run SQL and save
-    cursor.execute(update_sql, (new_status, incident_id))
-    conn.commit()
-    
-    # Return how many rows changed
-    rows_updated = cursor.rowcount
-    conn.close()
-    return rows_updated
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        
+        # SQL to update status
+        update_sql = "UPDATE cyber_incidents SET status = ? WHERE id = ?"
+        
+        # Run SQL and save
+        cursor.execute(update_sql, (new_status, incident_id))
+        conn.commit()
+        invalidate_tables("cyber_incidents")
+        
+        # Return how many rows changed
+        return cursor.rowcount
 
 
 def delete_incident(incident_id):
     # Delete an incident from database
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    # SQL to delete incident
-    delete_sql = "DELETE FROM cyber_incidents WHERE id = ?"
-    
-    # Run SQL and save
-    cursor.execute(delete_sql, (incident_id,))
-    conn.commit()
-    
-    # Return how many rows deleted
-    rows_deleted = cursor.rowcount
-    conn.close()
-    return rows_deleted
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        
+        # SQL to delete incident
+        delete_sql = "DELETE FROM cyber_incidents WHERE id = ?"
+        
+        # Run SQL and save
+        cursor.execute(delete_sql, (incident_id,))
+        conn.commit()
+        invalidate_tables("cyber_incidents")
+        
+        # Return how many rows deleted
+        return cursor.rowcount
 
 
 def get_incidents_by_type_count():
     # Count how many incidents of each type
-    conn = connect_database()
     query = """
     SELECT incident_type, COUNT(*) as count
     FROM cyber_incidents
     GROUP BY incident_type
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return read_sql_cached(query)
 
 
 def get_high_severity_by_status():
     # Count high severity incidents by their status
-    conn = connect_database()
     query = """
     SELECT status, COUNT(*) as count
     FROM cyber_incidents
@@ -110,14 +95,11 @@ def get_high_severity_by_status():
     GROUP BY status
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return read_sql_cached(query)
 
 
 def get_incident_types_with_many_cases(min_count=5):
     # Find incident types that happen a lot
-    conn = connect_database()
     query = """
     SELECT incident_type, COUNT(*) as count
     FROM cyber_incidents
@@ -125,6 +107,4 @@ def get_incident_types_with_many_cases(min_count=5):
     HAVING COUNT(*) > ?
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn, params=(min_count,))
-    conn.close()
-    return df
+    return read_sql_cached(query, (min_count,))
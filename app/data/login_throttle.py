@@ -0,0 +1,46 @@
+# Week 12 - Functions for saving login throttling state
+# LoginThrottle keeps its buckets in memory and only writes the ones that
+# changed every few seconds, in one transaction
+
+from app.data.db import pooled_connection
+
+
+def load_login_buckets(limit):
+    # The most recently used buckets - list of (bucket_key, tokens, updated_at)
+    with pooled_connection() as conn:
+        return conn.execute(
+            "SELECT bucket_key, tokens, updated_at FROM login_throttle ORDER BY updated_at DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+
+def load_login_bucket(bucket_key):
+    # One saved bucket - (tokens, updated_at), None if it isn't saved
+    with pooled_connection() as conn:
+        return conn.execute(
+            "SELECT tokens, updated_at FROM login_throttle WHERE bucket_key = ?",
+            (bucket_key,)
+        ).fetchone()
+
+
+def save_login_buckets(rows, deleted_keys):
+    # Write changed buckets and remove the ones that have refilled
+    # rows - list of (bucket_key, tokens, updated_at)
+    with pooled_connection() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO login_throttle (bucket_key, tokens, updated_at) VALUES (?, ?, ?)",
+            rows
+        )
+        conn.executemany(
+            "DELETE FROM login_throttle WHERE bucket_key = ?",
+            [(key,) for key in deleted_keys]
+        )
+        conn.commit()
+
+
+def delete_old_login_buckets(before):
+    # Remove buckets not touched since `before` (they are full again by now)
+    with pooled_connection() as conn:
+        cursor = conn.execute("DELETE FROM login_throttle WHERE updated_at < ?", (before,))
+        conn.commit()
+        return cursor.rowcount
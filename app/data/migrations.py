@@ -0,0 +1,306 @@
+# Week 12 - Database migrations
+# Keeps every database (old copies and brand new ones) on the same schema
+# Each migration runs once, in order, and is recorded in the schema_version table
+
+from app.data.schema import create_all_tables
+from app.data.rollups import (
+    create_rollup_tables,
+    create_rollup_triggers,
+    rebuild_rollups,
+    create_counter_table,
+    create_counter_triggers,
+    rebuild_counters
+)
+from models.codes import SEVERITY_CODES, PRIORITY_CODES, STATUS_CODES, RESOLVED_CODE
+
+
+def create_schema_version_table(conn):
+    # Table that remembers which migrations already ran
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.commit()
+
+
+def get_schema_version(conn):
+    # Highest migration number already applied (0 = none)
+    create_schema_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def column_exists(conn, table, column):
+    # Check if a table already has a column
+    # (table_xinfo also lists generated columns, table_info doesn't)
+    rows = conn.execute(f"PRAGMA table_xinfo({table})").fetchall()
+    return any(row[1] == column for row in rows)
+
+
+# MIGRATION STEPS
+# Every step must be safe to run again (IF NOT EXISTS, column checks, ...)
+# and must NOT commit - run_migrations() commits the step together with its
+# schema_version row, so a crash can't leave a step half recorded
+
+def migration_create_base_tables(conn):
+    # The four original Week 8 tables
+    create_all_tables(conn, commit=False)
+
+
+def migration_add_incident_resolved_date(conn):
+    # The live database already has this column, older copies don't
+    if not column_exists(conn, "cyber_incidents", "resolved_date"):
+        conn.execute("ALTER TABLE cyber_incidents ADD COLUMN resolved_date TEXT")
+
+
+def migration_add_query_indexes(conn):
+    # Indexes that match the filters the pages actually use
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_incidents_status_severity
+    ON cyber_incidents (status, severity)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_incidents_type_date
+    ON cyber_incidents (incident_type, date)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_tickets_assigned_status
+    ON it_tickets (assigned_to, status)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_tickets_created_date
+    ON it_tickets (created_date)
+    """)
+
+
+def migration_add_rollups(conn):
+    # Summary tables for the charts, kept current by triggers
+    create_rollup_tables(conn)
+    create_rollup_triggers(conn)
+    rebuild_rollups(conn, commit=False)
+
+
+def migration_add_table_counters(conn):
+    # Row counts for the Dashboard, kept current by triggers
+    create_counter_table(conn)
+    create_counter_triggers(conn)
+    rebuild_counters(conn, commit=False)
+
+
+def code_case_sql(column, codes):
+    # SQL version of code_of() from models/codes.py, e.g.
+    # CASE lower(severity) WHEN 'low' THEN 1 ... ELSE 0 END
+    whens = " ".join(f"WHEN '{name.lower()}' THEN {code}" for name, code in codes.items())
+    return f"CASE lower({column}) {whens} ELSE 0 END"
+
+
+def add_code_column(conn, table, column, source, codes):
+    # Generated column that always holds the number for another column
+    # VIRTUAL = worked out when read, so it can never be out of date and the file doesn't grow
+    if not column_exists(conn, table, column):
+        conn.execute(f"""
+        ALTER TABLE {table} ADD COLUMN {column} INTEGER
+        GENERATED ALWAYS AS ({code_case_sql(source, codes)}) VIRTUAL
+        """)
+
+
+def migration_add_code_columns(conn):
+    # Integer severity / priority / status columns using the shared code tables
+    add_code_column(conn, "cyber_incidents", "severity_level", "severity", SEVERITY_CODES)
+    add_code_column(conn, "cyber_incidents", "status_code", "status", STATUS_CODES)
+    add_code_column(conn, "it_tickets", "priority_level", "priority", PRIORITY_CODES)
+    add_code_column(conn, "it_tickets", "status_code", "status", STATUS_CODES)
+
+    # Partial indexes over the unresolved rows only, already in "most urgent, oldest first"
+    # order - the backlog / queue queries read them in order with no sorting step
+    conn.execute(f"""
+    CREATE INDEX IF NOT EXISTS idx_incidents_open_urgency
+    ON cyber_incidents (severity_level DESC, date, id)
+    WHERE status_code < {RESOLVED_CODE}
+    """)
+    conn.execute(f"""
+    CREATE INDEX IF NOT EXISTS idx_tickets_open_urgency
+    ON it_tickets (priority_level DESC, created_date, id)
+    WHERE status_code < {RESOLVED_CODE}
+    """)
+
+
+def migration_add_ai_response_cache(conn):
+    # Answers from the AI providers, so repeat questions don't call them again
+    # (see app/data/ai_cache.py)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ai_response_cache (
+        cache_key TEXT PRIMARY KEY,
+        call_type TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        provider TEXT,
+        model TEXT,
+        used_web_search INTEGER NOT NULL DEFAULT 0,
+        latency_ms REAL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ai_response_cache_expires
+    ON ai_response_cache (expires_at)
+    """)
+
+
+def migration_add_incident_analyses(conn):
+    # Saved AI analyses, one per incident per version of its text
+    # (content_hash changes when the incident is edited, so old analyses aren't reused)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS incident_analyses (
+        incident_id INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        analysis TEXT NOT NULL,
+        provider TEXT,
+        model TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (incident_id, content_hash)
+    )
+    """)
+
+
+def migration_add_jobs(conn):
+    # Background job queue (see app/services/job_queue.py)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_type TEXT NOT NULL,
+        job_key TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )
+    """)
+    # Workers look for the oldest queued job
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_status
+    ON jobs (status, id)
+    """)
+
+
+def migration_add_app_settings(conn):
+    # Settings chosen per deployment (like the bcrypt cost) - see app/data/settings.py
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS app_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def migration_add_sessions(conn):
+    # Login sessions (see app/services/session_manager.py)
+    # Only a SHA-256 of each token is stored, so a copy of the database can't be used to log in
+    # family_id ties together every token one login rotated through (Logout ends them all),
+    # successor_hash is set once a token has been swapped for a new one
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        username TEXT NOT NULL,
+        family_id TEXT NOT NULL,
+        successor_hash TEXT,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sessions_expires
+    ON sessions (expires_at)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sessions_username
+    ON sessions (username)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sessions_family
+    ON sessions (family_id)
+    """)
+
+
+def migration_add_login_throttle(conn):
+    # Login attempt buckets that aren't full (see LoginThrottle in app/services/rate_limit.py)
+    # Saved so a restart doesn't hand an attacker a fresh set of attempts
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS login_throttle (
+        bucket_key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """)
+
+
+# (version, name, function) - add new migrations to the END of this list
+MIGRATIONS = [
+    (1, "create base tables", migration_create_base_tables),
+    (2, "add resolved_date to cyber_incidents", migration_add_incident_resolved_date),
+    (3, "add query indexes", migration_add_query_indexes),
+    (4, "add rollup tables and triggers", migration_add_rollups),
+    (5, "add table row counters", migration_add_table_counters),
+    (6, "add severity, priority and status code columns", migration_add_code_columns),
+    (7, "add AI response cache table", migration_add_ai_response_cache),
+    (8, "add incident analyses table", migration_add_incident_analyses),
+    (9, "add background jobs table", migration_add_jobs),
+    (10, "add app settings table", migration_add_app_settings),
+    (11, "add sessions table", migration_add_sessions),
+    (12, "add login throttle table", migration_add_login_throttle),
+]
+
+
+def analyze_database(conn):
+    # Give the SQLite query planner fresh statistics about the tables
+    # analysis_limit keeps ANALYZE quick even on tables with millions of rows
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def run_migrations(conn):
+    # Apply every migration that hasn't run yet, in order
+    # Returns the list of migration names that were applied
+    create_schema_version_table(conn)
+    applied = []
+
+    for version, name, migration in MIGRATIONS:
+        # BEGIN IMMEDIATE takes the write lock so two app processes
+        # can't run the same migration at the same time
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            already_done = conn.execute(
+                "SELECT 1 FROM schema_version WHERE version = ?",
+                (version,)
+            ).fetchone()
+
+            if already_done:
+                conn.rollback()
+                continue
+
+            migration(conn)
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version, name) VALUES (?, ?)",
+                (version, name)
+            )
+            conn.commit()
+            applied.append(name)
+            print(f"✅ Migration {version} applied: {name}")
+        except Exception:
+            conn.rollback()
+            raise
+
+    # New indexes or tables - refresh planner statistics
+    if applied:
+        analyze_database(conn)
+
+    return applied
@@ -0,0 +1,210 @@
+# Week 12 - Rollup tables
+# Small summary tables that the charts read instead of grouping the big tables
+# Triggers keep them up to date on every INSERT / UPDATE / DELETE, so it doesn't
+# matter whether a write comes from app/data or from DatabaseManager
+#
+# Run "python -m app.data.rollups" to rebuild them if they ever get out of sync
+
+from models.codes import STATUS_CODES, RESOLVED_CODE
+
+# Tables whose row counts are kept in the table_counts table (for the Dashboard)
+COUNTED_TABLES = ("users", "cyber_incidents", "datasets_metadata", "it_tickets")
+
+# Tables that triggers change when a base table is written to
+# (used by the query cache to know what else to forget after a write)
+DEPENDENT_TABLES = {
+    "cyber_incidents": ("incident_weekly_rollup", "backlog_rollup", "table_counts"),
+    "it_tickets": ("staff_workload_rollup", "table_counts"),
+    "datasets_metadata": ("table_counts",),
+    "users": ("table_counts",),
+}
+
+# Statuses that are finished, lower case - compared with lower(status) so the
+# backlog matches status_code (migration 6) whatever the capitalisation
+DONE_STATUSES_SQL = ", ".join(
+    f"'{name.lower()}'" for name, code in STATUS_CODES.items() if code >= RESOLVED_CODE
+)
+
+# Conditions used in the triggers (NEW = row after the change, OLD = before)
+WEEKLY_KEY_NEW = "date(NEW.date, 'weekday 0') IS NOT NULL AND NEW.incident_type IS NOT NULL"
+BACKLOG_KEY_NEW = (
+    "NEW.incident_type IS NOT NULL AND NEW.severity IS NOT NULL "
+    f"AND (NEW.status IS NULL OR lower(NEW.status) NOT IN ({DONE_STATUSES_SQL}))"
+)
+BACKLOG_KEY_OLD = f"(OLD.status IS NULL OR lower(OLD.status) NOT IN ({DONE_STATUSES_SQL}))"
+WORKLOAD_KEY_NEW = "NEW.assigned_to IS NOT NULL AND NEW.status IS NOT NULL"
+
+# Trigger bodies - "add one" and "remove one" for each rollup
+INCIDENT_ADD_SQL = f"""
+    INSERT INTO incident_weekly_rollup (week, incident_type, count)
+    SELECT date(NEW.date, 'weekday 0'), NEW.incident_type, 1
+    WHERE {WEEKLY_KEY_NEW}
+    ON CONFLICT (week, incident_type) DO UPDATE SET count = count + 1;
+
+    INSERT INTO backlog_rollup (incident_type, severity, count)
+    SELECT NEW.incident_type, NEW.severity, 1
+    WHERE {BACKLOG_KEY_NEW}
+    ON CONFLICT (incident_type, severity) DO UPDATE SET count = count + 1;
+"""
+
+INCIDENT_REMOVE_SQL = f"""
+    UPDATE incident_weekly_rollup SET count = count - 1
+    WHERE week = date(OLD.date, 'weekday 0') AND incident_type = OLD.incident_type;
+    DELETE FROM incident_weekly_rollup
+    WHERE week = date(OLD.date, 'weekday 0') AND incident_type = OLD.incident_type AND count <= 0;
+
+    UPDATE backlog_rollup SET count = count - 1
+    WHERE incident_type = OLD.incident_type AND severity = OLD.severity AND {BACKLOG_KEY_OLD};
+    DELETE FROM backlog_rollup
+    WHERE incident_type = OLD.incident_type AND severity = OLD.severity AND count <= 0;
+"""
+
+TICKET_ADD_SQL = f"""
+    INSERT INTO staff_workload_rollup (assigned_to, status, count)
+    SELECT NEW.assigned_to, NEW.status, 1
+    WHERE {WORKLOAD_KEY_NEW}
+    ON CONFLICT (assigned_to, status) DO UPDATE SET count = count + 1;
+"""
+
+TICKET_REMOVE_SQL = """
+    UPDATE staff_workload_rollup SET count = count - 1
+    WHERE assigned_to = OLD.assigned_to AND status = OLD.status;
+    DELETE FROM staff_workload_rollup
+    WHERE assigned_to = OLD.assigned_to AND status = OLD.status AND count <= 0;
+"""
+
+
+def create_rollup_tables(conn):
+    # Make the three rollup tables
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS incident_weekly_rollup (
+        week TEXT NOT NULL,
+        incident_type TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (week, incident_type)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS backlog_rollup (
+        incident_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (incident_type, severity)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS staff_workload_rollup (
+        assigned_to TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (assigned_to, status)
+    )
+    """)
+
+
+def create_rollup_triggers(conn):
+    # Triggers that keep the rollups current on every write
+    triggers = {
+        "trg_incidents_rollup_insert": f"AFTER INSERT ON cyber_incidents BEGIN {INCIDENT_ADD_SQL} END",
+        "trg_incidents_rollup_delete": f"AFTER DELETE ON cyber_incidents BEGIN {INCIDENT_REMOVE_SQL} END",
+        "trg_incidents_rollup_update": (
+            "AFTER UPDATE OF date, incident_type, severity, status ON cyber_incidents "
+            f"BEGIN {INCIDENT_REMOVE_SQL} {INCIDENT_ADD_SQL} END"
+        ),
+        "trg_tickets_rollup_insert": f"AFTER INSERT ON it_tickets BEGIN {TICKET_ADD_SQL} END",
+        "trg_tickets_rollup_delete": f"AFTER DELETE ON it_tickets BEGIN {TICKET_REMOVE_SQL} END",
+        "trg_tickets_rollup_update": (
+            "AFTER UPDATE OF assigned_to, status ON it_tickets "
+            f"BEGIN {TICKET_REMOVE_SQL} {TICKET_ADD_SQL} END"
+        ),
+    }
+    for name, body in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def create_counter_table(conn):
+    # One row per table holding its current number of rows
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS table_counts (
+        table_name TEXT PRIMARY KEY,
+        row_count INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+
+
+def create_counter_triggers(conn):
+    # +1 on insert, -1 on delete (updates don't change the count)
+    for table in COUNTED_TABLES:
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert AFTER INSERT ON {table}
+        BEGIN
+            UPDATE table_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+        END
+        """)
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE table_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+        END
+        """)
+
+
+def rebuild_counters(conn, commit=True):
+    # Count every table again from scratch
+    # commit=False leaves committing to the caller (migrations commit once per step)
+    for table in COUNTED_TABLES:
+        conn.execute(
+            f"INSERT OR REPLACE INTO table_counts (table_name, row_count) "
+            f"SELECT '{table}', COUNT(*) FROM {table}"
+        )
+    if commit:
+        conn.commit()
+
+
+def rebuild_rollups(conn, commit=True):
+    # Throw away the rollups and count everything again from the real tables
+    # Safe to run at any time (repair after manual edits, bulk imports, ...)
+    # commit=False leaves committing to the caller (migrations commit once per step)
+    conn.execute("DELETE FROM incident_weekly_rollup")
+    conn.execute(f"""
+    INSERT INTO incident_weekly_rollup (week, incident_type, count)
+    SELECT date(date, 'weekday 0') AS week, incident_type, COUNT(*)
+    FROM cyber_incidents
+    WHERE {WEEKLY_KEY_NEW.replace('NEW.', '')}
+    GROUP BY week, incident_type
+    """)
+
+    conn.execute("DELETE FROM backlog_rollup")
+    conn.execute(f"""
+    INSERT INTO backlog_rollup (incident_type, severity, count)
+    SELECT incident_type, severity, COUNT(*)
+    FROM cyber_incidents
+    WHERE {BACKLOG_KEY_NEW.replace('NEW.', '')}
+    GROUP BY incident_type, severity
+    """)
+
+    conn.execute("DELETE FROM staff_workload_rollup")
+    conn.execute(f"""
+    INSERT INTO staff_workload_rollup (assigned_to, status, count)
+    SELECT assigned_to, status, COUNT(*)
+    FROM it_tickets
+    WHERE {WORKLOAD_KEY_NEW.replace('NEW.', '')}
+    GROUP BY assigned_to, status
+    """)
+
+    # The table_counts table only exists after migration 5
+    has_counters = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_counts'"
+    ).fetchone()
+    if has_counters:
+        rebuild_counters(conn, commit=False)
+    if commit:
+        conn.commit()
+
+
+if __name__ == "__main__":
+    from app.data.db import pooled_connection
+
+    with pooled_connection() as conn:
+        rebuild_rollups(conn)
+    print("✅ Rollup tables rebuilt")
@@ -1,7 +1,7 @@
 # Week 8 - Creating all the database tables
 # This file has all the SQL code to make tables
 
-def create_users_table(conn):
+def create_users_table(conn, commit=True):
     # Make the users table
     cursor = conn.cursor()
     
@@ -17,11 +17,12 @@ def create_users_table(conn):
     """
     
     cursor.execute(create_table_sql)
-    conn.commit()
+    if commit:
+        conn.commit()
     print("✅ Users table created successfully!")
 
 
-def create_cyber_incidents_table(conn):
+def create_cyber_incidents_table(conn, commit=True):
     # Make table for cyber incidents
     cursor = conn.cursor()
     
@@ -35,7 +36,8 @@ def create_cyber_incidents_table(conn):
         status TEXT,
         description TEXT,
         reported_by TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        resolved_date TEXT
     )
     """
     
@@ -43,13 +45,14 @@ def create_cyber_incidents_table(conn):
     cursor.execute(create_table_sql)
     
     # Save to database
-    conn.commit()
+    if commit:
+        conn.commit()
     
     # Print message
     print("✅ Cyber incidents table created successfully!")
 
 
-def create_datasets_metadata_table(conn):
+def create_datasets_metadata_table(conn, commit=True):
     # Make table for dataset info
     cursor = conn.cursor()
     
@@ -69,13 +72,14 @@ def create_datasets_metadata_table(conn):
     
     # Run SQL
     cursor.execute(create_table_sql)
-    conn.commit()
+    if commit:
+        conn.commit()
     
     # Print message
     print("✅ Datasets metadata table created successfully!")
 
 
-def create_it_tickets_table(conn):
+def create_it_tickets_table(conn, commit=True):
     # Make table for IT tickets
     cursor = conn.cursor()
     
@@ -98,16 +102,18 @@ def create_it_tickets_table(conn):
     
     # Run SQL
     cursor.execute(create_table_sql)
-    conn.commit()
+    if commit:
+        conn.commit()
     
     # Print message
     print("✅ IT tickets table created successfully!")
 
 
-def create_all_tables(conn):
+def create_all_tables(conn, commit=True):
     # Call all functions to make all tables
-    create_users_table(conn)
-    create_cyber_incidents_table(conn)
-    create_datasets_metadata_table(conn)
-    create_it_tickets_table(conn)
+    # Week 12 - commit=False leaves committing to the caller (migrations commit once per step)
+    create_users_table(conn, commit)
+    create_cyber_incidents_table(conn, commit)
+    create_datasets_metadata_table(conn, commit)
+    create_it_tickets_table(conn, commit)
     print("\n✅ All tables created successfully!")
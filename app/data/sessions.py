@@ -0,0 +1,73 @@
+# Week 12 - Functions for login sessions
+# Rows are looked up by token hash (the primary key), so every check is one
+# index lookup. These don't go through the query cache - SessionManager keeps
+# its own cache of checked tokens
+
+from app.data.db import pooled_connection, DB_PATH
+
+
+def insert_session(token_hash, username, family_id, created_at, expires_at):
+    # Save a new session
+    with pooled_connection() as conn:
+        conn.execute(
+            "INSERT INTO sessions (token_hash, username, family_id, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (token_hash, username, family_id, created_at, expires_at)
+        )
+        conn.commit()
+
+
+def get_session(token_hash):
+    # (username, family_id, expires_at, successor_hash) for a token hash,
+    # None if there is no such session
+    with pooled_connection() as conn:
+        return conn.execute(
+            "SELECT username, family_id, expires_at, successor_hash FROM sessions WHERE token_hash = ?",
+            (token_hash,)
+        ).fetchone()
+
+
+def rotate_session(token_hash, new_hash, username, family_id, now, new_expires_at, old_expires_at):
+    # Swap a token for a new one in the same family, in one transaction
+    # Returns False (and changes nothing) if the token was already rotated -
+    # another tab or process got there first
+    with pooled_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE sessions SET successor_hash = ?, expires_at = MIN(expires_at, ?) "
+            "WHERE token_hash = ? AND successor_hash IS NULL",
+            (new_hash, old_expires_at, token_hash)
+        )
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return False
+        conn.execute(
+            "INSERT INTO sessions (token_hash, username, family_id, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (new_hash, username, family_id, now, new_expires_at)
+        )
+        conn.commit()
+        return True
+
+
+def delete_session_family(family_id):
+    # End one login (logout) - its current token and every token it rotated out
+    with pooled_connection() as conn:
+        cursor = conn.execute("DELETE FROM sessions WHERE family_id = ?", (family_id,))
+        conn.commit()
+        return cursor.rowcount
+
+
+def delete_user_sessions(username, db_path=DB_PATH):
+    # End every session of one user
+    with pooled_connection(db_path) as conn:
+        cursor = conn.execute("DELETE FROM sessions WHERE username = ?", (username,))
+        conn.commit()
+        return cursor.rowcount
+
+
+def delete_expired_sessions(now):
+    # Remove sessions that have run out
+    with pooled_connection() as conn:
+        cursor = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        conn.commit()
+        return cursor.rowcount
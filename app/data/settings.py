@@ -0,0 +1,23 @@
+# Week 12 - Functions for app settings
+# Small key / value settings picked for this deployment (for example the bcrypt
+# cost measured on this machine), kept in the app_settings table
+
+from app.data.db import pooled_connection
+from app.data.cache import invalidate_tables, fetch_one_cached
+
+
+def get_setting(key, default=None):
+    # The saved value (as text), or default if it hasn't been set
+    row = fetch_one_cached("SELECT value FROM app_settings WHERE key = ?", (key,))
+    return row[0] if row else default
+
+
+def set_setting(key, value):
+    # Save (or replace) a setting
+    with pooled_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO app_settings (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (key, str(value))
+        )
+        conn.commit()
+        invalidate_tables("app_settings")
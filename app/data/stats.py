@@ -0,0 +1,59 @@
+# Week 12 - Dashboard statistics
+# All row counts in one query from the table_counts table (kept current by triggers)
+# The result is cached for the whole process for a few seconds, and the cache is
+# cleared straight away whenever something is inserted or deleted
+
+import threading
+import time
+from app.data.db import pooled_connection
+
+# How long (seconds) the cached stats are used before reading them again
+STATS_TTL = 5
+
+# Dashboard key -> table name
+STATS_TABLES = {
+    'users': 'users',
+    'incidents': 'cyber_incidents',
+    'datasets': 'datasets_metadata',
+    'tickets': 'it_tickets',
+}
+
+_cached_stats = None
+_cached_until = 0.0
+_stats_generation = 0       # goes up on every invalidate
+_stats_lock = threading.Lock()
+
+
+def read_platform_stats():
+    # Read every counter in a single round trip (no COUNT(*) scans)
+    with pooled_connection() as conn:
+        rows = conn.execute("SELECT table_name, row_count FROM table_counts").fetchall()
+    counts = dict(rows)
+    return {key: counts.get(table, 0) for key, table in STATS_TABLES.items()}
+
+
+def get_platform_stats():
+    # Get the Dashboard counters, from the cache if it's still fresh
+    global _cached_stats, _cached_until
+    with _stats_lock:
+        if _cached_stats is not None and time.monotonic() < _cached_until:
+            return dict(_cached_stats)
+        generation = _stats_generation
+
+    stats = read_platform_stats()
+
+    with _stats_lock:
+        # Don't cache if a write happened while we were reading
+        if generation == _stats_generation:
+            _cached_stats = stats
+            _cached_until = time.monotonic() + STATS_TTL
+    return dict(stats)
+
+
+def invalidate_stats():
+    # Forget the cached stats (called after every insert/delete)
+    global _cached_stats, _cached_until, _stats_generation
+    with _stats_lock:
+        _cached_stats = None
+        _cached_until = 0.0
+        _stats_generation += 1
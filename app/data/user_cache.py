@@ -0,0 +1,213 @@
+# Week 12 - User lookup cache
+# Logging in and registering both start with "find this username". The query
+# cache keeps those results too, but ANY write to the users table throws all of
+# them away, so every registration made every other user's next login hit the
+# database. This cache is keyed by username instead:
+#   - a write only changes the cached entry of the user it wrote
+#   - names that DON'T exist are remembered too (negative caching), so repeated
+#     guesses at unknown usernames never reach the database
+#   - a role -> usernames index answers admin listings without a query
+#
+# Writes made by app/data/users.py update the cache themselves. Any other write
+# to the users table (DatabaseManager.execute_query, migrate_users_from_file...)
+# goes through invalidate_tables("users"), which moves the query cache's
+# generation for "users" on - this cache notices that and starts again. Writes
+# from other processes are caught by check_outside_writes() (PRAGMA data_version).
+# It can't tell them apart from this process's own commits, so after any commit
+# it clears the query cache and so this one too. Nothing is kept longer than
+# USER_CACHE_TTL
+
+import threading
+import time
+from collections import OrderedDict
+from app.data.cache import query_cache, check_outside_writes
+
+USER_CACHE_MAX_ENTRIES = 10000
+USER_CACHE_TTL = 60                 # seconds, same as the query cache
+
+# Column order of the rows this cache keeps (the same order as SELECT * FROM users)
+USER_ROW_COLUMNS = "id, username, password_hash, role, created_at"
+
+
+class UserCache:
+    """
+    Username -> user row cache (rows and "no such user"), plus a role index
+    """
+
+    def __init__(self, max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL):
+        """
+        Constructor - start with an empty cache
+
+        Parameters:
+            max_entries (int) - most usernames to remember
+            ttl (float) - most seconds a user (or the role index) is kept
+        """
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__entries = OrderedDict()      # (db path, username) -> (row or None if there is no such user, expires_at)
+        self.__roles = {}                   # db path -> ({role: set of usernames}, expires_at)
+        self.__generation = query_cache.get_generations(("users",))
+        self.__lock = threading.Lock()
+
+        # Statistics
+        self.__hits = 0
+        self.__misses = 0
+
+    def get_generation(self):
+        """
+        Get the users table's write counter - take it BEFORE reading the database
+        and give it to put() so a result that a write overtook isn't kept
+
+        Returns:
+            tuple - the query cache's generation for "users"
+        """
+        return query_cache.get_generations(("users",))
+
+    def get(self, db_path, username):
+        """
+        Look up a username
+
+        Parameters:
+            db_path (str) - database the user is in
+            username (str) - username to find
+
+        Returns:
+            tuple - (found: bool, row or None) - found with None means "no such user"
+        """
+        check_outside_writes(db_path)
+        key = (str(db_path), username)
+        with self.__lock:
+            self.__check_generation()
+            entry = self.__entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self.__entries.pop(key, None)
+                self.__misses += 1
+                return False, None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return True, entry[0]
+
+    def put(self, db_path, username, row, generation):
+        """
+        Remember a lookup result
+
+        Parameters:
+            db_path (str) - database the user is in
+            username (str) - username that was looked up
+            row (tuple or None) - the user row, None if there is no such user
+            generation (tuple) - get_generation() from before the query
+        """
+        with self.__lock:
+            self.__check_generation()
+            if generation != self.__generation:
+                return
+            self.__remember((str(db_path), username), row)
+
+    def get_role(self, db_path, role):
+        """
+        Usernames with a role
+
+        Parameters:
+            db_path (str) - database the users are in
+            role (str) - e.g. "admin"
+
+        Returns:
+            list or None - sorted usernames, None if the index isn't loaded yet
+        """
+        check_outside_writes(db_path)
+        with self.__lock:
+            self.__check_generation()
+            index = self.__roles.get(str(db_path))
+            if index is None or index[1] <= time.monotonic():
+                self.__roles.pop(str(db_path), None)
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            return sorted(index[0].get(role, ()))
+
+    def put_all(self, db_path, rows, generation):
+        """
+        Build the role index from every user (and remember their rows)
+
+        Parameters:
+            db_path (str) - database the users are in
+            rows (list) - every user row, in USER_ROW_COLUMNS order
+            generation (tuple) - get_generation() from before the query
+        """
+        with self.__lock:
+            self.__check_generation()
+            if generation != self.__generation:
+                return
+            roles = {}
+            for row in rows:
+                roles.setdefault(row[3], set()).add(row[1])
+                if len(self.__entries) < self.__max_entries:
+                    self.__remember((str(db_path), row[1]), row)
+            self.__roles[str(db_path)] = (roles, time.monotonic() + self.__ttl)
+
+    def record_write(self, db_path, username, new_role=None, role_changed=False):
+        """
+        A write through app/data/users.py changed one user - call it AFTER invalidate_tables("users")
+
+        Parameters:
+            db_path (str) - database that was written
+            username (str) - the user that changed
+            new_role (str) - the user's role now (None if they were deleted)
+            role_changed (bool) - True for an insert, role change or delete
+        """
+        with self.__lock:
+            current = self.get_generation()
+            expected = self.__generation[:-1] + (self.__generation[-1] + 1,)
+            if current != expected:
+                # Something else wrote to users as well - start again
+                self.__clear()
+            self.__generation = current
+
+            self.__entries.pop((str(db_path), username), None)
+            index = self.__roles.get(str(db_path))
+            if role_changed and index is not None:
+                roles = index[0]
+                for usernames in roles.values():
+                    usernames.discard(username)
+                if new_role is not None:
+                    roles.setdefault(new_role, set()).add(username)
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict - cached usernames (and how many are "no such user"), hits and misses
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                'entries': len(self.__entries),
+                'missing_users': sum(1 for entry in self.__entries.values() if entry[0] is None),
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hit_rate': self.__hits / lookups if lookups else 0.0
+            }
+
+    def __check_generation(self):
+        """HELPER METHOD: forget everything if users changed behind our back (lock must be held)"""
+        current = self.get_generation()
+        if current != self.__generation:
+            self.__clear()
+            self.__generation = current
+
+    def __clear(self):
+        """HELPER METHOD: forget every user and the role index (lock must be held)"""
+        self.__entries.clear()
+        self.__roles.clear()
+
+    def __remember(self, key, row):
+        """HELPER METHOD: add to the cache, dropping the least recently used (lock must be held)"""
+        self.__entries[key] = (row, time.monotonic() + self.__ttl)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+
+# One user cache shared by the whole process
+user_cache = UserCache()
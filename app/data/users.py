@@ -1,69 +1,112 @@
 # Week 8 - Functions to work with users in the database
 # CRUD means Create Read Update Delete
+# Week 12 - Uses pooled connections instead of opening a new one every call
+# and reads go through the query cache (writes clear the cached results)
+# Week 12 - single users are looked up through the user cache (app/data/user_cache.py),
+# and every write here tells it which user changed
 
-from app.data.db import connect_database
+from app.data.db import DB_PATH, pooled_connection
+from app.data.cache import invalidate_tables, fetch_all_cached
+from app.data.user_cache import user_cache, USER_ROW_COLUMNS
+from app.data.sessions import delete_user_sessions
 
 
-def get_user_by_username(username):
-    # Find a user by their username
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM users WHERE username = ?",
-        (username,)
-    )
-    user = cursor.fetchone()
-    conn.close()
-    return user
+def get_user_by_username(username, db_path=DB_PATH):
+    # Find a user by their username - row in USER_ROW_COLUMNS order, or None
+    # (unknown usernames are cached too, so asking again doesn't query)
+    found, row = user_cache.get(db_path, username)
+    if found:
+        return row
 
+    generation = user_cache.get_generation()
+    with pooled_connection(db_path) as conn:
+        row = conn.execute(
+            f"SELECT {USER_ROW_COLUMNS} FROM users WHERE username = ?",
+            (username,)
+        ).fetchone()
+    user_cache.put(db_path, username, row, generation)
+    return row
 
-def insert_user(username, password_hash, role='user'):
+
+def get_cached_user(username, db_path=DB_PATH):
+    # Look a user up in the cache only, never the database
+    # Returns (found, row) - found is False when the cache doesn't know
+    return user_cache.get(db_path, username)
+
+
+def get_users_by_role(role, db_path=DB_PATH):
+    # Every user with a role (e.g. 'admin'), sorted by username
+    # The first call loads all users once to build the role index
+    usernames = user_cache.get_role(db_path, role)
+    if usernames is None:
+        generation = user_cache.get_generation()
+        with pooled_connection(db_path) as conn:
+            rows = conn.execute(f"SELECT {USER_ROW_COLUMNS} FROM users").fetchall()
+        user_cache.put_all(db_path, rows, generation)
+        return sorted((row for row in rows if row[3] == role), key=lambda row: row[1])
+    return [get_user_by_username(username, db_path) for username in usernames]
+
+
+def insert_user(username, password_hash, role='user', db_path=DB_PATH):
     # Add a new user to the database
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-        (username, password_hash, role)
-    )
-    conn.commit()
-    user_id = cursor.lastrowid
-    conn.close()
-    return user_id
+    with pooled_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+            (username, password_hash, role)
+        )
+        conn.commit()
+        invalidate_tables("users")
+        user_cache.record_write(db_path, username, new_role=role, role_changed=True)
+        return cursor.lastrowid
 
 
 def get_all_users():
     # Get all users from database
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, username, role, created_at FROM users")
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    return fetch_all_cached("SELECT id, username, role, created_at FROM users")
 
 
-def update_user_role(username, new_role):
+def update_user_role(username, new_role, db_path=DB_PATH):
     # Change a user's role
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET role = ? WHERE username = ?",
-        (new_role, username)
-    )
-    conn.commit()
-    rows_updated = cursor.rowcount
-    conn.close()
-    return rows_updated
-
-
-def delete_user(username):
+    with pooled_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET role = ? WHERE username = ?",
+            (new_role, username)
+        )
+        conn.commit()
+        invalidate_tables("users")
+        user_cache.record_write(db_path, username, new_role=new_role, role_changed=cursor.rowcount > 0)
+        return cursor.rowcount
+
+
+def update_password_hash(username, new_hash, old_hash, db_path=DB_PATH):
+    # Replace a user's password hash, but only if it is still old_hash
+    # (so a password changed in the meantime is never overwritten)
+    with pooled_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?",
+            (new_hash, username, old_hash)
+        )
+        conn.commit()
+        invalidate_tables("users")
+        user_cache.record_write(db_path, username)
+        return cursor.rowcount
+
+
+def delete_user(username, db_path=DB_PATH):
     # Remove a user from database
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM users WHERE username = ?",
-        (username,)
-    )
-    conn.commit()
-    rows_deleted = cursor.rowcount
-    conn.close()
-    return rows_deleted
+    # Week 12 - also ends their login sessions (a check already cached by
+    # SessionManager can still pass for up to SESSION_CACHE_SECONDS)
+    with pooled_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM users WHERE username = ?",
+            (username,)
+        )
+        conn.commit()
+        invalidate_tables("users")
+        user_cache.record_write(db_path, username, role_changed=True)
+    delete_user_sessions(username, db_path)
+    return cursor.rowcount
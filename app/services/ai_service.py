@@ -1,9 +1,36 @@
 # Week 11 - AI Service with Multiple Companies
 # AI Assistant class that works with multiple AI services for speed and current info
 # Uses: HuggingFace (backup), Groq (fast), and SerpAPI (web search)
+# Week 12 - Answers are cached (memory + SQLite) so repeat questions skip the AI call,
+# and web search results are cached so repeat searches skip SerpAPI
+# Week 12 - Hedged requests: if Groq is slower than usual, HuggingFace is asked too
+# and whichever answers first wins
+# Week 12 - The web search runs at the same time as the provider warm-up, with a
+# deadline - a slow search no longer holds up the answer
+# Week 12 - stream_* methods yield the answer as it is written (for st.write_stream)
+# Week 12 - get_ai_assistant() shares one AIAssistant (and its HTTP connections)
+# with the whole process instead of building a new one on every call / rerun
+# Week 12 - analyze_incidents_batch() triages many incidents in parallel
+# (rate limited per provider, retried with backoff, results saved in incident_analyses)
+# Week 12 - Each provider has a circuit breaker: one that keeps failing is skipped
+# until it recovers, and requests go to the fastest healthy provider first
+# Week 12 - Chat questions are also matched against similar past questions
+# (semantic cache), so "what's phishing" reuses the answer to "What is phishing?"
 
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED, TimeoutError
 import streamlit as st
 from huggingface_hub import InferenceClient
+from app.data.ai_cache import response_cache, make_cache_key
+from app.services.search_cache import search_cache, normalise_query
+from app.services.semantic_cache import semantic_cache
+from app.services.latency import get_provider_latency, get_latency_stats
+from app.services.rate_limit import get_provider_limiter
+from app.services.circuit_breaker import get_provider_breaker
+from app.data.incident_analyses import get_analysis, save_analysis
 
 # Try to import optional AI providers
 # If they're not installed or no API key, we just use HuggingFace
@@ -13,12 +40,93 @@ try:
 except ImportError:
     GROQ_AVAILABLE = False
 
+try:
+    # Groq's SDK is built on httpx - we give it our own connection pool
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 try:
     from serpapi import GoogleSearch
     SERPAPI_AVAILABLE = True
 except ImportError:
     SERPAPI_AVAILABLE = False
 
+# Settings sent with every AI request (also part of the cache key)
+AI_MAX_TOKENS = 1000
+AI_TEMPERATURE = 0.7
+
+# Hedging - start the backup provider if the first one is slower than its usual p95
+HEDGING_ENABLED = True
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 5           # below this we don't trust the p95 yet
+HEDGE_DEFAULT_DELAY = 3.0       # seconds to wait before hedging with too few samples
+HEDGE_MIN_DELAY = 0.5           # never hedge sooner than this
+
+# Web search - give up waiting after this many seconds and answer without web results
+# (the search keeps going and its results are cached for the next question)
+SEARCH_DEADLINE = 4.0
+# Re-open the provider connection if it hasn't been used for this long (seconds)
+WARM_UP_INTERVAL = 60
+
+# Added to the user message when web results are found ({web_info} is filled in)
+WEB_RESULTS_PROMPT = "\n\n## CURRENT WEB SEARCH RESULTS (Retrieved December 2025):\n{web_info}\n\n⚠️ MANDATORY INSTRUCTIONS:\n1. Write your professional analysis using the information above\n2. Keep URLs out of the main body\n3. At the END, add references section using this EXACT format:\n\n**References:**\n[1] Article Title - https://actual-url-from-source-line.com\n[2] Article Title - https://actual-url-from-source-line.com\n\nEXAMPLE (if search results showed 'Source: https://example.com/article'):\n**References:**\n[1] Cloudflare DDoS Report - https://example.com/article\n\n4. CRITICAL: Copy the EXACT URLs after 'Source:' in the results above\n5. If you write '[1] Title' without the actual URL, that is WRONG - always include the full URL"
+
+# Adaptive routing - the provider with the lowest recent median latency goes first
+# (once every provider has enough samples). Now and then the usual order is kept
+# so the slower provider's latency numbers stay up to date
+ADAPTIVE_ROUTING = True
+ROUTING_PERCENTILE = 50
+ROUTING_MIN_SAMPLES = 5
+ROUTING_EXPLORE_RATE = 0.1
+
+# Batch triage - parallel analyses, retries and how long to wait for the rate limiter
+BATCH_WORKERS = 4
+BATCH_MAX_ATTEMPTS = 3
+BATCH_BACKOFF = 2.0             # seconds before the first retry (doubles each time)
+RATE_LIMIT_WAIT = 30            # most seconds a batch request waits for its provider's rate limit
+
+# HTTP connection pool for Groq - connections are kept open between questions
+# (longer than WARM_UP_INTERVAL, so a warmed-up connection is still there)
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 120
+
+# Threads that run the provider calls (shared by every AIAssistant)
+_provider_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ai-provider")
+# Threads for web searches and warm-ups, so they never wait behind provider calls
+_background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai-background")
+
+
+def make_http_client():
+    # Pooled keep-alive HTTP client for the Groq SDK (None = let the SDK make its own)
+    # HuggingFace's InferenceClient already reuses one shared session per process
+    if not HTTPX_AVAILABLE:
+        return None
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def describe_incident(incident):
+    # The text sent to the AI for one SecurityIncident
+    # (the Incidents page and batch triage use the same text, so they share cached answers)
+    return f"""Type: {incident.get_incident_type()}
+Severity: {incident.get_severity()}
+Description: {incident.get_description()}
+Date: {incident.get_date()}
+Severity Level: {incident.get_severity_level()}/4"""
+
+
+def content_hash(text):
+    # Short fingerprint of a text - changes whenever the text changes
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 class AIAssistant:
     """
@@ -30,6 +138,9 @@ class AIAssistant:
     3. SerpAPI - Gets current information from web (optional)
     
     It automatically uses the best available service and falls back if needed
+    
+    Week 12 - use get_ai_assistant() to get the shared instance instead of
+    AIAssistant(), so secrets, clients and connections are only set up once
     """
     
     def __init__(self):
@@ -46,7 +157,10 @@ class AIAssistant:
         self.__groq_client = None
         if GROQ_AVAILABLE and "GROQ_API_KEY" in st.secrets:
             try:
-                self.__groq_client = Groq(api_key=st.secrets["GROQ_API_KEY"])
+                self.__groq_client = Groq(
+                    api_key=st.secrets["GROQ_API_KEY"],
+                    http_client=make_http_client()
+                )
                 self.__groq_model = "llama-3.1-8b-instant" 
                 print("✓ Groq API configured - fast responses enabled")
             except Exception as e:
@@ -62,6 +176,9 @@ class AIAssistant:
             print("✓ SerpAPI configured - web search enabled for current info")
         else:
             print("ℹ SerpAPI not configured - using training data only")
+        
+        # Week 12 - when the provider connection was last opened (see __warm_up)
+        self.__last_warm_up = 0.0
     
     def __get_current_threats(self, search_query):
         """
@@ -79,6 +196,20 @@ class AIAssistant:
             print("⚠️  SerpAPI key not configured - skipping web search")
             return ""
         
+        # Week 12 - Use the cached results if we searched for this recently
+        # (old results are returned at once and refreshed in the background)
+        return search_cache.get_or_fetch(search_query, self.__search_web)
+    
+    def __search_web(self, search_query):
+        """
+        HELPER METHOD: Run one SerpAPI search (called by the search cache)
+        
+        Parameters:
+            search_query (str) - what to search for on Google
+            
+        Returns:
+            str - formatted search results, or empty string if nothing was found
+        """
         try:
             # Search Google using SerpAPI
             search = GoogleSearch({
@@ -125,7 +256,7 @@ class AIAssistant:
             print(f"❌ Web search exception: {e}")
             return ""
     
-    def __ask_ai(self, messages, use_web_search=False, search_query=None):
+    def __ask_ai(self, messages, use_web_search=False, search_query=None, call_type="chat", question=None):
         """
         HELPER METHOD: Send question to AI (tries Groq first, then HuggingFace)
         (This is a private method - only used inside this class)
@@ -134,47 +265,499 @@ class AIAssistant:
             messages (list) - the conversation messages to send to AI
             use_web_search (bool) - should we add current web info?
             search_query (str) - what to search for if using web
+            call_type (str) - "incident", "tips" or "chat" (decides how long the answer is cached)
+            question (str) - the user's own question, for the semantic cache (chat only)
             
         Returns:
             str - AI's response
         """
+        # Week 12 - STEP 0: Same question asked before? Use the saved answer
+        # (checked before the web search, so a cache hit skips SerpAPI too)
+        cache_key = self.__cache_key(messages, use_web_search, search_query)
+        cached = self.__get_cached(cache_key, question)
+        if cached is not None:
+            return cached
+        
         # STEP 1: Add current web information if requested
-        if use_web_search and search_query:
-            print(f"🔍 Searching web: {search_query}")
-            web_info = self.__get_current_threats(search_query)
-            if web_info:
-                # Add the web results to the USER message (last one in the list)
-                # The system message is first, user message is last
-                messages[-1]["content"] += f"\n\n## CURRENT WEB SEARCH RESULTS (Retrieved December 2025):\n{web_info}\n\n⚠️ MANDATORY INSTRUCTIONS:\n1. Write your professional analysis using the information above\n2. Keep URLs out of the main body\n3. At the END, add references section using this EXACT format:\n\n**References:**\n[1] Article Title - https://actual-url-from-source-line.com\n[2] Article Title - https://actual-url-from-source-line.com\n\nEXAMPLE (if search results showed 'Source: https://example.com/article'):\n**References:**\n[1] Cloudflare DDoS Report - https://example.com/article\n\n4. CRITICAL: Copy the EXACT URLs after 'Source:' in the results above\n5. If you write '[1] Title' without the actual URL, that is WRONG - always include the full URL"
-                print("✓ Web search successful - added current info to prompt")
-                print(f"📊 Added {len(web_info.split('- '))-1} search results to context")
-            else:
-                print("✗ Web search returned no results - check SerpAPI key or query")
+        web_info, search_timed_out = self.__add_web_results(messages, use_web_search, search_query)
         
-        # STEP 2: Try Groq first since it's faster
-        if self.__groq_client:
+        # STEP 2 + 3: Groq first, HuggingFace as backup
+        started = time.perf_counter()
+        try:
+            answer, provider, model = self.__call_providers(messages)
+        except Exception as e:
+            # Errors are never cached
+            return f"Error: {str(e)}"
+        
+        # STEP 4: Save the answer for next time
+        # (not if the search was cut off - next time it will have the web results)
+        if not search_timed_out:
+            self.__save_answer(cache_key, answer, call_type, provider, model, web_info, started, question)
+        return answer
+    
+    def __stream_ai(self, messages, use_web_search=False, search_query=None, call_type="chat", question=None):
+        """
+        HELPER METHOD: Same as __ask_ai, but yields the answer a few words at a time
+        (This is a private method - only used inside this class)
+        
+        Falls back to the next provider if one fails before sending anything.
+        If it fails halfway through, the words already shown can't be taken back,
+        so an error note is added at the end instead.
+        
+        Parameters:
+            same as __ask_ai
+            
+        Yields:
+            str - the next piece of the answer
+        """
+        # STEP 0: A cached answer comes back in one piece
+        cache_key = self.__cache_key(messages, use_web_search, search_query)
+        cached = self.__get_cached(cache_key, question)
+        if cached is not None:
+            yield cached
+            return
+        
+        # STEP 1: Add current web information if requested
+        web_info, search_timed_out = self.__add_web_results(messages, use_web_search, search_query)
+        
+        # STEP 2 + 3: Stream from each provider in turn until one works
+        last_error = RuntimeError("All AI providers are temporarily unavailable - try again shortly")
+        for name, model, _, stream in self.__providers():
+            histogram = get_provider_latency(name)
+            # Streams record the time to the first words in their own histogram - the
+            # whole stream also includes the time the page spends showing it, which
+            # would push up the p95 that hedging and routing use
+            first_chunk_histogram = get_provider_latency(f"{name}:first_chunk")
+            parts = []
             try:
-                response = self.__groq_client.chat.completions.create(
-                    model=self.__groq_model,
-                    messages=messages,
-                    max_tokens=1000,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
+                breaker = self.__start_call(name)
+            except Exception as e:
+                print(f"{name} skipped: {e}")
+                last_error = e
+                continue
+            started = time.perf_counter()
+            judged = False
+            try:
+                for text in stream(messages):
+                    if not parts:
+                        # The breaker judges streams on time to the first words
+                        # (kept apart from whole-call times, see circuit_breaker.py)
+                        first_chunk_seconds = time.perf_counter() - started
+                        first_chunk_histogram.record(first_chunk_seconds)
+                        breaker.record_success(first_chunk_seconds, kind="first_chunk")
+                        judged = True
+                    parts.append(text)
+                    yield text
+                if not parts:
+                    breaker.record_success(time.perf_counter() - started, kind="first_chunk")
+                    judged = True
+            except Exception as e:
+                histogram.record_failure()
+                if parts:
+                    yield f"\n\n❌ Error: the answer was cut off ({e})"
+                    return
+                breaker.record_failure()
+                judged = True
+                print(f"{name} failed, trying the next provider: {e}")
+                last_error = e
+                continue
+            finally:
+                # Abandoned before the first words (page rerun, user left) -
+                # free the breaker's half-open test slot instead of holding it forever
+                if not judged:
+                    breaker.cancel_request()
+            
+            # STEP 4: Save the whole answer for next time
+            if not search_timed_out:
+                self.__save_answer(cache_key, "".join(parts), call_type, name, model, web_info, started, question)
+            return
+        
+        yield f"Error: {str(last_error)}"
+    
+    def __cache_key(self, messages, use_web_search, search_query):
+        """HELPER METHOD: Response cache key for a request (see app/data/ai_cache.py)"""
+        return make_cache_key(
+            self.__primary_model(), messages, AI_TEMPERATURE, AI_MAX_TOKENS,
+            normalise_query(search_query) if use_web_search else None
+        )
+    
+    def __get_cached(self, cache_key, question=None):
+        """
+        HELPER METHOD: Look up a saved answer
+        Exact matches first, then (if a question is given) similar past questions
+        
+        Returns:
+            str or None - the answer, None if it isn't cached
+        """
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ Cached {cached['call_type']} answer from {cached['provider']} ({cached['cache_level']})")
+            return cached["answer"]
+        if question:
+            similar = semantic_cache.get(question)
+            if similar is not None:
+                print(f"⚡ Reusing the answer to a similar question ({similar['similarity']:.2f}): {similar['question']}")
+                return similar["answer"]
+        return None
+    
+    def __save_answer(self, cache_key, answer, call_type, provider, model, web_info, started, question=None):
+        """HELPER METHOD: Put an answer in the response cache (and semantic cache) with where it came from"""
+        # An empty answer would be served again as if it were real
+        if not answer or not answer.strip():
+            return
+        response_cache.put(
+            cache_key, answer, call_type,
+            provider=provider,
+            model=model,
+            used_web_search=bool(web_info),
+            latency_ms=(time.perf_counter() - started) * 1000
+        )
+        if question:
+            semantic_cache.put(question, answer)
+    
+    def __add_web_results(self, messages, use_web_search, search_query):
+        """
+        HELPER METHOD: Search the web and add the results to the user message
+        Week 12 - the search and the provider warm-up run at the same time,
+        and we only wait SEARCH_DEADLINE seconds for the search
+        
+        Parameters:
+            messages (list) - the conversation messages (changed in place)
+            use_web_search (bool) - should we add current web info?
+            search_query (str) - what to search for
+            
+        Returns:
+            tuple - (web results text or "", True if the search missed the deadline)
+        """
+        web_info = ""
+        search_timed_out = False
+        if not (use_web_search and search_query):
+            return web_info, search_timed_out
+        
+        print(f"🔍 Searching web: {search_query}")
+        search_future = _background_executor.submit(self.__get_current_threats, search_query)
+        self.__warm_up()
+        try:
+            web_info = search_future.result(timeout=SEARCH_DEADLINE)
+        except TimeoutError:
+            search_timed_out = True
+            print(f"⏱ Web search took longer than {SEARCH_DEADLINE}s - answering without it")
+        
+        if web_info:
+            # Add the web results to the USER message (last one in the list)
+            # The system message is first, user message is last
+            messages[-1]["content"] += WEB_RESULTS_PROMPT.format(web_info=web_info)
+            print("✓ Web search successful - added current info to prompt")
+            print(f"📊 Added {len(web_info.split('- '))-1} search results to context")
+        elif not search_timed_out:
+            print("✗ Web search returned no results - check SerpAPI key or query")
+        return web_info, search_timed_out
+    
+    def __warm_up(self):
+        """
+        HELPER METHOD: Open the Groq connection in the background (DNS + TLS handshake)
+        so it is ready when the question is sent. Only runs if the connection may have
+        gone idle. HuggingFace has no cheap request to do this with, so it isn't warmed up.
+        """
+        if not self.__groq_client or time.monotonic() - self.__last_warm_up < WARM_UP_INTERVAL:
+            return
+        self.__last_warm_up = time.monotonic()
+        
+        def warm_up():
+            try:
+                self.__groq_client.models.list()
             except Exception as e:
-                print(f"Groq failed, trying HuggingFace: {e}")
+                print(f"ℹ Groq warm-up failed (the real request will still be tried): {e}")
+        
+        _background_executor.submit(warm_up)
+    
+    def __primary_model(self):
+        """
+        HELPER METHOD: The model that normally answers (used in the cache key)
         
-        # STEP 3: Use HuggingFace as backup since it will ideally always work
+        Returns:
+            str - Groq model if Groq is set up, otherwise the HuggingFace model
+        """
+        if self.__groq_client:
+            return self.__groq_model
+        return self.__hf_model
+    
+    def __providers(self):
+        """
+        HELPER METHOD: The providers to use, in order of preference
+
+        Providers whose circuit breaker is open are left out, and with
+        ADAPTIVE_ROUTING the fastest healthy provider goes first
+
+        Returns:
+            list - (provider name, model name, call function, stream function) tuples
+                   (empty if every provider is unavailable)
+        """
+        providers = []
+        if self.__groq_client:
+            providers.append(("groq", self.__groq_model, self.__call_groq, self.__stream_groq))
+        providers.append(("huggingface", self.__hf_model, self.__call_huggingface, self.__stream_huggingface))
+
+        # Week 12 - During an outage, go straight to the providers that are working
+        providers = [provider for provider in providers if get_provider_breaker(provider[0]).is_available()]
+
+        if ADAPTIVE_ROUTING and len(providers) > 1 and random.random() >= ROUTING_EXPLORE_RATE:
+            histograms = [get_provider_latency(provider[0]) for provider in providers]
+            # Only reorder when every provider has enough recent calls to compare
+            if all(histogram.count() >= ROUTING_MIN_SAMPLES for histogram in histograms):
+                latencies = {provider[0]: histogram.percentile(ROUTING_PERCENTILE)
+                             for provider, histogram in zip(providers, histograms)}
+                # sorted() keeps the usual order for equal latencies
+                providers = sorted(providers, key=lambda provider: latencies[provider[0]])
+        return providers
+
+    def __start_call(self, provider_name, rate_limited=False):
+        """
+        HELPER METHOD: Check the circuit breaker (and, for batch work, wait for the rate limit)
+        (raises an error if the provider can't be used right now)
+
+        Parameters:
+            provider_name (str) - "groq" or "huggingface"
+            rate_limited (bool) - True for batch triage, which shares the provider's
+                                  rate limit - questions from the pages never wait for it
+
+        Returns:
+            CircuitBreaker - record the call's result on it
+        """
+        if rate_limited:
+            self.__wait_for_rate_limit(provider_name)
+        breaker = get_provider_breaker(provider_name)
+        if not breaker.allow_request():
+            raise RuntimeError(f"{provider_name} is temporarily unavailable (circuit open)")
+        return breaker
+    
+    def __call_groq(self, messages):
+        """HELPER METHOD: One Groq request - returns the answer text"""
+        response = self.__groq_client.chat.completions.create(
+            model=self.__groq_model,
+            messages=messages,
+            max_tokens=AI_MAX_TOKENS,
+            temperature=AI_TEMPERATURE
+        )
+        return response.choices[0].message.content
+    
+    def __call_huggingface(self, messages):
+        """HELPER METHOD: One HuggingFace request - returns the answer text"""
+        response = self.__hf_client.chat_completion(
+            messages=messages,
+            model=self.__hf_model,
+            max_tokens=AI_MAX_TOKENS,
+            temperature=AI_TEMPERATURE
+        )
+        return response.choices[0].message.content
+    
+    def __stream_groq(self, messages):
+        """HELPER METHOD: One streaming Groq request - yields pieces of the answer"""
+        stream = self.__groq_client.chat.completions.create(
+            model=self.__groq_model,
+            messages=messages,
+            max_tokens=AI_MAX_TOKENS,
+            temperature=AI_TEMPERATURE,
+            stream=True
+        )
+        return self.__read_stream(stream)
+    
+    def __stream_huggingface(self, messages):
+        """HELPER METHOD: One streaming HuggingFace request - yields pieces of the answer"""
+        stream = self.__hf_client.chat_completion(
+            messages=messages,
+            model=self.__hf_model,
+            max_tokens=AI_MAX_TOKENS,
+            temperature=AI_TEMPERATURE,
+            stream=True
+        )
+        return self.__read_stream(stream)
+    
+    @staticmethod
+    def __read_stream(stream):
+        """
+        HELPER METHOD: Get the text out of streamed chunks
+        Both Groq and HuggingFace send OpenAI-style chunks (choices[0].delta.content)
+        The stream is closed if the page stops reading early
+        """
         try:
-            response = self.__hf_client.chat_completion(
-                messages=messages,
-                model=self.__hf_model,
-                max_tokens=1000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error: {str(e)}"
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+    
+    def __timed_call(self, provider, messages, rate_limited=False):
+        """
+        HELPER METHOD: Call one provider and record its latency
+        
+        Parameters:
+            provider (tuple) - (name, model, call function, stream function) from __providers()
+            messages (list) - the conversation messages to send to AI
+            rate_limited (bool) - wait for the provider's rate limit first (batch triage)
+            
+        Returns:
+            tuple - (answer, provider name, model name)
+        """
+        name, model, call, _ = provider
+        breaker = self.__start_call(name, rate_limited)
+        histogram = get_provider_latency(name)
+        started = time.perf_counter()
+        try:
+            answer = call(messages)
+        except Exception:
+            histogram.record_failure()
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Interrupted, not a provider failure - just free a half-open test slot
+            breaker.cancel_request()
+            raise
+        seconds = time.perf_counter() - started
+        histogram.record(seconds)
+        breaker.record_success(seconds)
+        return answer, name, model
+    
+    def __wait_for_rate_limit(self, provider_name):
+        """
+        HELPER METHOD: Wait until the provider's rate limit allows another request
+        (raises an error if that would take longer than RATE_LIMIT_WAIT)
+        """
+        if not get_provider_limiter(provider_name).acquire(timeout=RATE_LIMIT_WAIT):
+            raise RuntimeError(f"{provider_name} rate limit reached - try again shortly")
+    
+    def __call_providers(self, messages, rate_limited=False):
+        """
+        HELPER METHOD: Get an answer from the first provider, or the next one if it fails
+        (usually Groq then HuggingFace - see __providers() for the routing)
+        With hedging on, the second provider is also started if the first is unusually slow
+        
+        Parameters:
+            messages (list) - the conversation messages to send to AI
+            rate_limited (bool) - wait for the providers' rate limits (batch triage only)
+            
+        Returns:
+            tuple - (answer, provider name, model name)
+        """
+        providers = self.__providers()
+        if not providers:
+            raise RuntimeError("All AI providers are temporarily unavailable - try again shortly")
+        if HEDGING_ENABLED and len(providers) > 1:
+            return self.__hedged_call(providers[0], providers[1], messages, rate_limited)
+        
+        # One after the other - the next provider only starts if the previous one failed
+        last_error = None
+        for provider in providers:
+            try:
+                return self.__timed_call(provider, messages, rate_limited)
+            except Exception as e:
+                print(f"{provider[0]} failed: {e}")
+                last_error = e
+        # If every provider failed, the error goes back to __ask_ai
+        raise last_error
+    
+    def __hedge_delay(self, provider_name):
+        """
+        HELPER METHOD: How long to wait for a provider before starting the backup
+        
+        Returns:
+            float - seconds (the provider's recent p95)
+        """
+        histogram = get_provider_latency(provider_name)
+        if histogram.count() < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, histogram.percentile(HEDGE_PERCENTILE))
+    
+    def __hedged_call(self, primary, secondary, messages, rate_limited=False):
+        """
+        HELPER METHOD: Hedged request across two providers
+        
+        1. Start the primary provider
+        2. If it hasn't answered within its p95, start the secondary as well
+           (straight away if the primary fails)
+        3. Return the first good answer and cancel the other request
+        
+        Parameters:
+            primary (tuple) - provider from __providers() tried first
+            secondary (tuple) - backup provider
+            messages (list) - the conversation messages to send to AI
+            rate_limited (bool) - wait for the providers' rate limits (batch triage only)
+            
+        Returns:
+            tuple - (answer, provider name, model name)
+        """
+        primary_future = _provider_executor.submit(self.__timed_call, primary, messages, rate_limited)
+        done, _ = wait([primary_future], timeout=self.__hedge_delay(primary[0]))
+        
+        if done and primary_future.exception() is None:
+            return primary_future.result()
+        if done:
+            print(f"{primary[0]} failed, trying {secondary[0]}: {primary_future.exception()}")
+            pending = set()
+            last_error = primary_future.exception()
+        else:
+            print(f"⏱ {primary[0]} is slow - also asking {secondary[0]}")
+            pending = {primary_future}
+            last_error = None
+        
+        # The messages list is shared, so each provider gets its own copy
+        secondary_messages = [dict(message) for message in messages]
+        pending.add(_provider_executor.submit(self.__timed_call, secondary, secondary_messages, rate_limited))
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Cancel the loser - a request that already started can't be
+                    # stopped mid-way, but its answer is thrown away
+                    for loser in pending:
+                        loser.cancel()
+                    return future.result()
+                last_error = future.exception()
+        
+        raise last_error
+    
+    def get_latency_stats(self):
+        """
+        Get per-provider latency histograms (for monitoring and hedging)
+        
+        Returns:
+            dict - provider name -> statistics
+        """
+        return get_latency_stats()
+    
+    def get_provider_health(self):
+        """
+        Week 12 - Get each provider's circuit breaker state and recent latency (for monitoring)
+        
+        Returns:
+            dict - provider name -> breaker state, counters, p50 and p95 (seconds)
+        """
+        names = ["huggingface"]
+        if self.__groq_client:
+            names.insert(0, "groq")
+        health = {}
+        for name in names:
+            histogram = get_provider_latency(name)
+            health[name] = get_provider_breaker(name).get_stats()
+            health[name]['p50'] = histogram.percentile(50)
+            health[name]['p95'] = histogram.percentile(95)
+        return health
+    
+    def get_cache_stats(self):
+        """
+        Get AI answer and web search cache statistics
+        
+        Returns:
+            dict - 'answers', 'similar_questions' and 'searches' statistics from the shared caches
+        """
+        return {
+            'answers': response_cache.get_stats(),
+            'similar_questions': semantic_cache.get_stats(),
+            'searches': search_cache.get_stats()
+        }
     
     def analyze_incident(self, incident_description):
         """
@@ -186,6 +769,157 @@ class AIAssistant:
         Returns:
             str - detailed AI analysis with expert recommendations
         """
+        return self.__ask_ai(**self.__incident_request(incident_description))
+    
+    def stream_incident_analysis(self, incident_description):
+        """
+        Week 12 - Same as analyze_incident(), but the answer arrives a few words at a time
+        (use with st.write_stream so the analyst sees it straight away)
+        
+        Parameters:
+            incident_description (str) - what happened
+            
+        Yields:
+            str - the next piece of the analysis
+        """
+        return self.__stream_ai(**self.__incident_request(incident_description))
+    
+    def get_security_tips(self):
+        """
+        Get expert cybersecurity tips based on current threat landscape
+        Uses web search to get latest threat information if available
+        
+        Returns:
+            str - professional security recommendations
+        """
+        return self.__ask_ai(**self.__tips_request())
+    
+    def stream_security_tips(self):
+        """
+        Week 12 - Same as get_security_tips(), but streamed (see stream_incident_analysis)
+        
+        Yields:
+            str - the next piece of the tips
+        """
+        return self.__stream_ai(**self.__tips_request())
+    
+    def chat(self, user_question):
+        """
+        Expert cybersecurity consultation on any security topic
+        Uses web search to provide current, accurate information
+        
+        Parameters:
+            user_question (str) - question to ask
+            
+        Returns:
+            str - expert analysis with current context
+        """
+        return self.__ask_ai(**self.__chat_request(user_question))
+    
+    def stream_chat(self, user_question):
+        """
+        Week 12 - Same as chat(), but streamed (see stream_incident_analysis)
+        
+        Parameters:
+            user_question (str) - question to ask
+            
+        Yields:
+            str - the next piece of the answer
+        """
+        return self.__stream_ai(**self.__chat_request(user_question))
+    
+    def analyze_incidents_batch(self, incidents, max_workers=BATCH_WORKERS, on_result=None):
+        """
+        Week 12 - Analyze many incidents at the same time
+        
+        Each incident is analyzed on a bounded worker pool. Provider calls are rate
+        limited per provider and retried with exponential backoff. Results are saved
+        in the incident_analyses table by incident id + hash of the incident text,
+        so an unchanged incident is never sent to the AI twice.
+        
+        Parameters:
+            incidents (list) - SecurityIncident objects
+            max_workers (int) - most analyses running at once
+            on_result (function) - optional on_result(incident_id, result), called in
+                                   this thread as each incident finishes (for progress bars)
+            
+        Returns:
+            dict - incident id -> {"analysis": str or None, "source": "saved" / "cache" / "ai" / "failed", "error": str or None}
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-batch") as pool:
+            futures = {
+                pool.submit(self.__analyze_one, incident): incident.get_id()
+                for incident in incidents
+            }
+            for future in as_completed(futures):
+                incident_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"analysis": None, "source": "failed", "error": str(e)}
+                results[incident_id] = result
+                if on_result is not None:
+                    on_result(incident_id, result)
+        return results
+    
+    def __analyze_one(self, incident):
+        """
+        HELPER METHOD: Analyze one incident for analyze_incidents_batch()
+        
+        Returns:
+            dict - {"analysis", "source", "error"}
+        """
+        text = describe_incident(incident)
+        text_hash = content_hash(text)
+        
+        # Already analyzed this exact version of the incident?
+        saved = get_analysis(incident.get_id(), text_hash)
+        if saved is not None:
+            return {"analysis": saved, "source": "saved", "error": None}
+        
+        request = self.__incident_request(text)
+        cache_key = self.__cache_key(request["messages"], False, None)
+        cached = self.__get_cached(cache_key)
+        if cached is not None:
+            save_analysis(incident.get_id(), text_hash, cached)
+            return {"analysis": cached, "source": "cache", "error": None}
+        
+        started = time.perf_counter()
+        answer, provider, model = self.__call_with_retry(request["messages"])
+        self.__save_answer(cache_key, answer, "incident", provider, model, "", started)
+        save_analysis(incident.get_id(), text_hash, answer, provider, model)
+        return {"analysis": answer, "source": "ai", "error": None}
+    
+    def __call_with_retry(self, messages):
+        """
+        HELPER METHOD: __call_providers with retries, within the providers' rate limits
+        Waits BATCH_BACKOFF, then twice as long, ... (plus a little randomness so
+        parallel workers don't all retry at the same moment)
+        
+        Returns:
+            tuple - (answer, provider name, model name)
+        """
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            try:
+                return self.__call_providers(messages, rate_limited=True)
+            except Exception as e:
+                if attempt == BATCH_MAX_ATTEMPTS - 1:
+                    raise
+                delay = BATCH_BACKOFF * (2 ** attempt) + random.uniform(0, BATCH_BACKOFF)
+                print(f"🔁 Analysis failed ({e}) - retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def __incident_request(self, incident_description):
+        """
+        HELPER METHOD: Build the incident analysis request
+        
+        Parameters:
+            incident_description (str) - what happened
+            
+        Returns:
+            dict - keyword arguments for __ask_ai / __stream_ai
+        """
         # Create a professional prompt
         # We tell the AI to act like a senior security expert
         messages = [
@@ -231,17 +965,15 @@ Provide concise, actionable analysis with specific dates and recent examples whe
             }
         ]
         
-        # Send to AI (uses Groq if available, otherwise HuggingFace)
         # No web search needed for incident analysis
-        return self.__ask_ai(messages, use_web_search=False)
+        return {"messages": messages, "use_web_search": False, "call_type": "incident"}
     
-    def get_security_tips(self):
+    def __tips_request(self):
         """
-        Get expert cybersecurity tips based on current threat landscape
-        Uses web search to get latest threat information if available
+        HELPER METHOD: Build the security tips request
         
         Returns:
-            str - professional security recommendations
+            dict - keyword arguments for __ask_ai / __stream_ai
         """
         # Create a professional prompt
         # We tell the AI to act like a tech expert, CISO (Chief Information Security Officer)
@@ -282,23 +1014,23 @@ Avoid generic advice. Provide actionable, modern security guidance with specific
             }
         ]
         
-        # Send to AI with web search to get current threats
-        return self.__ask_ai(
-            messages,
-            use_web_search=True,
-            search_query="cybersecurity threats best practices 2025 prioritising info from cisoseries.com but not making it the only source as judge and jury"
-        )
+        # Use web search to get current threats
+        return {
+            "messages": messages,
+            "use_web_search": True,
+            "search_query": "cybersecurity threats best practices 2025 prioritising info from cisoseries.com but not making it the only source as judge and jury",
+            "call_type": "tips"
+        }
     
-    def chat(self, user_question):
+    def __chat_request(self, user_question):
         """
-        Expert cybersecurity consultation on any security topic
-        Uses web search to provide current, accurate information
+        HELPER METHOD: Build the chat request
         
         Parameters:
             user_question (str) - question to ask
             
         Returns:
-            str - expert analysis with current context
+            dict - keyword arguments for __ask_ai / __stream_ai
         """
         # Create a professional prompt
         # We tell the AI to act like a top security consultant
@@ -338,12 +1070,38 @@ Answer as if advising a client who needs clear, professional guidance."""
             }
         ]
         
-        # Send to AI with web search to provide current context
-        return self.__ask_ai(
-            messages,
-            use_web_search=True,
-            search_query=f"{user_question} cybersecurity 2025"
-        )
+        # Use web search to provide current context
+        return {
+            "messages": messages,
+            "use_web_search": True,
+            "search_query": f"{user_question} cybersecurity 2025",
+            "call_type": "chat",
+            "question": user_question
+        }
+
+
+# SHARED ASSISTANT
+# Built the first time someone needs it, then reused by every page, rerun and thread
+
+_assistant = None
+_assistant_lock = threading.Lock()
+
+
+def get_ai_assistant():
+    """
+    Get the process-wide AIAssistant (creates it on first use)
+    
+    Returns:
+        AIAssistant - the shared instance
+    """
+    global _assistant
+    # Checked once without the lock (fast path) and again with it,
+    # so two threads starting at the same time don't both build one
+    if _assistant is None:
+        with _assistant_lock:
+            if _assistant is None:
+                _assistant = AIAssistant()
+    return _assistant
 
 
 # BACKWARD COMPATIBILITY
@@ -362,25 +1120,36 @@ def get_hf_client():
 def analyze_security_incident(incident_description):
     """
     Old function - analyze incident (OLD WAY)
-    Use AIAssistant().analyze_incident() for new code
+    Use get_ai_assistant().analyze_incident() for new code
     """
-    ai = AIAssistant()
-    return ai.analyze_incident(incident_description)
+    return get_ai_assistant().analyze_incident(incident_description)
 
 
 def generate_security_tips():
     """
     Old function - get tips (OLD WAY)
-    Use AIAssistant().get_security_tips() for new code
+    Use get_ai_assistant().get_security_tips() for new code
     """
-    ai = AIAssistant()
-    return ai.get_security_tips()
+    return get_ai_assistant().get_security_tips()
 
 
 def chat_with_ai(user_question):
     """
     Old function - chat with AI (OLD WAY)
-    Use AIAssistant().chat() for new code
+    Use get_ai_assistant().chat() for new code
+    """
+    return get_ai_assistant().chat(user_question)
+
+
+def stream_chat_with_ai(user_question):
+    """
+    Week 12 - streaming version of chat_with_ai() (for st.write_stream)
+    """
+    return get_ai_assistant().stream_chat(user_question)
+
+
+def stream_security_tips():
+    """
+    Week 12 - streaming version of generate_security_tips() (for st.write_stream)
     """
-    ai = AIAssistant()
-    return ai.chat(user_question)
+    return get_ai_assistant().stream_security_tips()
@@ -1,14 +1,26 @@
 # Week 11 - Authentication Manager Class
 # This class handles user authentication in an OOP way
+# Week 12 - password hashing runs in the bounded hashing pool; when it is
+# overloaded, login / register return a "try again" message instead of queueing
+# Week 12 - after a successful login, a hash made with a lower bcrypt cost than
+# the current setting is upgraded in the background (no password reset needed)
+# Week 12 - login attempts are throttled per username and per client, and a
+# throttled attempt is refused before the user lookup or any bcrypt work
+# Week 12 - users are looked up through the user cache, so login and register
+# each make at most one database query
 
+import math
 from app.services.user_service import (
     hash_password,
     verify_password,
     validate_username,
     validate_password,
-    register_user as register_user_function
+    needs_rehash,
+    rehash_in_background
 )
 from app.services.database_manager import DatabaseManager
+from app.services.password_hashing import HashingBusyError
+from app.services.rate_limit import login_throttle
 
 
 class AuthManager:
@@ -50,17 +62,23 @@ class AuthManager:
         """
         return validate_password(password)
     
-    def login(self, username, password):
+    def login(self, username, password, client_id=None):
         """
         Try to login a user
         
         Parameters:
             username (str) - username
             password (str) - plain text password
+            client_id (str) - who is logging in, e.g. their IP address (optional)
             
         Returns:
             tuple - (success: bool, user_object or None, error_message: str)
         """
+        # Too many attempts? Refuse before doing any database or bcrypt work
+        wait_time = login_throttle.check_attempt(username, client_id)
+        if wait_time > 0:
+            return False, None, f"Too many login attempts - try again in {math.ceil(wait_time)} seconds"
+        
         # Get user object from database
         user = self.__db_manager.get_user_by_username(username)
         
@@ -68,7 +86,15 @@ class AuthManager:
             return False, None, "Username not found"
         
         # Verify password using the User object method
-        if verify_password(password, user.get_password_hash()):
+        try:
+            password_ok = verify_password(password, user.get_password_hash())
+        except HashingBusyError as e:
+            return False, None, str(e)
+        
+        if password_ok:
+            login_throttle.record_success(username)
+            if needs_rehash(user.get_password_hash()):
+                rehash_in_background(username, password, user.get_password_hash())
             return True, user, "Login successful"
         else:
             return False, None, "Invalid password"
@@ -96,17 +122,20 @@ class AuthManager:
             return False, pass_msg
         
         # Check if user already exists
-        existing_user = self.__db_manager.get_user_by_username(username)
-        if existing_user:
+        # Week 12 - only asks the user cache; if it doesn't know the name, the
+        # UNIQUE username column catches a duplicate, so the INSERT is the only query
+        found, existing_user = self.__db_manager.get_cached_user(username)
+        if found and existing_user:
             return False, f"Username '{username}' already exists"
         
-        # Register using existing function
-        success = register_user_function(username, password, role)
+        try:
+            password_hash = hash_password(password)
+        except HashingBusyError as e:
+            return False, str(e)
         
-        if success:
-            return True, "Registration successful"
-        else:
-            return False, "Registration failed"
+        if self.__db_manager.insert_user(username, password_hash, role) is None:
+            return False, f"Username '{username}' already exists"
+        return True, "Registration successful"
     
     def __str__(self):
         """
@@ -0,0 +1,232 @@
+# Week 12 - Circuit breakers for the AI providers
+# When a provider keeps failing (or keeps being very slow) its breaker "opens"
+# and requests skip it completely instead of waiting for it to fail every time
+#
+#   closed    - normal, every request is allowed
+#   open      - too many recent calls failed or were too slow, requests skip it
+#   half_open - the cool-down is over, ONE test request is allowed through:
+#               if it works the breaker closes, if not it opens again
+#
+# "Slow" is judged against the provider's own normal speed (its rolling p95),
+# not a fixed number - a long HuggingFace answer taking 15 seconds is normal,
+# the same provider suddenly taking a minute is not. Streams are judged on the
+# time to their first words, which is kept apart from whole-call times
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BREAKER_WINDOW = 20             # recent calls used for the failure / slow rates
+BREAKER_MIN_CALLS = 5           # don't judge a provider on fewer calls than this
+BREAKER_FAILURE_RATE = 0.5      # open when half the recent calls failed
+BREAKER_SLOW_FACTOR = 3.0       # a call over 3x the provider's usual p95 counts as slow...
+BREAKER_SLOW_FLOOR = 5.0        # ...but a call under 5 seconds never does
+BREAKER_BASELINE_WINDOW = 100   # normal-speed calls the p95 is worked out from
+BREAKER_SLOW_RATE = 0.8         # open when most recent calls were slow
+BREAKER_OPEN_SECONDS = 30       # how long to skip a provider before testing it again
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for one provider
+    """
+
+    def __init__(self, name, window=BREAKER_WINDOW, open_seconds=BREAKER_OPEN_SECONDS):
+        """
+        Constructor - start closed with no calls recorded
+
+        Parameters:
+            name (str) - provider name (for log messages)
+            window (int) - how many recent calls to judge the provider on
+            open_seconds (float) - cool-down before a test request is allowed
+        """
+        self.__name = name
+        self.__state = CLOSED
+        self.__recent = deque(maxlen=window)    # (failed, slow) per call
+        # Durations of recent calls that weren't slow, per kind ("call" or "first_chunk")
+        self.__baselines = {
+            "call": deque(maxlen=BREAKER_BASELINE_WINDOW),
+            "first_chunk": deque(maxlen=BREAKER_BASELINE_WINDOW),
+        }
+        self.__open_seconds = open_seconds
+        self.__opened_at = 0.0
+        self.__trial_running = False
+        self.__lock = threading.Lock()
+
+        # Statistics
+        self.__successes = 0
+        self.__failures = 0
+        self.__rejected = 0
+        self.__times_opened = 0
+
+    def is_available(self):
+        """
+        Could a request be sent now? (doesn't use up the half-open test request)
+
+        Returns:
+            bool - False while the breaker is open or its test request is running
+        """
+        with self.__lock:
+            if self.__state == CLOSED:
+                return True
+            if self.__state == OPEN:
+                return time.monotonic() - self.__opened_at >= self.__open_seconds
+            return not self.__trial_running
+
+    def allow_request(self):
+        """
+        Ask to send a request - call record_success() or record_failure() afterwards
+
+        Returns:
+            bool - True if the request may go ahead
+        """
+        with self.__lock:
+            if self.__state == OPEN and time.monotonic() - self.__opened_at >= self.__open_seconds:
+                self.__state = HALF_OPEN
+                self.__trial_running = False
+                print(f"🔌 {self.__name} circuit half-open - sending one test request")
+            if self.__state == CLOSED:
+                return True
+            if self.__state == HALF_OPEN and not self.__trial_running:
+                self.__trial_running = True
+                return True
+            self.__rejected += 1
+            return False
+
+    def record_success(self, seconds, kind="call"):
+        """
+        Record a call that worked
+
+        Parameters:
+            seconds (float) - how long the provider took to answer
+            kind (str) - "call" for a whole answer, "first_chunk" for a stream's first words
+        """
+        with self.__lock:
+            self.__successes += 1
+            slow = self.__is_slow(seconds, kind)
+            # While open, late results from calls started before it opened are only counted
+            if self.__state == HALF_OPEN:
+                # It answered - even a slow answer means the provider is back.
+                # Start again with a clean record and learn its speed again
+                self.__state = CLOSED
+                self.__trial_running = False
+                self.__recent.clear()
+                for baseline in self.__baselines.values():
+                    baseline.clear()
+                self.__baselines[kind].append(seconds)
+                print(f"✅ {self.__name} circuit closed - provider is healthy again")
+            elif self.__state == CLOSED:
+                if not slow:
+                    self.__baselines[kind].append(seconds)
+                self.__recent.append((False, slow))
+                self.__check()
+
+    def record_failure(self):
+        """Record a call that failed"""
+        with self.__lock:
+            self.__failures += 1
+            if self.__state == HALF_OPEN:
+                self.__open()
+            elif self.__state == CLOSED:
+                self.__recent.append((True, False))
+                self.__check()
+
+    def cancel_request(self):
+        """
+        A request from allow_request() was given up before it had a result
+        (e.g. the user left the page mid-stream) - frees the half-open test slot
+        """
+        with self.__lock:
+            if self.__state == HALF_OPEN:
+                self.__trial_running = False
+
+    def get_state(self):
+        """The current state: "closed", "open" or "half_open" """
+        with self.__lock:
+            return self.__state
+
+    def get_stats(self):
+        """
+        Get the breaker state and counters (for monitoring)
+
+        Returns:
+            dict - state, recent failure / slow rates, counters and seconds until the next test
+        """
+        with self.__lock:
+            failure_rate, slow_rate = self.__rates()
+            retry_in = 0.0
+            if self.__state == OPEN:
+                retry_in = max(0.0, self.__open_seconds - (time.monotonic() - self.__opened_at))
+            return {
+                'state': self.__state,
+                'recent_calls': len(self.__recent),
+                'failure_rate': failure_rate,
+                'slow_rate': slow_rate,
+                'successes': self.__successes,
+                'failures': self.__failures,
+                'rejected': self.__rejected,
+                'times_opened': self.__times_opened,
+                'retry_in': retry_in,
+                'slow_after': self.__slow_threshold("call")
+            }
+
+    def __slow_threshold(self, kind):
+        """HELPER METHOD: seconds after which a call of this kind is slow, None while still learning (lock must be held)"""
+        baseline = self.__baselines[kind]
+        if len(baseline) < BREAKER_MIN_CALLS:
+            return None
+        ordered = sorted(baseline)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(BREAKER_SLOW_FLOOR, BREAKER_SLOW_FACTOR * p95)
+
+    def __is_slow(self, seconds, kind):
+        """HELPER METHOD: was this call much slower than the provider usually is? (lock must be held)"""
+        threshold = self.__slow_threshold(kind)
+        return threshold is not None and seconds > threshold
+
+    def __rates(self):
+        """HELPER METHOD: (failure rate, slow rate) over the recent calls (lock must be held)"""
+        if not self.__recent:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self.__recent if failed)
+        slow = sum(1 for _, was_slow in self.__recent if was_slow)
+        return failures / len(self.__recent), slow / len(self.__recent)
+
+    def __check(self):
+        """HELPER METHOD: open the breaker if the recent calls are bad enough (lock must be held)"""
+        if len(self.__recent) < BREAKER_MIN_CALLS:
+            return
+        failure_rate, slow_rate = self.__rates()
+        if failure_rate >= BREAKER_FAILURE_RATE or slow_rate >= BREAKER_SLOW_RATE:
+            self.__open()
+
+    def __open(self):
+        """HELPER METHOD: stop sending requests for a while (lock must be held)"""
+        self.__state = OPEN
+        self.__opened_at = time.monotonic()
+        self.__trial_running = False
+        self.__times_opened += 1
+        print(f"⛔ {self.__name} circuit opened - skipping it for {self.__open_seconds}s")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_provider_breaker(provider):
+    # The shared circuit breaker for one provider ("groq", "huggingface", ...)
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def get_breaker_stats():
+    # Breaker state and counters for every provider that has been used
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.get_stats() for name, breaker in breakers.items()}
@@ -4,10 +4,24 @@
 import sqlite3
 from pathlib import Path
 from typing import List, Optional
+from app.data.db import connect_database, pooled_connection
+from app.data.cache import fetch_one_cached, fetch_all_cached, read_sql_cached, invalidate_for_sql, invalidate_tables
+from app.data.users import get_user_by_username, get_cached_user, get_users_by_role, insert_user
 from models.user import User
 from models.security_incident import SecurityIncident
 from models.dataset import Dataset
 from models.it_ticket import ITTicket
+from models.incident_table import IncidentTable
+from models.ticket_table import TicketTable
+
+# Week 12 - Columns the Incidents page is allowed to filter on
+INCIDENT_FILTER_COLUMNS = ("severity", "status", "incident_type")
+
+# Week 12 - Sort orders for keyset pagination: (ORDER BY, how to compare with the cursor)
+INCIDENT_ORDERS = {
+    "newest": ("id DESC", "<"),
+    "oldest": ("id ASC", ">"),
+}
 
 
 class DatabaseManager:
@@ -27,12 +41,15 @@ class DatabaseManager:
         self.__connection = None
     
     def connect(self):
-        """Open connection to database"""
+        """
+        Hold on to one pooled connection until close() is called
+        (Not needed for normal queries - each query borrows one from the pool)
+        """
         if self.__connection is None:
-            self.__connection = sqlite3.connect(str(self.__db_path))
+            self.__connection = connect_database(self.__db_path)
     
     def close(self):
-        """Close database connection"""
+        """Give the held connection back to the pool"""
         if self.__connection is not None:
             self.__connection.close()
             self.__connection = None
@@ -48,17 +65,17 @@ class DatabaseManager:
         Returns:
             cursor - database cursor
         """
-        if self.__connection is None:
-            self.connect()
-        
-        cursor = self.__connection.cursor()
-        cursor.execute(sql, params)
-        self.__connection.commit()
+        with pooled_connection(self.__db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            conn.commit()
+        # Week 12 - forget cached results that read the changed table
+        invalidate_for_sql(sql)
         return cursor
     
     def fetch_one(self, sql, params=()):
         """
-        Fetch one row from database
+        Fetch one row from database (Week 12 - through the query cache)
         
         Parameters:
             sql (str) - SQL query
@@ -67,16 +84,11 @@ class DatabaseManager:
         Returns:
             tuple - one row of data, or None
         """
-        if self.__connection is None:
-            self.connect()
-        
-        cursor = self.__connection.cursor()
-        cursor.execute(sql, params)
-        return cursor.fetchone()
+        return fetch_one_cached(sql, params, self.__db_path)
     
     def fetch_all(self, sql, params=()):
         """
-        Fetch all rows from database
+        Fetch all rows from database (Week 12 - through the query cache)
         
         Parameters:
             sql (str) - SQL query
@@ -85,12 +97,7 @@ class DatabaseManager:
         Returns:
             list - list of tuples (rows)
         """
-        if self.__connection is None:
-            self.connect()
-        
-        cursor = self.__connection.cursor()
-        cursor.execute(sql, params)
-        return cursor.fetchall()
+        return fetch_all_cached(sql, params, self.__db_path)
     
     # USER OPERATIONS
     
@@ -104,13 +111,58 @@ class DatabaseManager:
         Returns:
             User object or None
         """
-        sql = "SELECT username, password_hash, role FROM users WHERE username = ?"
-        row = self.fetch_one(sql, (username,))
+        # Week 12 - through the user cache (at most one query, none if cached)
+        row = get_user_by_username(username, self.__db_path)
         
         if row:
-            return User(username=row[0], password_hash=row[1], role=row[2])
+            return User.from_row(row[1:4])
         return None
     
+    def get_cached_user(self, username):
+        """
+        Look a user up in the user cache only - never queries the database
+        
+        Parameters:
+            username (str) - username to search for
+            
+        Returns:
+            tuple - (found: bool, User object or None)
+                    found is False when the cache doesn't know the username
+        """
+        found, row = get_cached_user(username, self.__db_path)
+        return found, (User.from_row(row[1:4]) if row else None)
+    
+    def get_users_by_role(self, role) -> List[User]:
+        """
+        Get every user with a role (for admin listings)
+        
+        Parameters:
+            role (str) - e.g. "admin" or "user"
+            
+        Returns:
+            list - User objects, sorted by username
+        """
+        return [User.from_row(row[1:4]) for row in get_users_by_role(role, self.__db_path) if row]
+    
+    def insert_user(self, username, password_hash, role='user'):
+        """
+        Add a new user
+        
+        Parameters:
+            username (str) - username
+            password_hash (str) - bcrypt hash of the password
+            role (str) - user role
+            
+        Returns:
+            int or None - new user id, None if the username is already taken
+        """
+        try:
+            return insert_user(username, password_hash, role, self.__db_path)
+        except sqlite3.IntegrityError:
+            # Taken after all (e.g. added by another process) - make the caches look again
+            invalidate_tables("users")
+            return None
+    
     # INCIDENT OPERATIONS
     
     def get_all_incidents(self) -> List[SecurityIncident]:
@@ -120,23 +172,152 @@ class DatabaseManager:
         Returns:
             list - list of SecurityIncident objects
         """
-        sql = "SELECT id, date, incident_type, severity, status, description, reported_by FROM cyber_incidents ORDER BY id DESC"
+        sql = f"SELECT {SecurityIncident.COLUMNS} FROM cyber_incidents ORDER BY id DESC"
         rows = self.fetch_all(sql)
         
-        incidents = []
-        for row in rows:
-            incident = SecurityIncident(
-                incident_id=row[0],
-                date=row[1],
-                incident_type=row[2],
-                severity=row[3],
-                status=row[4],
-                description=row[5],
-                reported_by=row[6]
-            )
-            incidents.append(incident)
-        
-        return incidents
+        # Week 12 - from_row skips the keyword-argument constructor (much faster for big lists)
+        return [SecurityIncident.from_row(row) for row in rows]
+    
+    def get_incident_table(self, filters=None, after_id=None, limit=None) -> IncidentTable:
+        """
+        Get incidents as one column table (for lists, bulk views and exports)
+        
+        Parameters:
+            filters (dict) - same format as query_incidents()
+            after_id (int) - last id of the previous page, None for the first page
+            limit (int) - most incidents to return, None for all of them
+            
+        Returns:
+            IncidentTable - matching incidents, newest first
+        """
+        sql, params = self.__build_incident_select(filters, "newest", after_id, limit)
+        return IncidentTable.from_rows(self.fetch_all(sql, params))
+    
+    def query_incidents(self, filters=None, order="newest", after_id=None, limit=50) -> List[SecurityIncident]:
+        """
+        Get one page of incidents, filtered inside the database
+        
+        Uses keyset pagination: instead of OFFSET (which still reads every
+        skipped row) the next page starts after the last id we saw.
+        
+        Parameters:
+            filters (dict) - column name -> list of allowed values,
+                             e.g. {"severity": ["High", "Critical"]}
+            order (str) - "newest" (id DESC) or "oldest" (id ASC)
+            after_id (int) - last id of the previous page, None for the first page
+            limit (int) - most incidents to return
+            
+        Returns:
+            list - list of SecurityIncident objects
+        """
+        sql, params = self.__build_incident_select(filters, order, after_id, limit)
+        rows = self.fetch_all(sql, params)
+        
+        return [SecurityIncident.from_row(row) for row in rows]
+    
+    def get_incidents_dataframe(self, filters=None):
+        """
+        Get EVERY incident matching the filters as a DataFrame (for CSV exports)
+        
+        Parameters:
+            filters (dict) - same format as query_incidents()
+            
+        Returns:
+            DataFrame - matching incidents, newest first
+        """
+        where_sql, params = self.__build_incident_where(filters)
+        sql = f"SELECT {SecurityIncident.COLUMNS} FROM cyber_incidents"
+        if where_sql:
+            sql += " WHERE " + " AND ".join(where_sql)
+        sql += " ORDER BY id DESC"
+        return read_sql_cached(sql, tuple(params), self.__db_path)
+    
+    def count_incidents(self, filters=None):
+        """
+        Count incidents matching the filters
+        
+        Parameters:
+            filters (dict) - same format as query_incidents()
+            
+        Returns:
+            int - number of matching incidents
+        """
+        where_sql, params = self.__build_incident_where(filters)
+        sql = "SELECT COUNT(*) FROM cyber_incidents"
+        if where_sql:
+            sql += " WHERE " + " AND ".join(where_sql)
+        return self.fetch_one(sql, tuple(params))[0]
+    
+    def get_incident_types(self):
+        """
+        Get every incident type in the database (for filter dropdowns)
+        
+        Returns:
+            list - sorted list of incident type names
+        """
+        rows = self.fetch_all(
+            "SELECT DISTINCT incident_type FROM cyber_incidents "
+            "WHERE incident_type IS NOT NULL ORDER BY incident_type"
+        )
+        return [row[0] for row in rows]
+    
+    def __build_incident_select(self, filters, order, after_id, limit):
+        """
+        HELPER METHOD: Build the SELECT for one page of incidents
+        (shared by query_incidents() and get_incident_table())
+        
+        Parameters:
+            filters (dict) - column name -> list of allowed values
+            order (str) - "newest" (id DESC) or "oldest" (id ASC)
+            after_id (int) - last id of the previous page, None for the first page
+            limit (int) - most incidents to return, None for no limit
+            
+        Returns:
+            tuple - (SQL string, tuple of parameters)
+        """
+        if order not in INCIDENT_ORDERS:
+            raise ValueError(f"Unknown order: {order}")
+        order_by, compare = INCIDENT_ORDERS[order]
+        
+        where_sql, params = self.__build_incident_where(filters)
+        if after_id is not None:
+            where_sql.append(f"id {compare} ?")
+            params.append(after_id)
+        
+        sql = f"SELECT {SecurityIncident.COLUMNS} FROM cyber_incidents"
+        if where_sql:
+            sql += " WHERE " + " AND ".join(where_sql)
+        sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        return sql, tuple(params)
+    
+    def __build_incident_where(self, filters):
+        """
+        HELPER METHOD: Turn a filters dict into WHERE parts with ? placeholders
+        
+        Parameters:
+            filters (dict) - column name -> list of allowed values
+            
+        Returns:
+            tuple - (list of SQL conditions, list of parameters)
+        """
+        where_sql = []
+        params = []
+        
+        for column, values in (filters or {}).items():
+            # Column names can't be ? parameters, so only allow known ones
+            if column not in INCIDENT_FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter incidents by: {column}")
+            if not values:
+                continue
+            placeholders = ", ".join("?" for _ in values)
+            where_sql.append(f"{column} IN ({placeholders})")
+            params.extend(values)
+        
+        return where_sql, params
     
     def get_incident_by_id(self, incident_id) -> Optional[SecurityIncident]:
         """
@@ -148,19 +329,11 @@ class DatabaseManager:
         Returns:
             SecurityIncident object or None
         """
-        sql = "SELECT id, date, incident_type, severity, status, description, reported_by FROM cyber_incidents WHERE id = ?"
+        sql = f"SELECT {SecurityIncident.COLUMNS} FROM cyber_incidents WHERE id = ?"
         row = self.fetch_one(sql, (incident_id,))
         
         if row:
-            return SecurityIncident(
-                incident_id=row[0],
-                date=row[1],
-                incident_type=row[2],
-                severity=row[3],
-                status=row[4],
-                description=row[5],
-                reported_by=row[6]
-            )
+            return SecurityIncident.from_row(row)
         return None
     
     def insert_incident(self, incident: SecurityIncident) -> int:
@@ -226,24 +399,11 @@ class DatabaseManager:
         Returns:
             list - list of Dataset objects
         """
-        sql = "SELECT id, dataset_name, file_size_mb, record_count, source, category FROM datasets_metadata ORDER BY id DESC"
+        sql = f"SELECT {Dataset.COLUMNS} FROM datasets_metadata ORDER BY id DESC"
         rows = self.fetch_all(sql)
         
-        datasets = []
-        for row in rows:
-            # Convert MB to bytes for Dataset class
-            size_bytes = int(row[2] * 1024 * 1024) if row[2] else 0
-            dataset = Dataset(
-                dataset_id=row[0],
-                name=row[1],
-                size_bytes=size_bytes,
-                rows=row[3],
-                source=row[4],
-                format_type=row[5]
-            )
-            datasets.append(dataset)
-        
-        return datasets
+        # from_row also converts MB to bytes for the Dataset class
+        return [Dataset.from_row(row) for row in rows]
     
     def insert_dataset(self, dataset_name, category, source, last_updated, record_count, file_size_mb):
         """
@@ -279,23 +439,20 @@ class DatabaseManager:
         Returns:
             list - list of ITTicket objects
         """
-        sql = "SELECT id, ticket_id, subject, priority, status, category, assigned_to, created_date FROM it_tickets ORDER BY id DESC"
+        sql = f"SELECT {ITTicket.COLUMNS} FROM it_tickets ORDER BY id DESC"
         rows = self.fetch_all(sql)
         
-        tickets = []
-        for row in rows:
-            ticket = ITTicket(
-                ticket_id=row[0],  # database id
-                title=row[2],  # subject
-                priority=row[3],
-                status=row[4],
-                category=row[5],
-                assigned_to=row[6],
-                created_date=row[7]
-            )
-            tickets.append(ticket)
-        
-        return tickets
+        return [ITTicket.from_row(row) for row in rows]
+    
+    def get_ticket_table(self) -> TicketTable:
+        """
+        Get all IT tickets as one column table (for bulk views and exports)
+        
+        Returns:
+            TicketTable - every ticket, newest first
+        """
+        sql = f"SELECT {ITTicket.COLUMNS} FROM it_tickets ORDER BY id DESC"
+        return TicketTable.from_rows(self.fetch_all(sql))
     
     def get_ticket_by_id(self, ticket_id) -> Optional[ITTicket]:
         """
@@ -307,19 +464,11 @@ class DatabaseManager:
         Returns:
             ITTicket object or None
         """
-        sql = "SELECT id, ticket_id, subject, priority, status, category, assigned_to, created_date FROM it_tickets WHERE id = ?"
+        sql = f"SELECT {ITTicket.COLUMNS} FROM it_tickets WHERE id = ?"
         row = self.fetch_one(sql, (ticket_id,))
         
         if row:
-            return ITTicket(
-                ticket_id=row[0],
-                title=row[2],
-                priority=row[3],
-                status=row[4],
-                category=row[5],
-                assigned_to=row[6],
-                created_date=row[7]
-            )
+            return ITTicket.from_row(row)
         return None
     
     def insert_ticket(self, ticket_id, priority, status, category, subject, description, created_date, resolved_date=None, assigned_to=None):
@@ -0,0 +1,309 @@
+# Week 12 - Background job queue
+# Long tasks (AI analyses, bulk imports, rollup rebuilds) are saved as rows in the
+# jobs table and run by worker threads, so the page that asked for them stays
+# responsive and a browser refresh doesn't lose the work
+#
+# A page submits a job, keeps the job id in st.session_state and checks its
+# status later. Submitting the same job twice returns the same job id.
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from app.data.db import DB_PATH, pooled_connection
+
+JOB_WORKERS = 2             # jobs running at the same time
+POLL_INTERVAL = 1.0         # seconds between checks for jobs added by other processes
+STALE_JOB_SECONDS = 15 * 60 # "running" this long = its process died, run it again
+
+# job type -> function(payload dict) that returns a JSON-friendly result
+JOB_HANDLERS = {}
+
+
+def job_handler(job_type):
+    # Decorator that registers a function as the handler for one job type
+    def register(function):
+        JOB_HANDLERS[job_type] = function
+        return function
+    return register
+
+
+def make_job_key(job_type, payload):
+    # Same job type + same payload = same job (used for idempotent submits)
+    text = json.dumps({"type": job_type, "payload": payload}, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    """
+    A job queue stored in SQLite with a pool of worker threads
+    """
+
+    def __init__(self, db_path=DB_PATH, workers=JOB_WORKERS):
+        """
+        Constructor - workers are not started until start() is called
+
+        Parameters:
+            db_path (str or Path) - database with the jobs table
+            workers (int) - how many worker threads to run
+        """
+        self.__db_path = db_path
+        self.__worker_count = workers
+        self.__workers = []
+        self.__wake_up = threading.Event()
+        self.__stopping = threading.Event()
+        self.__lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads (safe to call more than once)"""
+        with self.__lock:
+            if self.__workers:
+                return
+            self.__requeue_stale_jobs()
+            self.__stopping.clear()
+            for number in range(self.__worker_count):
+                worker = threading.Thread(
+                    target=self.__work, name=f"job-worker-{number + 1}", daemon=True
+                )
+                worker.start()
+                self.__workers.append(worker)
+        print(f"✅ Job queue started with {self.__worker_count} workers")
+
+    def stop(self):
+        """Ask the workers to finish their current job and stop"""
+        self.__stopping.set()
+        self.__wake_up.set()
+        with self.__lock:
+            workers, self.__workers = self.__workers, []
+        for worker in workers:
+            worker.join()
+
+    def submit(self, job_type, payload=None, key=None):
+        """
+        Add a job to the queue
+
+        If a job with the same key already exists, its id is returned instead of
+        adding a new one. A job that failed is put back in the queue.
+
+        Parameters:
+            job_type (str) - one of the types in JOB_HANDLERS
+            payload (dict) - the job's input (must be JSON-friendly)
+            key (str) - idempotency key (default: made from job_type + payload)
+
+        Returns:
+            int - the job id
+        """
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+        payload = payload or {}
+        key = key or make_job_key(job_type, payload)
+
+        with pooled_connection(self.__db_path) as conn:
+            # Submitting a failed job again = try it again
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', error = NULL, finished_at = NULL "
+                "WHERE job_key = ? AND status = 'failed'",
+                (key,)
+            )
+            # Only adds a row if this key is new (the key is UNIQUE)
+            conn.execute(
+                "INSERT INTO jobs (job_type, job_key, payload, created_at) "
+                "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM jobs WHERE job_key = ?)",
+                (job_type, key, json.dumps(payload), time.time(), key)
+            )
+            conn.commit()
+            job_id = conn.execute("SELECT id FROM jobs WHERE job_key = ?", (key,)).fetchone()[0]
+
+        self.__wake_up.set()
+        return job_id
+
+    def get_job(self, job_id):
+        """
+        Get a job's status (for polling from a page)
+
+        Parameters:
+            job_id (int) - id from submit()
+
+        Returns:
+            dict or None - id, job_type, status, result, error, attempts and times
+        """
+        with pooled_connection(self.__db_path) as conn:
+            row = conn.execute(
+                "SELECT id, job_type, status, result, error, attempts, created_at, "
+                "started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'job_type': row[1],
+            'status': row[2],
+            'result': json.loads(row[3]) if row[3] is not None else None,
+            'error': row[4],
+            'attempts': row[5],
+            'created_at': row[6],
+            'started_at': row[7],
+            'finished_at': row[8]
+        }
+
+    def get_stats(self):
+        """
+        Count jobs by status
+
+        Returns:
+            dict - status -> number of jobs
+        """
+        with pooled_connection(self.__db_path) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def __work(self):
+        """HELPER METHOD: worker thread loop - run jobs until stop() is called"""
+        while not self.__stopping.is_set():
+            job = self.__claim_next_job()
+            if job is None:
+                # Nothing to do - sleep until submit() wakes us or it's time to look again
+                self.__wake_up.wait(POLL_INTERVAL)
+                self.__wake_up.clear()
+                continue
+            self.__run(*job)
+
+    def __claim_next_job(self):
+        """
+        HELPER METHOD: Mark the oldest queued job as running and return it
+        One UPDATE does both, so two workers (or two processes) can't take the same job
+
+        Returns:
+            tuple or None - (job id, job type, payload dict)
+        """
+        with pooled_connection(self.__db_path) as conn:
+            row = conn.execute(
+                """
+                UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1
+                WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+                RETURNING id, job_type, payload
+                """,
+                (time.time(),)
+            ).fetchone()
+            conn.commit()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def __run(self, job_id, job_type, payload):
+        """HELPER METHOD: run one job and save its result or error"""
+        try:
+            handler = JOB_HANDLERS[job_type]
+            result = handler(payload)
+            status, result_json, error = "done", json.dumps(result), None
+            print(f"✅ Job {job_id} ({job_type}) done")
+        except Exception as e:
+            status, result_json, error = "failed", None, str(e)
+            print(f"❌ Job {job_id} ({job_type}) failed: {e}")
+
+        with pooled_connection(self.__db_path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, result_json, error, time.time(), job_id)
+            )
+            conn.commit()
+
+    def __requeue_stale_jobs(self):
+        """HELPER METHOD: put jobs whose process died mid-run back in the queue"""
+        with pooled_connection(self.__db_path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started_at < ?",
+                (time.time() - STALE_JOB_SECONDS,)
+            )
+            conn.commit()
+
+
+# SHARED QUEUE
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Get the process-wide job queue (started on first use)
+
+    Returns:
+        JobQueue - the shared queue
+    """
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                queue = JobQueue()
+                queue.start()
+                _job_queue = queue
+    return _job_queue
+
+
+def users_file_job_key(filepath):
+    # Job key for importing a users file - includes a hash of the file's contents,
+    # so the same file isn't imported twice but an edited one is
+    try:
+        contents_hash = hashlib.sha256(Path(filepath).read_bytes()).hexdigest()
+    except OSError:
+        contents_hash = None
+    return make_job_key("migrate_users", {"filepath": str(filepath), "contents": contents_hash})
+
+
+# JOB TYPES
+# Imports are inside the functions so this module loads without the AI libraries
+
+@job_handler("analyze_incident")
+def run_analyze_incident(payload):
+    # payload: {"incident_id": 12}
+    from app.services.ai_service import get_ai_assistant
+    from app.services.database_manager import DatabaseManager
+
+    incident = DatabaseManager().get_incident_by_id(payload["incident_id"])
+    if incident is None:
+        raise ValueError(f"Incident {payload['incident_id']} not found")
+    # The batch method saves the analysis in incident_analyses as well
+    result = get_ai_assistant().analyze_incidents_batch([incident], max_workers=1)
+    outcome = result[incident.get_id()]
+    if outcome["analysis"] is None:
+        raise RuntimeError(outcome["error"])
+    return {"incident_id": incident.get_id(), "analysis": outcome["analysis"], "source": outcome["source"]}
+
+
+@job_handler("triage_incidents")
+def run_triage_incidents(payload):
+    # payload: {"incident_ids": [12, 15, ...]}
+    from app.services.ai_service import get_ai_assistant
+    from app.services.database_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    incidents = [db_manager.get_incident_by_id(incident_id) for incident_id in payload["incident_ids"]]
+    incidents = [incident for incident in incidents if incident is not None]
+    results = get_ai_assistant().analyze_incidents_batch(incidents)
+    # JSON object keys must be text
+    return {str(incident_id): result for incident_id, result in results.items()}
+
+
+@job_handler("migrate_users")
+def run_migrate_users(payload):
+    # payload: {"filepath": "DATA/users.txt"}
+    # (submit with users_file_job_key() so a changed file can be imported again)
+    from app.services.user_service import migrate_users_from_file
+
+    return {"migrated": migrate_users_from_file(payload.get("filepath", "DATA/users.txt"))}
+
+
+@job_handler("rebuild_rollups")
+def run_rebuild_rollups(payload):
+    # payload: {} - recount every rollup and counter table
+    from app.data.rollups import rebuild_rollups
+    from app.data.cache import invalidate_tables
+
+    with pooled_connection() as conn:
+        rebuild_rollups(conn)
+    # Also clears the rollup and counter tables that depend on these
+    invalidate_tables("cyber_incidents", "it_tickets", "datasets_metadata", "users")
+    return {"rebuilt": True}
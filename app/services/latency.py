@@ -0,0 +1,117 @@
+# Week 12 - Latency tracking for the AI providers
+# Every Groq / HuggingFace call records how long it took, so we can see a
+# histogram per provider and work out a p95 (the time 95% of calls finish within)
+# AIAssistant uses the p95 to decide when to start a backup (hedged) request
+
+import threading
+from collections import deque
+
+# Histogram bucket upper limits in seconds (the last bucket is "slower than 32s")
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)
+
+# How many recent calls are used for percentiles
+LATENCY_WINDOW = 200
+
+
+class LatencyHistogram:
+    """
+    Latency statistics for one provider
+    Keeps bucket counts for all calls and the most recent calls for percentiles
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        """
+        Constructor - start with no calls recorded
+
+        Parameters:
+            window (int) - how many recent calls to keep for percentiles
+        """
+        self.__buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.__recent = deque(maxlen=window)
+        self.__successes = 0
+        self.__failures = 0
+        self.__lock = threading.Lock()
+
+    def record(self, seconds):
+        """
+        Record one successful call
+
+        Parameters:
+            seconds (float) - how long it took
+        """
+        with self.__lock:
+            self.__successes += 1
+            self.__recent.append(seconds)
+            for index, limit in enumerate(LATENCY_BUCKETS):
+                if seconds <= limit:
+                    self.__buckets[index] += 1
+                    break
+            else:
+                self.__buckets[-1] += 1
+
+    def record_failure(self):
+        """Record one failed call (not used for percentiles)"""
+        with self.__lock:
+            self.__failures += 1
+
+    def percentile(self, percent, default=None):
+        """
+        Get a latency percentile over the recent calls
+
+        Parameters:
+            percent (float) - e.g. 95 for p95
+            default - returned when no calls have been recorded yet
+
+        Returns:
+            float - seconds
+        """
+        with self.__lock:
+            if not self.__recent:
+                return default
+            ordered = sorted(self.__recent)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def count(self):
+        """Number of successful calls in the recent window"""
+        with self.__lock:
+            return len(self.__recent)
+
+    def get_stats(self):
+        """
+        Get the histogram and summary numbers
+
+        Returns:
+            dict - bucket counts, call counts, p50 and p95 (seconds)
+        """
+        with self.__lock:
+            labels = [f"<={limit}s" for limit in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+            buckets = dict(zip(labels, self.__buckets))
+            successes = self.__successes
+            failures = self.__failures
+        return {
+            'successes': successes,
+            'failures': failures,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'histogram': buckets
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def get_provider_latency(provider):
+    # The shared histogram for one provider ("groq", "huggingface", ...)
+    with _histograms_lock:
+        if provider not in _histograms:
+            _histograms[provider] = LatencyHistogram()
+        return _histograms[provider]
+
+
+def get_latency_stats():
+    # Statistics for every provider that has been called
+    with _histograms_lock:
+        providers = dict(_histograms)
+    return {name: histogram.get_stats() for name, histogram in providers.items()}
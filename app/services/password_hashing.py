@@ -0,0 +1,249 @@
+# Week 12 - Password hashing service
+# bcrypt is slow on purpose (about a quarter of a second per password) and holds
+# the CPU the whole time. Run on the Streamlit script thread, a burst of logins
+# waits in a line behind each other
+#
+# Here bcrypt runs in a small pool of worker PROCESSES, so several passwords are
+# checked at once on different cores (threads wouldn't help - the GIL). The pool
+# is bounded: if too many requests are waiting, new ones are turned away straight
+# away (backpressure), and every request has a deadline
+#
+# Week 12 - calibrate_rounds() measures bcrypt on this machine and picks the
+# highest cost that still fits BCRYPT_TARGET_SECONDS (saved as a setting, see
+# get_bcrypt_rounds() in user_service.py). It runs in the pool too, and never
+# goes below bcrypt's default cost - a slow or busy machine can only make it
+# stronger, never weaker
+
+import os
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+HASH_WORKERS = max(1, min(4, os.cpu_count() or 1))     # one bcrypt per core, at most 4
+HASH_MAX_PENDING = HASH_WORKERS * 8                     # requests running or waiting
+HASH_DEADLINE = 5.0                                     # seconds a request may take in total
+
+# bcrypt cost ("rounds") - every +1 doubles the time a hash takes
+BCRYPT_DEFAULT_ROUNDS = 12              # bcrypt's own default
+BCRYPT_MIN_ROUNDS = BCRYPT_DEFAULT_ROUNDS   # never weaker than this, however slow the machine
+BCRYPT_MAX_ROUNDS = 15
+BCRYPT_TARGET_SECONDS = 0.25            # how long one password check should take
+CALIBRATION_SAMPLES = 3
+CALIBRATION_DEADLINE = 30.0             # seconds calibration may take in the pool
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing pool is full or a request misses its deadline"""
+
+
+def calibrate_rounds(target_seconds=BCRYPT_TARGET_SECONDS):
+    # Time bcrypt at the minimum cost on this machine, then pick the highest
+    # cost whose hash still takes at most target_seconds
+    samples = []
+    for _ in range(CALIBRATION_SAMPLES):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration password", bcrypt.gensalt(rounds=BCRYPT_MIN_ROUNDS))
+        samples.append(time.perf_counter() - started)
+    seconds = sorted(samples)[len(samples) // 2]    # median - ignores one slow outlier
+
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and seconds * 2 <= target_seconds:
+        rounds += 1
+        seconds *= 2
+    return rounds
+
+
+def get_hash_rounds(hashed_password):
+    # The cost a bcrypt hash was made with ("$2b$12$..." -> 12), None if it isn't bcrypt
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode('utf-8')
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+# Worker functions - these run inside the pool processes, so they only use bcrypt
+
+def _hash_in_worker(password_bytes, rounds):
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _check_in_worker(password_bytes, hashed_bytes):
+    return bcrypt.checkpw(password_bytes, hashed_bytes)
+
+
+class HashingService:
+    """
+    Runs bcrypt in a bounded process pool with backpressure and deadlines
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING, deadline=HASH_DEADLINE):
+        """
+        Constructor - the worker processes are started on first use
+
+        Parameters:
+            workers (int) - bcrypt processes
+            max_pending (int) - most requests running or waiting at once
+            deadline (float) - default seconds a request may take
+        """
+        self.__workers = workers
+        self.__deadline = deadline
+        self.__slots = threading.BoundedSemaphore(max_pending)
+        self.__pool = None
+        self.__lock = threading.Lock()
+
+        # Statistics
+        self.__completed = 0
+        self.__rejected = 0
+        self.__timed_out = 0
+
+    def hash_password(self, password, rounds=BCRYPT_DEFAULT_ROUNDS, timeout=None):
+        """
+        Hash a password with bcrypt
+
+        Parameters:
+            password (str) - plain text password
+            rounds (int) - bcrypt cost (each +1 doubles the time)
+            timeout (float) - deadline in seconds (default HASH_DEADLINE)
+
+        Returns:
+            str - the bcrypt hash
+
+        Raises:
+            HashingBusyError - the pool is full or the deadline passed
+        """
+        return self.__run(_hash_in_worker, (password.encode('utf-8'), rounds), timeout)
+
+    def verify_password(self, password, hashed_password, timeout=None):
+        """
+        Check a password against a bcrypt hash
+
+        Parameters:
+            password (str) - plain text password
+            hashed_password (str or bytes) - stored hash
+            timeout (float) - deadline in seconds (default HASH_DEADLINE)
+
+        Returns:
+            bool - True if the password matches
+
+        Raises:
+            HashingBusyError - the pool is full or the deadline passed
+        """
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+        return self.__run(_check_in_worker, (password.encode('utf-8'), hashed_password), timeout)
+
+    def measure_rounds(self, timeout=CALIBRATION_DEADLINE):
+        """
+        Run calibrate_rounds() in a worker process (keeps it off the caller's thread)
+
+        Parameters:
+            timeout (float) - deadline in seconds
+
+        Returns:
+            int - the bcrypt cost for this machine
+
+        Raises:
+            HashingBusyError - the pool is full or the deadline passed
+        """
+        return self.__run(calibrate_rounds, (), timeout)
+
+    def get_stats(self):
+        """
+        Get pool statistics
+
+        Returns:
+            dict - workers and completed / rejected / timed out requests
+        """
+        with self.__lock:
+            return {
+                'workers': self.__workers,
+                'completed': self.__completed,
+                'rejected': self.__rejected,
+                'timed_out': self.__timed_out
+            }
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self.__lock:
+            pool, self.__pool = self.__pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def __run(self, function, args, timeout):
+        """HELPER METHOD: run one bcrypt call in the pool within the deadline"""
+        deadline = time.monotonic() + (self.__deadline if timeout is None else timeout)
+
+        # Backpressure - don't queue more work than the pool can finish in time
+        if not self.__slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            with self.__lock:
+                self.__rejected += 1
+            raise HashingBusyError("Too many logins at once - please try again in a moment")
+
+        try:
+            try:
+                future = self.__get_pool().submit(function, *args)
+            except BrokenProcessPool:
+                # A worker process died - start a new pool and try once more
+                self.__reset_pool()
+                future = self.__get_pool().submit(function, *args)
+        except Exception:
+            self.__slots.release()
+            raise
+        # The slot is freed when the work really finishes, even after a timeout
+        future.add_done_callback(lambda _: self.__slots.release())
+
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            future.cancel()
+            with self.__lock:
+                self.__timed_out += 1
+            raise HashingBusyError("Password check took too long - please try again")
+        with self.__lock:
+            self.__completed += 1
+        return result
+
+    def __get_pool(self):
+        """HELPER METHOD: the process pool (started the first time it is needed)"""
+        with self.__lock:
+            if self.__pool is None:
+                # "spawn" starts clean processes - forking a process that has
+                # Streamlit's threads running isn't safe
+                self.__pool = ProcessPoolExecutor(
+                    max_workers=self.__workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self.__pool
+
+    def __reset_pool(self):
+        """HELPER METHOD: throw away a broken pool"""
+        with self.__lock:
+            pool, self.__pool = self.__pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# SHARED SERVICE
+
+_hashing_service = None
+_hashing_service_lock = threading.Lock()
+
+
+def get_hashing_service():
+    """
+    Get the process-wide hashing service
+
+    Returns:
+        HashingService - the shared service
+    """
+    global _hashing_service
+    if _hashing_service is None:
+        with _hashing_service_lock:
+            if _hashing_service is None:
+                _hashing_service = HashingService()
+    return _hashing_service
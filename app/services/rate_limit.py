@@ -0,0 +1,403 @@
+# Week 12 - Rate limiting
+# A token bucket: it holds up to `capacity` tokens and refills at `rate` tokens
+# per second. Every request takes one token, so short bursts are allowed but
+# the long-run speed never goes above `rate`
+#
+# Week 12 - LoginThrottle uses the same idea for login attempts (see below)
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.data.login_throttle import (
+    load_login_buckets,
+    load_login_bucket,
+    save_login_buckets,
+    delete_old_login_buckets
+)
+
+# Requests per minute batch triage may send to each AI provider - below the
+# free-tier limits, leaving room for the questions asked on the pages (which
+# don't use these buckets, so a long triage run never makes a chat wait)
+PROVIDER_RATE_LIMITS = {
+    "groq": 30,
+    "huggingface": 20,
+}
+PROVIDER_BURST = 5
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Constructor - start with a full bucket
+
+        Parameters:
+            rate (float) - tokens added per second
+            capacity (float) - most tokens the bucket can hold (the burst size)
+        """
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__tokens = capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens if there are enough, without waiting
+
+        Returns:
+            float - 0 if the tokens were taken, otherwise seconds until there will be enough
+        """
+        with self.__lock:
+            self.__refill()
+            if self.__tokens >= tokens:
+                self.__tokens -= tokens
+                return 0.0
+            return (tokens - self.__tokens) / self.__rate
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Take tokens, waiting for the bucket to refill if needed
+
+        Parameters:
+            tokens (float) - how many tokens to take
+            timeout (float) - most seconds to wait (None = wait as long as needed)
+
+        Returns:
+            bool - True if the tokens were taken, False if the timeout ran out
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_time = self.try_acquire(tokens)
+            if wait_time == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait_time > deadline:
+                return False
+            time.sleep(wait_time)
+
+    def get_tokens(self):
+        """Tokens available right now"""
+        with self.__lock:
+            self.__refill()
+            return self.__tokens
+
+    def __refill(self):
+        """HELPER METHOD: add the tokens earned since the last update (lock must be held)"""
+        now = time.monotonic()
+        self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__rate)
+        self.__updated = now
+
+
+_provider_buckets = {}
+_provider_buckets_lock = threading.Lock()
+
+
+def get_provider_limiter(provider):
+    # The shared token bucket for one AI provider
+    with _provider_buckets_lock:
+        if provider not in _provider_buckets:
+            per_minute = PROVIDER_RATE_LIMITS.get(provider, 10)
+            _provider_buckets[provider] = TokenBucket(per_minute / 60, PROVIDER_BURST)
+        return _provider_buckets[provider]
+
+
+# Week 12 - Login throttling
+# Every login attempt takes a token from two buckets: one for the username and
+# one for the client (IP address or browser tab). If either is empty the attempt
+# is refused BEFORE the user lookup and the bcrypt check, so a password-guessing
+# burst can't use up the CPU that real users need. A successful login refills
+# the username's bucket.
+#
+# Buckets live in memory, split into shards that each have their own lock (so
+# concurrent sessions rarely wait on each other), and each shard forgets its
+# least recently used buckets when full. Changed buckets are saved to SQLite
+# every LOGIN_THROTTLE_FLUSH_SECONDS, so a restart doesn't reset an attacker's limits.
+# A bucket that isn't in memory is looked up in the unsaved changes and then in
+# SQLite before a full one is made - trying thousands of other usernames pushes a
+# locked-out bucket out of memory, but doesn't unlock it
+
+LOGIN_LIMITS = {
+    # kind: (attempts allowed in a row, seconds to earn back one attempt)
+    "user": (5, 60.0),          # 5 wrong passwords, then one try a minute
+    "client": (20, 6.0),        # 20 attempts, then 10 a minute from one client
+}
+LOGIN_THROTTLE_MAX_ENTRIES = 10000      # buckets kept in memory
+LOGIN_THROTTLE_SHARDS = 16
+LOGIN_THROTTLE_FLUSH_SECONDS = 30
+
+
+class LoginThrottle:
+    """
+    Token buckets for login attempts, per username and per client
+    """
+
+    def __init__(self, limits=LOGIN_LIMITS, max_entries=LOGIN_THROTTLE_MAX_ENTRIES,
+                 shards=LOGIN_THROTTLE_SHARDS, flush_seconds=LOGIN_THROTTLE_FLUSH_SECONDS):
+        """
+        Constructor - saved buckets are loaded on first use
+
+        Parameters:
+            limits (dict) - kind -> (capacity, seconds per attempt earned back)
+            max_entries (int) - most buckets kept in memory
+            shards (int) - number of separately locked parts
+            flush_seconds (float) - how often changed buckets are saved
+        """
+        self.__limits = {kind: (capacity, 1.0 / refill_seconds)
+                         for kind, (capacity, refill_seconds) in limits.items()}
+        self.__shard_size = max(1, max_entries // shards)
+        self.__flush_seconds = flush_seconds
+
+        # One lock, LRU of buckets and set of changes per shard
+        # A bucket is a list [tokens, updated_at] (wall clock time, so it can be saved)
+        self.__locks = [threading.Lock() for _ in range(shards)]
+        self.__buckets = [OrderedDict() for _ in range(shards)]
+        self.__changed = [{} for _ in range(shards)]     # key -> bucket, None = back to full
+        self.__refused = [0] * shards                    # counted under the shard's lock
+
+        self.__flush_lock = threading.Lock()
+        self.__loaded = False
+        self.__last_flush = time.time()
+
+    def check_attempt(self, username, client_id=None):
+        """
+        Take one attempt from the username's and the client's buckets
+
+        Parameters:
+            username (str) - username being logged in to
+            client_id (str) - who is trying (None = only limit by username)
+
+        Returns:
+            float - 0 if the attempt may go ahead, otherwise seconds until it may
+        """
+        self.__load()
+        now = time.time()
+        keys = [f"user:{username}"]
+        if client_id:
+            keys.append(f"client:{client_id}")
+
+        taken = []
+        for key in keys:
+            wait_time = self.__take(key, now)
+            if wait_time > 0:
+                # Don't charge the other bucket for an attempt that didn't happen
+                for taken_key in taken:
+                    self.__give_back(taken_key, now)
+                return wait_time
+            taken.append(key)
+
+        self.__maybe_flush(now)
+        return 0.0
+
+    def record_success(self, username):
+        """
+        Refill a username's bucket after a correct password
+
+        Parameters:
+            username (str) - who logged in
+        """
+        key = f"user:{username}"
+        shard = self.__shard(key)
+        with self.__locks[shard]:
+            self.__buckets[shard].pop(key, None)
+            self.__changed[shard][key] = None       # also removes a saved copy
+
+    def get_locked_out(self):
+        """
+        Usernames that can't try again yet
+
+        Returns:
+            dict - username -> seconds until the next attempt is allowed
+        """
+        now = time.time()
+        locked_out = {}
+        for shard in range(len(self.__locks)):
+            with self.__locks[shard]:
+                for key, bucket in self.__buckets[shard].items():
+                    kind, _, name = key.partition(":")
+                    if kind != "user":
+                        continue
+                    tokens = self.__tokens_now(kind, bucket, now)
+                    if tokens < 1:
+                        locked_out[name] = (1 - tokens) / self.__limits[kind][1]
+        return locked_out
+
+    def get_stats(self):
+        """
+        Get throttling statistics
+
+        Returns:
+            dict - buckets in memory, refused attempts and locked out usernames
+        """
+        buckets = 0
+        refused = 0
+        for shard in range(len(self.__locks)):
+            with self.__locks[shard]:
+                buckets += len(self.__buckets[shard])
+                refused += self.__refused[shard]
+        return {
+            'buckets': buckets,
+            'refused': refused,
+            'locked_out': len(self.get_locked_out())
+        }
+
+    def flush(self):
+        """Save every changed bucket to the database now"""
+        with self.__flush_lock:
+            self.__flush(time.time())
+
+    def __shard(self, key):
+        """HELPER METHOD: which shard a key belongs to"""
+        return hash(key) % len(self.__locks)
+
+    def __tokens_now(self, kind, bucket, now):
+        """HELPER METHOD: a bucket's tokens including what it has earned back since its last update"""
+        capacity, rate = self.__limits[kind]
+        return min(capacity, bucket[0] + max(0.0, now - bucket[1]) * rate)
+
+    def __take(self, key, now):
+        """HELPER METHOD: take one token from a bucket, returns seconds to wait (0 if taken)"""
+        capacity = self.__limits[key.partition(":")[0]][0]
+        shard = self.__shard(key)
+        with self.__locks[shard]:
+            bucket = self.__find(shard, key, capacity, now)
+            if bucket is not None:
+                return self.__take_token(shard, key, bucket, now)
+
+        # Not in memory - read the saved copy outside the lock
+        saved = self.__load_bucket(key)
+        with self.__locks[shard]:
+            # Another thread may have added it in the meantime
+            bucket = self.__find(shard, key, capacity, now)
+            if bucket is None:
+                bucket = list(saved) if saved is not None else [capacity, now]
+                self.__add(shard, key, bucket)
+            return self.__take_token(shard, key, bucket, now)
+
+    def __take_token(self, shard, key, bucket, now):
+        """HELPER METHOD: the token-taking part of __take() (lock must already be held)"""
+        kind = key.partition(":")[0]
+        bucket[0] = self.__tokens_now(kind, bucket, now)
+        bucket[1] = now
+        if bucket[0] < 1:
+            self.__refused[shard] += 1
+            return (1 - bucket[0]) / self.__limits[kind][1]
+        bucket[0] -= 1
+        self.__changed[shard][key] = bucket
+        return 0.0
+
+    def __find(self, shard, key, capacity, now):
+        """
+        HELPER METHOD: a bucket from memory, including one that was pushed out
+        before its change was saved (lock must already be held)
+
+        Returns:
+            list or None - the bucket, None if it has to come from the database
+        """
+        buckets = self.__buckets[shard]
+        bucket = buckets.get(key)
+        if bucket is not None:
+            buckets.move_to_end(key)
+            return bucket
+        changed = self.__changed[shard]
+        if key in changed:
+            # None = refilled by a successful login, the saved copy is out of date
+            bucket = changed[key] or [capacity, now]
+            self.__add(shard, key, bucket)
+            return bucket
+        return None
+
+    def __add(self, shard, key, bucket):
+        """HELPER METHOD: keep a bucket in memory (lock must already be held)"""
+        buckets = self.__buckets[shard]
+        buckets[key] = bucket
+        # Forget the least recently used buckets (changes are kept until they are saved)
+        while len(buckets) > self.__shard_size:
+            buckets.popitem(last=False)
+
+    def __load_bucket(self, key):
+        """HELPER METHOD: a bucket saved in the database - (tokens, updated_at) or None"""
+        try:
+            return load_login_bucket(key)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not load login throttling state: {e}")
+            return None
+
+    def __give_back(self, key, now):
+        """HELPER METHOD: return a token taken by __take()"""
+        kind = key.partition(":")[0]
+        shard = self.__shard(key)
+        with self.__locks[shard]:
+            bucket = self.__buckets[shard].get(key)
+            if bucket is not None:
+                bucket[0] = min(self.__limits[kind][0], bucket[0] + 1)
+
+    def __load(self):
+        """HELPER METHOD: load the saved buckets the first time the throttle is used"""
+        if self.__loaded:
+            return
+        with self.__flush_lock:
+            if self.__loaded:
+                return
+            now = time.time()
+            try:
+                # Anything older than the slowest full refill is full again - no need to keep it
+                longest_refill = max(capacity / rate for capacity, rate in self.__limits.values())
+                delete_old_login_buckets(now - longest_refill)
+                rows = load_login_buckets(self.__shard_size * len(self.__locks))
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not load login throttling state: {e}")
+                rows = []
+
+            # Oldest first, so the most recent end up as the most recently used
+            for key, tokens, updated_at in reversed(rows):
+                if key.partition(":")[0] not in self.__limits:
+                    continue
+                shard = self.__shard(key)
+                with self.__locks[shard]:
+                    buckets = self.__buckets[shard]
+                    if key not in buckets:
+                        buckets[key] = [tokens, updated_at]
+                        while len(buckets) > self.__shard_size:
+                            buckets.popitem(last=False)
+            self.__loaded = True
+
+    def __maybe_flush(self, now):
+        """HELPER METHOD: save changes if it has been long enough (only one thread does it)"""
+        if now - self.__last_flush < self.__flush_seconds:
+            return
+        if not self.__flush_lock.acquire(blocking=False):
+            return
+        try:
+            if now - self.__last_flush >= self.__flush_seconds:
+                self.__flush(now)
+        finally:
+            self.__flush_lock.release()
+
+    def __flush(self, now):
+        """HELPER METHOD: write changed buckets in one transaction (flush lock must be held)"""
+        self.__last_flush = now
+        rows = []
+        deleted_keys = []
+        for shard in range(len(self.__locks)):
+            with self.__locks[shard]:
+                changed, self.__changed[shard] = self.__changed[shard], {}
+                for key, bucket in changed.items():
+                    kind = key.partition(":")[0]
+                    if bucket is None or self.__tokens_now(kind, bucket, now) >= self.__limits[kind][0]:
+                        deleted_keys.append(key)
+                    else:
+                        rows.append((key, bucket[0], bucket[1]))
+        if not rows and not deleted_keys:
+            return
+        try:
+            save_login_buckets(rows, deleted_keys)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not save login throttling state: {e}")
+
+
+# One login throttle shared by the whole process
+login_throttle = LoginThrottle()
@@ -0,0 +1,143 @@
+# Week 12 - Web search cache
+# Keeps SerpAPI results in memory so the same search isn't sent to Google again
+# The Security Tips query never changes, and chat questions often repeat
+#
+# Fresh results are used as they are. Stale results (older than the TTL but
+# not too old) are still returned straight away while a background thread
+# fetches new ones for the next request ("stale-while-revalidate")
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# How long (seconds) results are fresh, and how long stale ones may still be used
+SEARCH_CACHE_TTL = 30 * 60
+SEARCH_STALE_TTL = 24 * 60 * 60
+SEARCH_CACHE_MAX_ENTRIES = 500
+
+# chat() adds this to every question - it doesn't make two questions different
+SEARCH_SUFFIX = "cybersecurity 2025"
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalise_query(query):
+    # Same key for "What is  Phishing?" and "what is phishing? cybersecurity 2025"
+    query = WHITESPACE_PATTERN.sub(" ", query or "").strip().lower()
+    if query.endswith(SEARCH_SUFFIX):
+        query = query[:-len(SEARCH_SUFFIX)].strip()
+    return query
+
+
+class SearchCache:
+    """
+    Cache of web search results with a TTL and background refresh
+    """
+
+    def __init__(self, ttl=SEARCH_CACHE_TTL, stale_ttl=SEARCH_STALE_TTL,
+                 max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        """
+        Constructor - set up an empty cache
+
+        Parameters:
+            ttl (float) - seconds a result is fresh
+            stale_ttl (float) - seconds a result may be used while it is refreshed
+            max_entries (int) - most searches to remember
+        """
+        self.__ttl = ttl
+        self.__stale_ttl = stale_ttl
+        self.__max_entries = max_entries
+        self.__entries = OrderedDict()      # normalised query -> (result, fetched_at)
+        self.__refreshing = set()           # queries being refreshed right now
+        self.__lock = threading.Lock()
+        self.__refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+
+        # Statistics
+        self.__hits = 0
+        self.__stale_hits = 0
+        self.__misses = 0
+        self.__refreshes = 0
+
+    def get_or_fetch(self, query, fetch):
+        """
+        Get search results from the cache, or run the search
+
+        Parameters:
+            query (str) - the search query (sent to fetch() unchanged)
+            fetch (function) - fetch(query) runs the real search and returns a string
+
+        Returns:
+            str - the search results ("" if the search failed)
+        """
+        key = normalise_query(query)
+        now = time.monotonic()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                result, fetched_at = entry
+                age = now - fetched_at
+                if age < self.__ttl:
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return result
+                if age < self.__stale_ttl:
+                    self.__entries.move_to_end(key)
+                    self.__stale_hits += 1
+                    # Only one background refresh per query at a time
+                    if key not in self.__refreshing:
+                        self.__refreshing.add(key)
+                        self.__refresher.submit(self.__refresh, key, query, fetch)
+                    return result
+            self.__misses += 1
+
+        result = fetch(query)
+        self.__store(key, result)
+        return result
+
+    def __refresh(self, key, query, fetch):
+        """HELPER METHOD: run the search again in the background"""
+        try:
+            self.__store(key, fetch(query))
+            with self.__lock:
+                self.__refreshes += 1
+        finally:
+            with self.__lock:
+                self.__refreshing.discard(key)
+
+    def __store(self, key, result):
+        """HELPER METHOD: remember a result (failed / empty searches aren't kept)"""
+        if not result:
+            return
+        with self.__lock:
+            self.__entries[key] = (result, time.monotonic())
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every search"""
+        with self.__lock:
+            self.__entries.clear()
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict - fresh hits, stale hits, misses and background refreshes
+        """
+        with self.__lock:
+            return {
+                'entries': len(self.__entries),
+                'hits': self.__hits,
+                'stale_hits': self.__stale_hits,
+                'misses': self.__misses,
+                'refreshes': self.__refreshes
+            }
+
+
+# One cache shared by the whole process
+search_cache = SearchCache()
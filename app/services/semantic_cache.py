@@ -0,0 +1,206 @@
+# Week 12 - Semantic answer cache for chat questions
+# The response cache only helps when a question is asked again word for word.
+# This cache also catches the same question asked a little differently
+# ("what is phishing?" / "What's phishing") by comparing questions as vectors
+#
+# Each question becomes a hashed TF-IDF vector of its words and character
+# 3-grams (no external service or model needed). A new question is compared with
+# every saved one in a single NumPy matrix multiplication, and the saved answer
+# is used if the closest question is similar enough
+
+import re
+import threading
+import time
+import zlib
+import numpy as np
+
+SEMANTIC_VECTOR_SIZE = 2048         # hashed feature slots per question
+SEMANTIC_THRESHOLD = 0.85           # cosine similarity needed to reuse an answer
+SEMANTIC_CACHE_MAX_ENTRIES = 512    # least recently used questions are dropped after this
+SEMANTIC_CACHE_TTL = 24 * 60 * 60   # same as exact chat answers (see AI_CACHE_TTLS)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that don't change what a question is about
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "what", "whats", "how", "why", "do",
+    "does", "can", "i", "you", "me", "my", "we", "our", "of", "to", "in", "on",
+    "for", "and", "or", "it", "its", "about", "please", "tell", "explain", "s",
+}
+
+
+def question_features(question):
+    # Words of the question plus the character 3-grams of each word
+    # (3-grams make "phishing" and "phish" or small typos still look alike)
+    words = [word for word in WORD_PATTERN.findall(question.lower()) if word not in STOP_WORDS]
+    features = list(words)
+    for word in words:
+        padded = f" {word} "
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def question_vector(question, size=SEMANTIC_VECTOR_SIZE):
+    # Term counts of the question's features, hashed into a fixed-size vector
+    # (crc32 gives the same slot in every process, unlike hash())
+    vector = np.zeros(size, dtype=np.float32)
+    for feature in question_features(question):
+        vector[zlib.crc32(feature.encode("utf-8")) % size] += 1
+    return vector
+
+
+class SemanticCache:
+    """
+    In-memory cache that finds answers to similar (not just identical) questions
+    """
+
+    def __init__(self, threshold=SEMANTIC_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                 ttl=SEMANTIC_CACHE_TTL, size=SEMANTIC_VECTOR_SIZE):
+        """
+        Constructor - set up an empty cache
+
+        Parameters:
+            threshold (float) - cosine similarity (0-1) needed for a match
+            max_entries (int) - most questions to remember
+            ttl (float) - seconds an answer is kept
+            size (int) - length of the hashed vectors
+        """
+        self.__threshold = threshold
+        self.__ttl = ttl
+        self.__size = size
+
+        # One row per slot - the matrix is made once and rows are reused
+        self.__counts = np.zeros((max_entries, size), dtype=np.float32)
+        self.__doc_freq = np.zeros(size, dtype=np.float32)   # questions that have each feature
+        self.__expires_at = np.zeros(max_entries)            # 0 = empty slot
+        self.__last_used = np.zeros(max_entries)
+        self.__questions = [None] * max_entries
+        self.__answers = [None] * max_entries
+
+        # TF-IDF weighted unit rows - rebuilt by put(), so lookups only do one multiplication
+        self.__weighted = np.zeros((max_entries, size), dtype=np.float32)
+        self.__idf = np.ones(size, dtype=np.float32)
+        self.__lock = threading.Lock()
+
+        # Statistics
+        self.__hits = 0
+        self.__misses = 0
+        self.__lookup_seconds = 0.0
+
+    def get(self, question):
+        """
+        Find the answer to the most similar saved question
+
+        Parameters:
+            question (str) - the new question
+
+        Returns:
+            dict or None - answer, the matched question and its similarity,
+                           None if no saved question is similar enough
+        """
+        counts = question_vector(question, self.__size)
+        started = time.perf_counter()
+        with self.__lock:
+            slot, similarity = self.__nearest(counts)
+            self.__lookup_seconds += time.perf_counter() - started
+            if slot is None or similarity < self.__threshold:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            self.__last_used[slot] = time.time()
+            return {
+                'answer': self.__answers[slot],
+                'question': self.__questions[slot],
+                'similarity': similarity
+            }
+
+    def put(self, question, answer):
+        """
+        Save the answer to a question
+
+        A very similar question that is already saved gets its answer replaced,
+        otherwise the question takes an empty, expired or least recently used slot
+
+        Parameters:
+            question (str) - the question that was asked
+            answer (str) - the AI's answer
+        """
+        counts = question_vector(question, self.__size)
+        if not counts.any():
+            return
+        now = time.time()
+        with self.__lock:
+            slot, similarity = self.__nearest(counts)
+            if slot is None or similarity < self.__threshold:
+                # Expired and empty slots have the oldest times, so they go first
+                usable = np.where(self.__expires_at > now, self.__last_used, -1.0)
+                slot = int(np.argmin(usable))
+            self.__fill(slot, counts, question, answer, now)
+
+    def clear(self):
+        """Forget every question"""
+        with self.__lock:
+            self.__counts[:] = 0
+            self.__doc_freq[:] = 0
+            self.__expires_at[:] = 0
+            self.__last_used[:] = 0
+            self.__questions = [None] * len(self.__questions)
+            self.__answers = [None] * len(self.__answers)
+            self.__reweight()
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict - saved questions, hits, misses and the average lookup time (ms)
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                'entries': int(np.count_nonzero(self.__expires_at > time.time())),
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hit_rate': self.__hits / lookups if lookups else 0.0,
+                'avg_lookup_ms': self.__lookup_seconds * 1000 / lookups if lookups else 0.0
+            }
+
+    def __nearest(self, counts):
+        """
+        HELPER METHOD: the saved question most similar to a vector (lock must be held)
+
+        Returns:
+            tuple - (slot, cosine similarity), or (None, 0.0) if nothing is saved
+        """
+        live = self.__expires_at > time.time()
+        if not live.any() or not counts.any():
+            return None, 0.0
+        query = counts * self.__idf
+        query /= np.linalg.norm(query)
+        similarities = self.__weighted @ query
+        similarities[~live] = -1.0
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def __reweight(self):
+        """HELPER METHOD: recalculate the IDF weights and the weighted rows (lock must be held)"""
+        saved = np.count_nonzero(self.__expires_at)
+        self.__idf = (np.log((1 + saved) / (1 + self.__doc_freq)) + 1).astype(np.float32)
+        weighted = self.__counts * self.__idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        self.__weighted = np.divide(weighted, norms, out=np.zeros_like(weighted), where=norms > 0)
+
+    def __fill(self, slot, counts, question, answer, now):
+        """HELPER METHOD: put a question in a slot, replacing what was there (lock must be held)"""
+        self.__doc_freq -= self.__counts[slot] > 0
+        self.__counts[slot] = counts
+        self.__doc_freq += counts > 0
+        self.__expires_at[slot] = now + self.__ttl
+        self.__last_used[slot] = now
+        self.__questions[slot] = question
+        self.__answers[slot] = answer
+        self.__reweight()
+
+
+# One cache shared by the whole process
+semantic_cache = SemanticCache()
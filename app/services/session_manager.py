@@ -0,0 +1,279 @@
+# Week 12 - Login sessions
+# st.session_state is lost when a browser tab reconnects (refresh, laptop
+# sleep, network blip), which used to mean logging in again - another bcrypt
+# check and user lookup. Now a successful login creates a random session token:
+#   - the token is kept in the page URL (?session=...) so it survives a reconnect
+#   - only its SHA-256 is saved in the sessions table
+#   - each use pushes the expiry forward (sliding), so active users stay logged in
+#   - checked tokens are cached in memory, so most page loads are one dict lookup
+#
+# Security note - the token is a password for the session while it is valid, and
+# a URL is easy to leak (copied links, browser history, screenshots, proxy logs).
+# A cookie would be safer, but Streamlit can only READ cookies (st.context.cookies),
+# not set them, so the URL is the only place that survives a reconnect. To limit
+# the damage the token is swapped for a new one every SESSION_RENEW_INTERVAL
+# (rotation) - a leaked link stops working a few minutes after it was copied
+# while the user keeps using the app. A swapped-out token never starts a new
+# chain of its own: during its short grace period it only leads back to the
+# token that replaced it. Every token of one login shares a family_id, and
+# Logout ends the whole family. Don't share URLs that contain ?session=
+
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+from app.data.sessions import (
+    insert_session,
+    get_session,
+    rotate_session,
+    delete_session_family,
+    delete_expired_sessions
+)
+
+SESSION_IDLE_TIMEOUT = 8 * 60 * 60      # log out after 8 hours without using the app
+SESSION_RENEW_INTERVAL = 5 * 60         # new token and expiry at most every 5 minutes
+SESSION_ROTATION_GRACE = 2 * 60         # an old token still works this long after rotation (other tabs)
+SESSION_CACHE_SECONDS = 60              # re-check the database after this (logouts from other processes)
+SESSION_CACHE_MAX_ENTRIES = 1000
+SESSION_PURGE_EVERY = 100               # delete expired sessions after this many logins
+
+SESSION_PARAM = "session"               # name of the URL query parameter
+
+
+def hash_token(token):
+    # What is stored in the database instead of the token itself
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class SessionManager:
+    """
+    Creates, checks and ends login sessions
+    """
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT, max_entries=SESSION_CACHE_MAX_ENTRIES):
+        """
+        Constructor - start with an empty cache
+
+        Parameters:
+            idle_timeout (float) - seconds a session lasts without being used
+            max_entries (int) - most checked tokens to remember
+        """
+        self.__idle_timeout = idle_timeout
+        self.__max_entries = max_entries
+        self.__entries = OrderedDict()      # token hash -> [username, expires_at, checked_at, family_id, rotated]
+        self.__successors = OrderedDict()   # rotated token hash -> (new token, grace ends at)
+        self.__lock = threading.Lock()
+        self.__created = 0
+
+        # Statistics
+        self.__hits = 0
+        self.__misses = 0
+        self.__rotated = 0
+
+    def create_session(self, username):
+        """
+        Start a session after a successful login
+
+        Parameters:
+            username (str) - who logged in
+
+        Returns:
+            str - the session token (only ever given to the browser, never stored)
+        """
+        token = secrets.token_urlsafe(32)
+        token_hash = hash_token(token)
+        now = time.time()
+        expires_at = now + self.__idle_timeout
+        # The first token's hash names the family every later token joins
+        family_id = token_hash
+        insert_session(token_hash, username, family_id, now, expires_at)
+
+        with self.__lock:
+            self.__remember(token_hash, [username, expires_at, now, family_id, False])
+            self.__created += 1
+            purge = self.__created % SESSION_PURGE_EVERY == 0
+        if purge:
+            delete_expired_sessions(now)
+        return token
+
+    def validate_session(self, token):
+        """
+        Check a session token (and slide its expiry forward)
+
+        When the expiry is moved (at most every SESSION_RENEW_INTERVAL) the token
+        is also swapped for a new one. The old token keeps working for
+        SESSION_ROTATION_GRACE seconds so another tab that still has it can
+        catch up - it is handed the new token, it never gets a new session
+
+        Parameters:
+            token (str) - token from create_session()
+
+        Returns:
+            tuple or None - (username, token to use from now on),
+                            None if the token is unknown or expired
+        """
+        if not token:
+            return None
+        token_hash = hash_token(token)
+        now = time.time()
+
+        with self.__lock:
+            entry = self.__entries.get(token_hash)
+            if entry is not None and now - entry[2] < SESSION_CACHE_SECONDS and entry[1] > now:
+                self.__entries.move_to_end(token_hash)
+                self.__hits += 1
+                username, expires_at, family_id, rotated = entry[0], entry[1], entry[3], entry[4]
+            else:
+                entry = None
+                self.__misses += 1
+
+        if entry is None:
+            row = get_session(token_hash)
+            if row is None or row[2] <= now:
+                with self.__lock:
+                    self.__entries.pop(token_hash, None)
+                    self.__successors.pop(token_hash, None)
+                return None
+            username, family_id, expires_at, successor_hash = row
+            rotated = successor_hash is not None
+            with self.__lock:
+                self.__remember(token_hash, [username, expires_at, now, family_id, rotated])
+
+        if rotated:
+            return self.__follow_successor(token_hash, token, username)
+
+        # Sliding expiry - only written to the database every few minutes
+        new_expires_at = now + self.__idle_timeout
+        if new_expires_at - expires_at < SESSION_RENEW_INTERVAL:
+            return username, token
+
+        # Rotation - a new token gets the new expiry, the old one runs out soon
+        new_token = secrets.token_urlsafe(32)
+        new_hash = hash_token(new_token)
+        old_expires_at = min(expires_at, now + SESSION_ROTATION_GRACE)
+        if not rotate_session(token_hash, new_hash, username, family_id, now, new_expires_at, old_expires_at):
+            # Another process rotated it first - read its grace expiry next time
+            with self.__lock:
+                self.__entries.pop(token_hash, None)
+            return username, token
+
+        with self.__lock:
+            self.__remember(token_hash, [username, old_expires_at, now, family_id, True])
+            self.__remember(new_hash, [username, new_expires_at, now, family_id, False])
+            self.__successors[token_hash] = (new_token, old_expires_at)
+            while len(self.__successors) > self.__max_entries:
+                self.__successors.popitem(last=False)
+            self.__rotated += 1
+        return username, new_token
+
+    def end_session(self, token):
+        """
+        Log out - ends the token and every other token of the same login
+
+        Parameters:
+            token (str) - token from create_session() or validate_session()
+        """
+        if not token:
+            return
+        token_hash = hash_token(token)
+        row = get_session(token_hash)
+        if row is None:
+            return
+        family_id = row[1]
+        delete_session_family(family_id)
+
+        with self.__lock:
+            for old_hash in [h for h, e in self.__entries.items() if e[3] == family_id]:
+                del self.__entries[old_hash]
+                self.__successors.pop(old_hash, None)
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict - cached tokens, hits, misses and rotated tokens
+        """
+        with self.__lock:
+            return {
+                'entries': len(self.__entries),
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'rotated': self.__rotated
+            }
+
+    def __follow_successor(self, token_hash, token, username):
+        """HELPER METHOD: answer for a token that was already rotated"""
+        with self.__lock:
+            successor = self.__successors.get(token_hash)
+        if successor is not None and successor[1] > time.time():
+            # Hand out the token that replaced it (checked too, in case of a logout)
+            return self.validate_session(successor[0])
+        # Rotated by another process - the new token is only known there, so this one
+        # works (without being renewed) until its grace period runs out
+        return username, token
+
+    def __remember(self, token_hash, entry):
+        """HELPER METHOD: add to the cache (lock must already be held)"""
+        self.__entries[token_hash] = entry
+        self.__entries.move_to_end(token_hash)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+
+# One session manager shared by the whole process
+session_manager = SessionManager()
+
+
+# PAGE HELPERS
+
+def log_in(username):
+    # Call after a successful login - starts a session and remembers it in the browser
+    token = session_manager.create_session(username)
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.session_token = token
+    st.query_params[SESSION_PARAM] = token
+
+
+def log_out():
+    # End the session in the database, this browser tab and the URL
+    session_manager.end_session(st.session_state.get('session_token'))
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.session_token = None
+    if SESSION_PARAM in st.query_params:
+        del st.query_params[SESSION_PARAM]
+
+
+def get_client_id():
+    # Who is logging in, for login throttling: the browser's IP address when this
+    # Streamlit version can tell us (st.context.ip_address), otherwise None - only
+    # the username is throttled then. Anything kept in session_state can't be used:
+    # a new browser tab gets a new one, which would reset its bucket
+    return getattr(getattr(st, "context", None), "ip_address", None) or None
+
+
+def check_login():
+    # Every page's login guard - True if this browser has a valid session
+    # After a reconnect session_state is empty, but the token is still in the URL,
+    # so the user is logged back in without a password (or a bcrypt check)
+    token = st.session_state.get('session_token') or st.query_params.get(SESSION_PARAM)
+    session = session_manager.validate_session(token)
+    if session is None:
+        st.session_state.logged_in = False
+        st.session_state.session_token = None
+        return False
+
+    # The token may have been rotated - from now on only the new one is used
+    username, token = session
+
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.session_token = token
+    # Keep the token in this page's URL too, so refreshing this page works
+    if st.query_params.get(SESSION_PARAM) != token:
+        st.query_params[SESSION_PARAM] = token
+    return True
@@ -1,30 +1,107 @@
 # Week 8 - User Service
 # Functions for login, registration, and moving users from Week 7 to database
+# Week 12 - bcrypt now runs in the hashing process pool (app/services/password_hashing.py)
+# Week 12 - the bcrypt cost is measured on this machine and saved as a setting;
+# older, cheaper hashes are upgraded in the background when their user logs in
 
-import bcrypt
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import string  # Import string module for character sets
 from pathlib import Path
 from app.data.db import connect_database
-from app.data.users import get_user_by_username, insert_user
+from app.data.users import get_user_by_username, insert_user, update_password_hash
+from app.data.cache import invalidate_tables
+from app.data.settings import get_setting, set_setting
+from app.services.password_hashing import (
+    get_hashing_service,
+    get_hash_rounds,
+    BCRYPT_DEFAULT_ROUNDS,
+    HashingBusyError
+)
+
+BCRYPT_ROUNDS_SETTING = "bcrypt_rounds"
+
+# One thread upgrades old password hashes after login (see rehash_in_background)
+# and starts the bcrypt calibration
+_rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rehash")
+_calibration_lock = threading.Lock()
+_calibration_started = False
+
+
+def calibrate_bcrypt_rounds():
+    # Measure bcrypt on this machine (in the hashing pool) and save the cost
+    # that fits the time budget
+    rounds = get_hashing_service().measure_rounds()
+    set_setting(BCRYPT_ROUNDS_SETTING, rounds)
+    print(f"✅ bcrypt cost set to {rounds} for this machine")
+    return rounds
+
+
+def start_bcrypt_calibration():
+    # Calibrate once in the background if no cost has been saved yet
+    global _calibration_started
+    with _calibration_lock:
+        if _calibration_started:
+            return
+        _calibration_started = True
+
+    def calibrate():
+        global _calibration_started
+        try:
+            calibrate_bcrypt_rounds()
+        except Exception as e:
+            print(f"⚠️ bcrypt calibration failed, using cost {BCRYPT_DEFAULT_ROUNDS}: {e}")
+            with _calibration_lock:
+                _calibration_started = False
+
+    _rehash_executor.submit(calibrate)
+
+
+def get_bcrypt_rounds():
+    # The bcrypt cost for new hashes
+    # Until calibration has saved one, bcrypt's default is used (never lower than
+    # the calibrated cost) - nobody waits for the measurement on the login path
+    rounds = get_setting(BCRYPT_ROUNDS_SETTING)
+    if rounds is None:
+        start_bcrypt_calibration()
+        return BCRYPT_DEFAULT_ROUNDS
+    return int(rounds)
+
+
+def needs_rehash(hashed_password):
+    # True if the hash was made with a lower cost than we use now
+    rounds = get_hash_rounds(hashed_password)
+    return rounds is not None and rounds < get_bcrypt_rounds()
+
+
+def rehash_in_background(username, plain_text_password, old_hash):
+    # Hash the password again at the current cost and save it, without making
+    # the user wait (only possible right after login - it needs the plain password)
+    def rehash():
+        try:
+            new_hash = hash_password(plain_text_password)
+            if update_password_hash(username, new_hash, old_hash):
+                print(f"🔐 Upgraded password hash for {username} to cost {get_hash_rounds(new_hash)}")
+        except HashingBusyError:
+            # The pool is busy with logins - try again next time they log in
+            pass
+        except Exception as e:
+            print(f"Error upgrading password hash for {username}: {e}")
+
+    _rehash_executor.submit(rehash)
 
 
 def hash_password(plain_text_pass):
     # Turn password into a hash so we can store it safely
-    pass_bytes = plain_text_pass.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_pass = bcrypt.hashpw(pass_bytes, salt)
-    return hashed_pass.decode('utf-8')
+    # (raises HashingBusyError if the hashing pool is overloaded)
+    return get_hashing_service().hash_password(plain_text_pass, rounds=get_bcrypt_rounds())
 
 
 def verify_password(plain_text_password, hashed_password):
     # Check if the password matches the stored hash
-    password_bytes = plain_text_password.encode('utf-8')
-    if isinstance(hashed_password, str):
-        hashed_password_bytes = hashed_password.encode('utf-8')
-    else:
-        hashed_password_bytes = hashed_password
-    return bcrypt.checkpw(password_bytes, hashed_password_bytes)
+    # (raises HashingBusyError if the hashing pool is overloaded)
+    return get_hashing_service().verify_password(plain_text_password, hashed_password)
 
 
 def user_exists(username):
@@ -140,5 +217,12 @@ def migrate_users_from_file(filepath='DATA/users.txt'):
     
     conn.commit()
     conn.close()
+    invalidate_tables("users")
     print(f"✅ Migrated {migrated_count} users from {filepath.name}")
     return migrated_count
+
+
+if __name__ == "__main__":
+    # Measure the bcrypt cost again (e.g. after moving to a new server):
+    # python -m app.services.user_service
+    calibrate_bcrypt_rounds()
@@ -0,0 +1,2 @@
+# Week 12 - Benchmarks package
+# Small scripts that measure how fast parts of the platform are
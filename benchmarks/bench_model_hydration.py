@@ -0,0 +1,118 @@
+# Week 12 - Benchmark: building SecurityIncident objects from database rows
+# Compares the Week 11 way (normal class with __dict__, keyword arguments)
+# against the Week 12 way (__slots__ class with from_row / row_factory)
+#
+# Run from the project folder:
+#     python -m benchmarks.bench_model_hydration
+
+import sqlite3
+import time
+import tracemalloc
+from models.security_incident import SecurityIncident
+
+ROW_COUNT = 100_000
+
+
+class Week11Incident:
+    """The Week 11 SecurityIncident (no __slots__), kept here only for comparison"""
+
+    def __init__(self, incident_id, date, incident_type, severity, status, description, reported_by=None):
+        self.__id = incident_id
+        self.__date = date
+        self.__incident_type = incident_type
+        self.__severity = severity
+        self.__status = status
+        self.__description = description
+        self.__reported_by = reported_by
+
+
+def make_database():
+    # In-memory database with ROW_COUNT fake incidents
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+    CREATE TABLE cyber_incidents (
+        id INTEGER PRIMARY KEY, date TEXT, incident_type TEXT, severity TEXT,
+        status TEXT, description TEXT, reported_by TEXT
+    )
+    """)
+    types = ["Phishing", "Malware", "DDoS", "Ransomware"]
+    severities = ["Low", "Medium", "High", "Critical"]
+    conn.executemany(
+        "INSERT INTO cyber_incidents VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, "2025-01-01", types[i % 4], severities[i % 4], "Open",
+             f"Incident number {i}", "analyst")
+            for i in range(1, ROW_COUNT + 1)
+        )
+    )
+    return conn
+
+
+def build_week11(rows):
+    incidents = []
+    for row in rows:
+        incidents.append(Week11Incident(
+            incident_id=row[0],
+            date=row[1],
+            incident_type=row[2],
+            severity=row[3],
+            status=row[4],
+            description=row[5],
+            reported_by=row[6]
+        ))
+    return incidents
+
+
+def build_from_row(rows):
+    return [SecurityIncident.from_row(row) for row in rows]
+
+
+def measure(name, builder, rows):
+    # Time (best of 3) and memory used by the objects themselves
+    # (the rows are fetched once beforehand, so only object building is measured)
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        builder(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    objects = builder(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<28} {best * 1000:8.1f} ms   {current / (1024 * 1024):7.1f} MB   ({len(objects)} objects)")
+    return best, current
+
+
+def measure_end_to_end(name, conn, row_factory=None):
+    # Query + build objects, best of 3
+    sql = f"SELECT {SecurityIncident.COLUMNS} FROM cyber_incidents"
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+            cursor.execute(sql).fetchall()
+        else:
+            build_week11(cursor.execute(sql).fetchall())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    conn = make_database()
+    rows = conn.execute(f"SELECT {SecurityIncident.COLUMNS} FROM cyber_incidents").fetchall()
+
+    print(f"Building {ROW_COUNT:,} incident objects from rows\n")
+    before_time, before_memory = measure("Week 11 (dict + kwargs)", build_week11, rows)
+    after_time, after_memory = measure("Week 12 from_row", build_from_row, rows)
+    print(f"\nfrom_row is {before_time / after_time:.1f}x faster and the objects use "
+          f"{(1 - after_memory / before_memory) * 100:.0f}% less memory\n")
+
+    print("Query + build, end to end\n")
+    measure_end_to_end("Week 11 (dict + kwargs)", conn)
+    measure_end_to_end("Week 12 row_factory", conn, SecurityIncident.row_factory)
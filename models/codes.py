@@ -0,0 +1,55 @@
+# Week 12 - Shared code tables
+# One place that turns severity / priority / status text into numbers
+# Used by the model classes, the column tables and the generated columns in the database
+# (see migration 6 in app/data/migrations.py) so all three always agree
+
+import numpy as np
+
+# Higher number = more urgent (0 = unknown or missing)
+SEVERITY_CODES = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
+PRIORITY_CODES = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
+
+# Incidents use "Investigating" and tickets use "In Progress" for the same step
+# Anything below RESOLVED_CODE still needs work
+STATUS_CODES = {"Open": 1, "Investigating": 2, "In Progress": 2, "Resolved": 3, "Closed": 4}
+RESOLVED_CODE = 3
+
+
+def code_of(codes, text):
+    # Number for one value, e.g. code_of(SEVERITY_CODES, "High") -> 3
+    if not text:
+        return 0
+    # Exact match is the normal case - no .lower() and no new dict per call
+    code = codes.get(text)
+    if code is not None:
+        return code
+    # Different capitalisation ("high", "HIGH") - rare, so a small loop is fine
+    text = text.lower()
+    for name, code in codes.items():
+        if name.lower() == text:
+            return code
+    return 0
+
+
+def codes_of(codes, values):
+    # Bulk version of code_of() - one NumPy array for a whole column
+    # Each different value is looked up once, then np.unique's inverse spreads the results
+    values = np.asarray(values, dtype=object)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int8)
+    keys = np.array(["" if value is None else str(value) for value in values])
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    lookup = np.array([code_of(codes, name) for name in uniques], dtype=np.int8)
+    return lookup[inverse]
+
+
+def urgency_order(levels, ages, ids):
+    # Row positions sorted by level (highest first), then by age (oldest first), then by id
+    # (the same ORDER BY as the backlog queries in app/data/analytics.py)
+    # ages can be dates as "YYYY-MM-DD" text - they sort the same way as real dates
+    # np.lexsort sorts by the LAST key first
+    return np.lexsort((
+        np.asarray(ids),
+        np.asarray(ages, dtype=str),
+        -np.asarray(levels, dtype=np.int16)
+    ))
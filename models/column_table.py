@@ -0,0 +1,273 @@
+# Week 12 - Column Table Class
+# Holds many records as one NumPy array per column instead of one object per row
+# Text columns with only a few different values (status, severity, ...) are stored
+# as small integer codes plus a list of categories, so filtering is just comparing numbers
+
+import numpy as np
+import pandas as pd
+from models.codes import code_of
+
+
+def code_dtype(category_count):
+    # The integer type pandas uses for the codes of this many categories
+    # Codes stored in it go into pd.Categorical without being copied
+    for dtype in (np.int8, np.int16, np.int32):
+        if category_count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class ColumnTable:
+    """
+    Base class for column-oriented containers (see IncidentTable and TicketTable)
+
+    Subclasses set:
+        COLUMNS - column names in database order (same as the model's COLUMNS)
+        CATEGORICAL - column name -> list of known categories (in display order)
+        INTEGER_COLUMNS - columns stored as int64 arrays
+        FILL_MISSING - column name -> value used when the database has NULL / ""
+        DISPLAY_NAMES - column name -> name used in to_dataframe()
+        MODEL - entity class used by get_object()
+    """
+
+    COLUMNS = ()
+    CATEGORICAL = {}
+    INTEGER_COLUMNS = ("id",)
+    FILL_MISSING = {}
+    DISPLAY_NAMES = {}
+    MODEL = None
+
+    def __init__(self, arrays, categories):
+        """
+        Constructor - wrap existing arrays (use from_rows() to build from database rows)
+
+        Parameters:
+            arrays (dict) - column name -> NumPy array (codes for categorical columns)
+            categories (dict) - categorical column name -> list of category names
+        """
+        self.__arrays = arrays
+        self.__categories = categories
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build a table from database rows
+
+        Parameters:
+            rows (list) - tuples in COLUMNS order
+
+        Returns:
+            ColumnTable - the new table
+        """
+        columns = list(zip(*rows)) if rows else [()] * len(cls.COLUMNS)
+        arrays = {}
+        categories = {}
+
+        for name, values in zip(cls.COLUMNS, columns):
+            if name in cls.FILL_MISSING:
+                fill = cls.FILL_MISSING[name]
+                values = [value if value else fill for value in values]
+
+            if name in cls.CATEGORICAL:
+                codes, names = cls.__encode(values, cls.CATEGORICAL[name])
+                arrays[name] = codes
+                categories[name] = names
+            elif name in cls.INTEGER_COLUMNS:
+                arrays[name] = np.fromiter(values, dtype=np.int64, count=len(values))
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                arrays[name] = array
+
+        return cls(arrays, categories)
+
+    @staticmethod
+    def __encode(values, known):
+        """
+        HELPER METHOD: turn text values into integer codes (-1 = missing)
+
+        Parameters:
+            values (tuple) - the column values
+            known (list) - categories that always get the first codes
+
+        Returns:
+            tuple - (codes array, list of category names)
+        """
+        index = {name: code for code, name in enumerate(known)}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+            else:
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(index)
+                codes[i] = code
+        # Only now do we know how many categories there are
+        return codes.astype(code_dtype(len(index))), list(index)
+
+    def __len__(self):
+        """Number of records in the table"""
+        return len(self.__arrays["id"])
+
+    def column(self, name):
+        """
+        Get one column as a NumPy array
+        (categorical columns come back as the integer codes - see categories())
+
+        Parameters:
+            name (str) - column name
+
+        Returns:
+            numpy array
+        """
+        return self.__arrays[name]
+
+    def categories(self, name):
+        """
+        Get the category names of a categorical column
+
+        Parameters:
+            name (str) - column name
+
+        Returns:
+            list - category names (code 0 is the first one)
+        """
+        return self.__categories[name]
+
+    def codes_for(self, name, values):
+        """
+        Get the integer codes of some category names (unknown names are skipped)
+
+        Parameters:
+            name (str) - categorical column name
+            values (list) - category names
+
+        Returns:
+            numpy array - the codes
+        """
+        index = {category: code for code, category in enumerate(self.__categories[name])}
+        return np.array([index[value] for value in values if value in index],
+                        dtype=code_dtype(len(index)))
+
+    def mask(self, **conditions):
+        """
+        Vectorised filter - which rows match every condition
+
+        Parameters:
+            conditions - column name -> list of allowed values
+                         (an empty list means "don't filter on this column")
+
+        Returns:
+            numpy array of bool - True for matching rows
+        """
+        keep = np.ones(len(self), dtype=bool)
+        for name, values in conditions.items():
+            if not values:
+                continue
+            if name in self.__categories:
+                keep &= np.isin(self.__arrays[name], self.codes_for(name, values))
+            else:
+                keep &= np.isin(self.__arrays[name], np.asarray(values, dtype=object))
+        return keep
+
+    def levels(self, name, codes):
+        """
+        Vectorised version of get_severity_level() / get_priority_level()
+        The code table is looked up once per category, not once per row
+
+        Parameters:
+            name (str) - categorical column name
+            codes (dict) - shared code table from models/codes.py
+
+        Returns:
+            numpy array of int8 - one level per row (0 if unknown or missing)
+        """
+        # The extra 0 at the end is picked by code -1 (missing value)
+        lookup = np.array(
+            [code_of(codes, category) for category in self.__categories[name]] + [0],
+            dtype=np.int8
+        )
+        return lookup[self.__arrays[name]]
+
+    def value_counts(self, name):
+        """
+        Count the rows in each category (no Python loop over rows)
+
+        Parameters:
+            name (str) - categorical column name
+
+        Returns:
+            dict - category name -> number of rows (categories with 0 rows are left out)
+        """
+        codes = self.__arrays[name]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.__categories[name]))
+        return {
+            category: int(count)
+            for category, count in zip(self.__categories[name], counts)
+            if count
+        }
+
+    def take(self, selector):
+        """
+        Make a new table with only some rows
+
+        Parameters:
+            selector - boolean mask or array of row positions
+
+        Returns:
+            ColumnTable - the smaller table (same class)
+        """
+        arrays = {name: array[selector] for name, array in self.__arrays.items()}
+        return type(self)(arrays, self.__categories)
+
+    def filter(self, **conditions):
+        """
+        Keep only rows matching every condition (see mask())
+
+        Returns:
+            ColumnTable - the filtered table
+        """
+        return self.take(self.mask(**conditions))
+
+    def get_object(self, position):
+        """
+        Build the normal entity object for one row (for single-record views)
+
+        Parameters:
+            position (int) - row position in this table
+
+        Returns:
+            entity object (like SecurityIncident)
+        """
+        row = []
+        for name in self.COLUMNS:
+            value = self.__arrays[name][position]
+            if name in self.__categories:
+                value = self.__categories[name][value] if value >= 0 else None
+            elif name in self.INTEGER_COLUMNS:
+                value = int(value)
+            row.append(value)
+        return self.MODEL.from_row(tuple(row))
+
+    def to_dataframe(self):
+        """
+        Turn the table into a pandas DataFrame without copying the column arrays
+        Categorical columns become pandas categoricals that share the code arrays
+        (the codes are already in the integer type pandas wants - see code_dtype())
+
+        Returns:
+            DataFrame - one column per table column
+        """
+        data = {}
+        for name in self.COLUMNS:
+            array = self.__arrays[name]
+            if name in self.__categories:
+                column = pd.Categorical.from_codes(array, categories=self.__categories[name])
+            elif array.dtype == object:
+                # Kept as object - letting pandas turn it into its string type would copy it
+                column = pd.Series(array, dtype=object, copy=False)
+            else:
+                column = array
+            data[self.DISPLAY_NAMES.get(name, name)] = column
+        return pd.DataFrame(data, copy=False)
@@ -1,5 +1,6 @@
 # Week 11 - Dataset Class
 # This class represents a data science dataset
+# Week 12 - Uses __slots__ so each object is smaller and faster to build
 
 class Dataset:
     """
@@ -7,6 +8,12 @@ class Dataset:
     Stores information about data files
     """
     
+    # No per-object __dict__ - only these attributes are allowed
+    __slots__ = ("__id", "__name", "__size_bytes", "__rows", "__source", "__format_type")
+    
+    # Column order that from_row() expects (size is in MB in the database)
+    COLUMNS = "id, dataset_name, file_size_mb, record_count, source, category"
+    
     def __init__(self, dataset_id, name, size_bytes, rows, source, format_type=None):
         """
         Constructor - creates a new dataset object
@@ -26,6 +33,33 @@ class Dataset:
         self.__source = source
         self.__format_type = format_type
     
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a dataset straight from a database row (fast, no keyword arguments)
+        
+        Parameters:
+            row (tuple) - values in COLUMNS order
+            
+        Returns:
+            Dataset - the new object
+        """
+        dataset = cls.__new__(cls)
+        (dataset.__id, dataset.__name, size_mb, dataset.__rows,
+         dataset.__source, dataset.__format_type) = row
+        # Convert MB to bytes
+        dataset.__size_bytes = int(size_mb * 1024 * 1024) if size_mb else 0
+        return dataset
+    
+    @staticmethod
+    def row_factory(cursor, row):
+        """
+        sqlite3 row_factory - makes the cursor return Dataset objects
+        
+        Usage: cursor.row_factory = Dataset.row_factory
+        """
+        return Dataset.from_row(row)
+    
     def get_id(self):
         """Get the dataset ID"""
         return self.__id
@@ -0,0 +1,57 @@
+# Week 12 - Incident Table Class
+# All incidents as columns (see ColumnTable) - used by the bulk views and exports
+# instead of building one SecurityIncident object per row
+
+import numpy as np
+from models.column_table import ColumnTable
+from models.codes import SEVERITY_CODES, STATUS_CODES, RESOLVED_CODE, urgency_order
+from models.security_incident import SecurityIncident
+
+
+class IncidentTable(ColumnTable):
+    """
+    Column-oriented list of security incidents
+    severity, status and incident_type are stored as integer codes
+    """
+
+    COLUMNS = tuple(name.strip() for name in SecurityIncident.COLUMNS.split(","))
+    CATEGORICAL = {
+        "incident_type": [],
+        "severity": list(SEVERITY_CODES),
+        "status": ["Open", "Investigating", "Resolved", "Closed"],
+    }
+    MODEL = SecurityIncident
+
+    def get_severity_levels(self):
+        """
+        Get the severity number of every incident at once
+
+        Returns:
+            numpy array - 1 (low) to 4 (critical), 0 if unknown
+        """
+        return self.levels("severity", SEVERITY_CODES)
+
+    def get_status_codes(self):
+        """
+        Get the status number of every incident at once
+
+        Returns:
+            numpy array - see STATUS_CODES in models/codes.py
+        """
+        return self.levels("status", STATUS_CODES)
+
+    def backlog(self):
+        """
+        Unresolved incidents, most severe first and oldest first within a severity
+        (the same order as analytics.get_urgent_incidents(), but without a query)
+
+        Returns:
+            IncidentTable - the sorted backlog
+        """
+        open_rows = np.flatnonzero(self.get_status_codes() < RESOLVED_CODE)
+        order = urgency_order(
+            self.get_severity_levels()[open_rows],
+            self.column("date")[open_rows],
+            self.column("id")[open_rows]
+        )
+        return self.take(open_rows[order])
@@ -1,5 +1,9 @@
 # Week 11 - IT Ticket Class
 # This class is for an IT support ticket
+# Week 12 - Uses __slots__ so each object is smaller and faster to build
+
+from models.codes import PRIORITY_CODES, code_of
+
 
 class ITTicket:
     """
@@ -7,6 +11,13 @@ class ITTicket:
     Like a help desk request
     """
     
+    # No per-object __dict__ - only these attributes are allowed
+    __slots__ = ("__id", "__title", "__priority", "__status",
+                 "__category", "__assigned_to", "__created_date")
+    
+    # Column order that from_row() expects (subject is the ticket title)
+    COLUMNS = "id, subject, priority, status, category, assigned_to, created_date"
+    
     def __init__(self, ticket_id, title, priority, status, category=None, assigned_to=None, created_date=None):
         """
         Constructor - creates a new ticket object
@@ -28,6 +39,32 @@ class ITTicket:
         self.__assigned_to = assigned_to if assigned_to else "Unassigned"
         self.__created_date = created_date
     
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a ticket straight from a database row (fast, no keyword arguments)
+        
+        Parameters:
+            row (tuple) - values in COLUMNS order
+            
+        Returns:
+            ITTicket - the new object
+        """
+        ticket = cls.__new__(cls)
+        (ticket.__id, ticket.__title, ticket.__priority, ticket.__status,
+         ticket.__category, assigned_to, ticket.__created_date) = row
+        ticket.__assigned_to = assigned_to if assigned_to else "Unassigned"
+        return ticket
+    
+    @staticmethod
+    def row_factory(cursor, row):
+        """
+        sqlite3 row_factory - makes the cursor return ITTicket objects
+        
+        Usage: cursor.row_factory = ITTicket.row_factory
+        """
+        return ITTicket.from_row(row)
+    
     def get_id(self):
         """Get ticket ID"""
         return self.__id
@@ -83,14 +120,10 @@ class ITTicket:
         Get a number for priority (makes it easy to sort)
         
         Returns:
-            int - 1 (low) to 3 (high)
+            int - 1 (low) to 4 (critical)
         """
-        priority_map = {
-            "low": 1,
-            "medium": 2,
-            "high": 3
-        }
-        return priority_map.get(self.__priority.lower(), 0)
+        # Week 12 - shared code table (same numbers as the priority_level column)
+        return code_of(PRIORITY_CODES, self.__priority)
     
     def to_dict(self):
         """
@@ -1,5 +1,9 @@
 # Week 11 - Security Incident Class
 # This class represents a cybersecurity incident
+# Week 12 - Uses __slots__ so each object is smaller and faster to build
+
+from models.codes import SEVERITY_CODES, code_of
+
 
 class SecurityIncident:
     """
@@ -7,6 +11,14 @@ class SecurityIncident:
     Like a container for incident information
     """
     
+    # No per-object __dict__ - only these attributes are allowed
+    # (names with __ are made private the same way as self.__id is)
+    __slots__ = ("__id", "__date", "__incident_type", "__severity",
+                 "__status", "__description", "__reported_by")
+    
+    # Column order that from_row() expects
+    COLUMNS = "id, date, incident_type, severity, status, description, reported_by"
+    
     def __init__(self, incident_id, date, incident_type, severity, status, description, reported_by=None):
         """
         Constructor - creates a new incident object
@@ -29,6 +41,31 @@ class SecurityIncident:
         self.__description = description
         self.__reported_by = reported_by
     
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build an incident straight from a database row (fast, no keyword arguments)
+        
+        Parameters:
+            row (tuple) - values in COLUMNS order
+            
+        Returns:
+            SecurityIncident - the new object
+        """
+        incident = cls.__new__(cls)
+        (incident.__id, incident.__date, incident.__incident_type, incident.__severity,
+         incident.__status, incident.__description, incident.__reported_by) = row
+        return incident
+    
+    @staticmethod
+    def row_factory(cursor, row):
+        """
+        sqlite3 row_factory - makes the cursor return SecurityIncident objects
+        
+        Usage: cursor.row_factory = SecurityIncident.row_factory
+        """
+        return SecurityIncident.from_row(row)
+    
     def get_id(self):
         """Get the incident ID"""
         return self.__id
@@ -73,16 +110,8 @@ class SecurityIncident:
         Returns:
             int - 1 (low) to 4 (critical)
         """
-        # Dictionary to convert text to numbers
-        severity_map = {
-            "low": 1,
-            "medium": 2,
-            "high": 3,
-            "critical": 4
-        }
-        
-        # Get the number, or 0 if not found
-        return severity_map.get(self.__severity.lower(), 0)
+        # Week 12 - shared code table (same numbers as the severity_level column)
+        return code_of(SEVERITY_CODES, self.__severity)
     
     def to_dict(self):
         """
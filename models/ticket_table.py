@@ -0,0 +1,62 @@
+# Week 12 - Ticket Table Class
+# All IT tickets as columns (see ColumnTable) - used by the IT Operations list
+# instead of building one ITTicket object (and then one dict) per row
+
+import numpy as np
+from models.column_table import ColumnTable
+from models.codes import PRIORITY_CODES, STATUS_CODES, RESOLVED_CODE, urgency_order
+from models.it_ticket import ITTicket
+
+
+class TicketTable(ColumnTable):
+    """
+    Column-oriented list of IT tickets
+    priority, status, category and assigned_to are stored as integer codes
+    """
+
+    COLUMNS = tuple(name.strip() for name in ITTicket.COLUMNS.split(","))
+    CATEGORICAL = {
+        "priority": list(PRIORITY_CODES),
+        "status": ["Open", "In Progress", "Resolved", "Closed"],
+        "category": [],
+        "assigned_to": [],
+    }
+    # Same as ITTicket - no one assigned shows as "Unassigned"
+    FILL_MISSING = {"assigned_to": "Unassigned"}
+    # ITTicket calls the subject the title
+    DISPLAY_NAMES = {"subject": "title"}
+    MODEL = ITTicket
+
+    def get_priority_levels(self):
+        """
+        Get the priority number of every ticket at once
+
+        Returns:
+            numpy array - 1 (low) to 4 (critical), 0 if unknown
+        """
+        return self.levels("priority", PRIORITY_CODES)
+
+    def get_status_codes(self):
+        """
+        Get the status number of every ticket at once
+
+        Returns:
+            numpy array - see STATUS_CODES in models/codes.py
+        """
+        return self.levels("status", STATUS_CODES)
+
+    def queue(self):
+        """
+        Unresolved tickets, highest priority first and oldest first within a priority
+        (the same order as analytics.get_ticket_queue(), but without a query)
+
+        Returns:
+            TicketTable - the sorted queue
+        """
+        open_rows = np.flatnonzero(self.get_status_codes() < RESOLVED_CODE)
+        order = urgency_order(
+            self.get_priority_levels()[open_rows],
+            self.column("created_date")[open_rows],
+            self.column("id")[open_rows]
+        )
+        return self.take(open_rows[order])
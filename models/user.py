@@ -1,5 +1,6 @@
 # Week 11 - User Class
 # This class is for a user in our system
+# Week 12 - Uses __slots__ so each object is smaller and faster to build
 
 class User:
     """
@@ -7,6 +8,12 @@ class User:
     This is like a template for creating user objects
     """
     
+    # No per-object __dict__ - only these attributes are allowed
+    __slots__ = ("__username", "__password_hash", "__role")
+    
+    # Column order that from_row() expects
+    COLUMNS = "username, password_hash, role"
+    
     def __init__(self, username, password_hash, role):
         """
         Constructor - runs when we create a new User object
@@ -21,6 +28,30 @@ class User:
         self.__password_hash = password_hash
         self.__role = role
     
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a user straight from a database row (fast, no keyword arguments)
+        
+        Parameters:
+            row (tuple) - values in COLUMNS order
+            
+        Returns:
+            User - the new object
+        """
+        user = cls.__new__(cls)
+        user.__username, user.__password_hash, user.__role = row
+        return user
+    
+    @staticmethod
+    def row_factory(cursor, row):
+        """
+        sqlite3 row_factory - makes the cursor return User objects
+        
+        Usage: cursor.row_factory = User.row_factory
+        """
+        return User.from_row(row)
+    
     def get_username(self):
         """
         Get the username
@@ -1,8 +1,10 @@
 # Week 10 - AI Assistant Page
 # Chat with AI about cybersecurity
+# Week 12 - Answers are streamed, so the first words show up straight away
 
 import streamlit as st
-from app.services.ai_service import generate_security_tips, chat_with_ai
+from app.services.ai_service import stream_security_tips, stream_chat_with_ai, get_ai_assistant
+from app.services.session_manager import check_login
 
 # Page configuration
 st.set_page_config(
@@ -12,7 +14,8 @@ st.set_page_config(
 )
 
 # Check if user is logged in
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+# Week 12 - checks the session token, so a reconnected tab stays logged in
+if not check_login():
     st.error("🔒 Please login first!")
     st.info("👈 Go to Home page to login")
     st.stop()
@@ -40,13 +43,10 @@ with tab1:
         if not user_question:
             st.error("❌ Please enter a question first!")
         else:
-            with st.spinner("🤖 AI is thinking... This may take 10-20 seconds..."):
-                # Get answer from AI
-                answer = chat_with_ai(user_question)
-            
-            # Show the answer
+            # Show the answer while the AI is still writing it
             st.success("✅ AI Response:")
-            st.info(answer)
+            with st.container(border=True):
+                st.write_stream(stream_chat_with_ai(user_question))
     
     st.divider()
     
@@ -58,25 +58,21 @@ with tab1:
     
     with col1:
         if st.button("🔐 What is two-factor authentication?", use_container_width=True):
-            with st.spinner("🤖 Thinking..."):
-                answer = chat_with_ai("What is two-factor authentication and why is it important?")
-                st.info(answer)
+            with st.container(border=True):
+                st.write_stream(stream_chat_with_ai("What is two-factor authentication and why is it important?"))
         
         if st.button("🛡️ What is a firewall?", use_container_width=True):
-            with st.spinner("🤖 Thinking..."):
-                answer = chat_with_ai("What is a firewall and how does it protect networks?")
-                st.info(answer)
+            with st.container(border=True):
+                st.write_stream(stream_chat_with_ai("What is a firewall and how does it protect networks?"))
     
     with col2:
         if st.button("🎣 What is phishing?", use_container_width=True):
-            with st.spinner("🤖 Thinking..."):
-                answer = chat_with_ai("What is phishing and how can I recognize phishing attempts?")
-                st.info(answer)
+            with st.container(border=True):
+                st.write_stream(stream_chat_with_ai("What is phishing and how can I recognize phishing attempts?"))
         
         if st.button("🔒 How to create strong passwords?", use_container_width=True):
-            with st.spinner("🤖 Thinking..."):
-                answer = chat_with_ai("What makes a strong password and how should I manage passwords?")
-                st.info(answer)
+            with st.container(border=True):
+                st.write_stream(stream_chat_with_ai("What makes a strong password and how should I manage passwords?"))
 
 # TAB 2: Security Tips
 with tab2:
@@ -88,12 +84,10 @@ with tab2:
     """)
     
     if st.button("🎯 Generate Security Tips", type="primary", use_container_width=True):
-        with st.spinner("🤖 Generating security tips... This may take 10-20 seconds..."):
-            tips = generate_security_tips()
-        
-        st.success("✅ Tips Generated!")
         st.markdown("### 📋 Cybersecurity Best Practices")
-        st.info(tips)
+        with st.container(border=True):
+            st.write_stream(stream_security_tips())
+        st.success("✅ Tips Generated!")
     
     st.divider()
     
@@ -106,6 +100,20 @@ with tab2:
     - Learn about threats and protections
     """)
 
+# Week 12 - Provider health (circuit breaker state and recent latency)
+with st.expander("📡 AI Provider Status"):
+    STATE_ICONS = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    try:
+        for name, health in get_ai_assistant().get_provider_health().items():
+            p50 = f"{health['p50']:.2f}s" if health['p50'] is not None else "-"
+            st.write(
+                f"{STATE_ICONS[health['state']]} **{name}** - {health['state']} | "
+                f"median {p50} | {health['successes']} ok, {health['failures']} failed, "
+                f"{health['rejected']} skipped"
+            )
+    except Exception as e:
+        st.error(f"Error loading provider status: {e}")
+
 # Footer
 st.markdown("---")
 st.caption(f"🔐 Logged in as: {st.session_state.username} | Powered by AngryPanda🐼")
@@ -2,7 +2,8 @@
 # Shows overview statistics and welcome message
 
 import streamlit as st
-from app.data.db import connect_database
+from app.data.stats import get_platform_stats
+from app.services.session_manager import check_login
 
 # Page configuration
 st.set_page_config(
@@ -12,37 +13,16 @@ st.set_page_config(
 )
 
 # Check if user is logged in
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+# Week 12 - checks the session token, so a reconnected tab stays logged in
+if not check_login():
     st.error("🔒 Please login first!")
     st.info("👈 Go to Home page to login")
     st.stop()
 
 # Get statistics from database
+# Week 12 - One cached read of the counters table instead of four COUNT(*) scans
 def get_stats():
-    conn = connect_database()
-    cursor = conn.cursor()
-    
-    # Count records in each table
-    cursor.execute("SELECT COUNT(*) FROM users")
-    users_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM cyber_incidents")
-    incidents_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM datasets_metadata")
-    datasets_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM it_tickets")
-    tickets_count = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    return {
-        'users': users_count,
-        'incidents': incidents_count,
-        'datasets': datasets_count,
-        'tickets': tickets_count
-    }
+    return get_platform_stats()
 
 # Main dashboard
 st.title("📊 Dashboard")
@@ -1,12 +1,16 @@
 # Week 9 - Analytics Page
 # Simple charts to visualize data
 
+# Week 12 - Charts now use grouped results from app/data/analytics.py
+# instead of loading every row of every table into pandas
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from app.data.incidents import get_all_incidents
-from app.data.datasets import get_all_datasets
-from app.data.tickets import get_all_tickets
+from datetime import datetime
+from app.data import analytics
+from app.services.database_manager import DatabaseManager
+from app.services.job_queue import get_job_queue, users_file_job_key
+from app.services.session_manager import check_login
 
 # Page configuration
 st.set_page_config(
@@ -16,7 +20,8 @@ st.set_page_config(
 )
 
 # Check if user is logged in
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+# Week 12 - checks the session token, so a reconnected tab stays logged in
+if not check_login():
     st.error("🔒 Please login first!")
     st.info("👈 Go to Home page to login")
     st.stop()
@@ -25,30 +30,29 @@ if 'logged_in' not in st.session_state or not st.session_state.logged_in:
 st.title("📊 Analytics Dashboard")
 st.markdown("View charts and statistics")
 
-# Get data from database
+# Get row counts from database (one query for all three tables)
 try:
-    incidents_df = get_all_incidents()
-    datasets_df = get_all_datasets()
-    tickets_df = get_all_tickets()
+    summary = analytics.get_summary_counts()
 except Exception as e:
     st.error(f"Error loading data: {e}")
     st.stop()
 
+total_incidents = int(summary['incidents'])
+total_datasets = int(summary['datasets'])
+total_tickets = int(summary['tickets'])
+
 # Show summary numbers at top
 st.subheader("📈 Summary")
 
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    total_incidents = len(incidents_df) if not incidents_df.empty else 0
     st.metric("🚨 Total Incidents", total_incidents)
 
 with col2:
-    total_datasets = len(datasets_df) if not datasets_df.empty else 0
     st.metric("📁 Total Datasets", total_datasets)
 
 with col3:
-    total_tickets = len(tickets_df) if not tickets_df.empty else 0
     st.metric("🎫 Total Tickets", total_tickets)
 
 st.divider()
@@ -60,7 +64,7 @@ tab1, tab2, tab3 = st.tabs(["🚨 Incidents", "🎫 Tickets", "📁 Datasets"])
 with tab1:
     st.subheader("Incident Analytics")
     
-    if incidents_df.empty:
+    if total_incidents == 0:
         st.info("No incidents yet. Add some incidents to see charts!")
     else:
         # Show two columns
@@ -69,13 +73,13 @@ with tab1:
         with col1:
             st.markdown("#### Incidents by Type")
             # Count how many of each type
-            type_counts = incidents_df['incident_type'].value_counts()
+            type_counts = analytics.count_by('cyber_incidents', 'incident_type')
             # Make a bar chart
             fig = px.bar(
-                x=type_counts.index,
-                y=type_counts.values,
+                x=type_counts['value'],
+                y=type_counts['count'],
                 labels={'x': 'Type', 'y': 'Count'},
-                color=type_counts.values,
+                color=type_counts['count'],
                 color_continuous_scale='Reds'
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -83,12 +87,12 @@ with tab1:
         with col2:
             st.markdown("#### Incidents by Severity")
             # Count how many of each severity
-            severity_counts = incidents_df['severity'].value_counts()
+            severity_counts = analytics.count_by('cyber_incidents', 'severity')
             # Make a pie chart
             fig = px.pie(
-                values=severity_counts.values,
-                names=severity_counts.index,
-                color=severity_counts.index,
+                values=severity_counts['count'],
+                names=severity_counts['value'],
+                color=severity_counts['value'],
                 color_discrete_map={
                     'Critical': 'red',
                     'High': 'orange',
@@ -102,12 +106,12 @@ with tab1:
         
         # Status chart
         st.markdown("#### Incidents by Status")
-        status_counts = incidents_df['status'].value_counts()
+        status_counts = analytics.count_by('cyber_incidents', 'status')
         fig = px.bar(
-            x=status_counts.index,
-            y=status_counts.values,
+            x=status_counts['value'],
+            y=status_counts['count'],
             labels={'x': 'Status', 'y': 'Count'},
-            color=status_counts.values,
+            color=status_counts['count'],
             color_continuous_scale='Blues'
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -117,26 +121,24 @@ with tab1:
         # Phishing Spike Detection
         st.markdown("#### 📈 Incident Trends Over Time (Phishing Surge Analysis)")
         
-        # Convert date to datetime for plotting
-        incidents_df['date'] = pd.to_datetime(incidents_df['date'])
-        
-        # Count incidents by date and type
-        daily_incidents = incidents_df.groupby([pd.Grouper(key='date', freq='W'), 'incident_type']).size().reset_index(name='count')
+        # Count incidents by week and type (grouped in the database)
+        weekly_incidents = analytics.get_weekly_incident_trends()
         
         # Create time series chart
         fig = px.line(
-            daily_incidents, 
-            x='date', 
+            weekly_incidents, 
+            x='week', 
             y='count', 
             color='incident_type',
-            labels={'date': 'Week', 'count': 'Number of Incidents'},
+            labels={'week': 'Week', 'count': 'Number of Incidents'},
             title='Weekly Incident Trends - Identifying Threat Surges'
         )
         st.plotly_chart(fig, use_container_width=True)
         
         # KEY INSIGHT
-        phishing_count = incidents_df[incidents_df['incident_type'] == 'Phishing'].shape[0]
-        total_count = len(incidents_df)
+        phishing_rows = type_counts[type_counts['value'] == 'Phishing']
+        phishing_count = int(phishing_rows['count'].sum())
+        total_count = total_incidents
         phishing_percent = (phishing_count / total_count * 100) if total_count > 0 else 0
         st.warning(f"⚠️ **Key Finding:** Phishing incidents account for {phishing_count} cases ({phishing_percent:.1f}% of all incidents), showing a focused surge requiring immediate attention.")
         
@@ -145,52 +147,37 @@ with tab1:
         # Resolution Time Bottleneck
         st.markdown("#### ⏱️ Resolution Time Bottleneck Analysis")
         
-        # Check if resolved_date column exists
-        if 'resolved_date' in incidents_df.columns:
-            # Filter for resolved incidents
-            resolved = incidents_df[incidents_df['status'].isin(['Resolved', 'Closed'])].copy()
+        # Average days to resolve each type (worked out with julianday in SQL)
+        avg_resolution = analytics.get_avg_resolution_days_by_type()
+        
+        if not avg_resolution.empty:
+            # Create bar chart
+            fig = px.bar(
+                x=avg_resolution['incident_type'],
+                y=avg_resolution['avg_days'],
+                labels={'x': 'Incident Type', 'y': 'Average Days to Resolve'},
+                title='Resolution Time Bottleneck - Which Threats Take Longest?',
+                color=avg_resolution['avg_days'],
+                color_continuous_scale='Reds'
+            )
+            st.plotly_chart(fig, use_container_width=True)
             
-            if not resolved.empty:
-                # Convert dates to datetime
-                resolved['date'] = pd.to_datetime(resolved['date'])
-                resolved['resolved_date'] = pd.to_datetime(resolved['resolved_date'])
-                
-                # Calculate resolution time in days
-                resolved['resolution_days'] = (resolved['resolved_date'] - resolved['date']).dt.days
-                
-                # Average resolution time by incident type
-                avg_resolution = resolved.groupby('incident_type')['resolution_days'].mean().sort_values(ascending=False)
-                
-                # Create bar chart
-                fig = px.bar(
-                    x=avg_resolution.index,
-                    y=avg_resolution.values,
-                    labels={'x': 'Incident Type', 'y': 'Average Days to Resolve'},
-                    title='Resolution Time Bottleneck - Which Threats Take Longest?',
-                    color=avg_resolution.values,
-                    color_continuous_scale='Reds'
-                )
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Identify the bottleneck
-                if len(avg_resolution) > 0:
-                    slowest_type = avg_resolution.index[0]
-                    slowest_days = avg_resolution.values[0]
-                    if len(avg_resolution) > 1:
-                        fastest_type = avg_resolution.index[-1]
-                        fastest_days = avg_resolution.values[-1]
-                        multiplier = slowest_days / fastest_days if fastest_days > 0 else 1
-                        st.error(f"🚨 **Critical Bottleneck:** {slowest_type} incidents take an average of {slowest_days:.1f} days to resolve - {multiplier:.1f}x longer than {fastest_type} incidents ({fastest_days:.1f} days).")
-                    else:
-                        st.info(f"Average resolution time for {slowest_type}: {slowest_days:.1f} days")
+            # Identify the bottleneck
+            slowest_type = avg_resolution['incident_type'].iloc[0]
+            slowest_days = avg_resolution['avg_days'].iloc[0]
+            if len(avg_resolution) > 1:
+                fastest_type = avg_resolution['incident_type'].iloc[-1]
+                fastest_days = avg_resolution['avg_days'].iloc[-1]
+                multiplier = slowest_days / fastest_days if fastest_days > 0 else 1
+                st.error(f"🚨 **Critical Bottleneck:** {slowest_type} incidents take an average of {slowest_days:.1f} days to resolve - {multiplier:.1f}x longer than {fastest_type} incidents ({fastest_days:.1f} days).")
+            else:
+                st.info(f"Average resolution time for {slowest_type}: {slowest_days:.1f} days")
         
         # Show unresolved backlog
         st.markdown("#### 📊 Unresolved Incident Backlog")
-        unresolved = incidents_df[~incidents_df['status'].isin(['Resolved', 'Closed'])]
+        backlog_by_type = analytics.get_incident_backlog()
         
-        if not unresolved.empty:
-            backlog_by_type = unresolved.groupby(['incident_type', 'severity']).size().reset_index(name='backlog_count')
-            
+        if not backlog_by_type.empty:
             fig = px.bar(
                 backlog_by_type,
                 x='incident_type',
@@ -208,8 +195,14 @@ with tab1:
             st.plotly_chart(fig, use_container_width=True)
             
             # KEY INSIGHT
-            high_severity_backlog = unresolved[unresolved['severity'].isin(['High', 'Critical'])].shape[0]
+            high_severity_rows = backlog_by_type[backlog_by_type['severity'].isin(['High', 'Critical'])]
+            high_severity_backlog = int(high_severity_rows['backlog_count'].sum())
             st.warning(f"⚠️ **Backlog Alert:** {high_severity_backlog} high-severity incidents remain unresolved, creating a response bottleneck that delays threat mitigation.")
+            
+            # Week 12 - Most urgent first (severity, then age) - sorted by SQLite using an index
+            st.markdown("#### 🔥 Most Urgent Open Incidents")
+            urgent = analytics.get_urgent_incidents(limit=10)
+            st.dataframe(urgent, use_container_width=True, hide_index=True)
         else:
             st.success("✅ No unresolved incidents - Great work!")
 
@@ -217,7 +210,7 @@ with tab1:
 with tab2:
     st.subheader("Ticket Analytics")
     
-    if tickets_df.empty:
+    if total_tickets == 0:
         st.info("No tickets yet. Add some tickets to see charts!")
     else:
         # Show two columns
@@ -226,12 +219,12 @@ with tab2:
         with col1:
             st.markdown("#### Tickets by Priority")
             # Count how many of each priority
-            priority_counts = tickets_df['priority'].value_counts()
+            priority_counts = analytics.count_by('it_tickets', 'priority')
             # Make a pie chart
             fig = px.pie(
-                values=priority_counts.values,
-                names=priority_counts.index,
-                color=priority_counts.index,
+                values=priority_counts['count'],
+                names=priority_counts['value'],
+                color=priority_counts['value'],
                 color_discrete_map={
                     'Critical': 'red',
                     'High': 'orange',
@@ -244,13 +237,13 @@ with tab2:
         with col2:
             st.markdown("#### Tickets by Status")
             # Count how many of each status
-            status_counts = tickets_df['status'].value_counts()
+            status_counts = analytics.count_by('it_tickets', 'status')
             # Make a bar chart
             fig = px.bar(
-                x=status_counts.index,
-                y=status_counts.values,
+                x=status_counts['value'],
+                y=status_counts['count'],
                 labels={'x': 'Status', 'y': 'Count'},
-                color=status_counts.values,
+                color=status_counts['count'],
                 color_continuous_scale='Greens'
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -259,12 +252,12 @@ with tab2:
         
         # Category chart
         st.markdown("#### Tickets by Category")
-        category_counts = tickets_df['category'].value_counts()
+        category_counts = analytics.count_by('it_tickets', 'category')
         fig = px.bar(
-            x=category_counts.index,
-            y=category_counts.values,
+            x=category_counts['value'],
+            y=category_counts['count'],
             labels={'x': 'Category', 'y': 'Count'},
-            color=category_counts.values,
+            color=category_counts['count'],
             color_continuous_scale='Purples'
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -274,10 +267,10 @@ with tab2:
         # Staff Performance
         st.markdown("#### 👥 Staff Performance Analysis")
         
-        if 'assigned_to' in tickets_df.columns:
-            # Count tickets by staff member and status
-            staff_workload = tickets_df.groupby(['assigned_to', 'status']).size().reset_index(name='ticket_count')
-            
+        # Count tickets by staff member and status
+        staff_workload = analytics.get_staff_workload()
+        
+        if not staff_workload.empty:
             fig = px.bar(
                 staff_workload,
                 x='assigned_to',
@@ -289,7 +282,7 @@ with tab2:
             st.plotly_chart(fig, use_container_width=True)
             
             # Look for performance anomaly
-            open_by_staff = tickets_df[tickets_df['status'] == 'Open'].groupby('assigned_to').size()
+            open_by_staff = staff_workload[staff_workload['status'] == 'Open'].set_index('assigned_to')['ticket_count']
             if not open_by_staff.empty:
                 slowest_staff = open_by_staff.idxmax()
                 slowest_count = open_by_staff.max()
@@ -301,59 +294,58 @@ with tab2:
         # Resolution Time by Staff
         st.markdown("#### ⏱️ Ticket Resolution Time Analysis")
         
-        if 'resolved_date' in tickets_df.columns and 'created_date' in tickets_df.columns:
-            # Filter resolved tickets
-            resolved_tickets = tickets_df[tickets_df['status'] == 'Closed'].copy()
+        if analytics.count_closed_tickets() > 0:
+            # Average resolution time by staff member (worked out in SQL)
+            avg_by_staff = analytics.get_avg_ticket_resolution_days_by_staff()
             
-            if not resolved_tickets.empty:
-                # Convert to datetime and calculate resolution time
-                resolved_tickets['created_date'] = pd.to_datetime(resolved_tickets['created_date'])
-                resolved_tickets['resolved_date'] = pd.to_datetime(resolved_tickets['resolved_date'])
-                resolved_tickets['resolution_days'] = (resolved_tickets['resolved_date'] - resolved_tickets['created_date']).dt.days
+            if not avg_by_staff.empty:
+                fig = px.bar(
+                    x=avg_by_staff['assigned_to'],
+                    y=avg_by_staff['avg_days'],
+                    labels={'x': 'Staff Member', 'y': 'Average Days to Close'},
+                    title='Staff Performance: Average Ticket Resolution Time',
+                    color=avg_by_staff['avg_days'],
+                    color_continuous_scale='Reds'
+                )
+                st.plotly_chart(fig, use_container_width=True)
                 
-                # Average resolution time by staff member
-                if 'assigned_to' in resolved_tickets.columns:
-                    avg_by_staff = resolved_tickets.groupby('assigned_to')['resolution_days'].mean().sort_values(ascending=False)
-                    
-                    if not avg_by_staff.empty:
-                        fig = px.bar(
-                            x=avg_by_staff.index,
-                            y=avg_by_staff.values,
-                            labels={'x': 'Staff Member', 'y': 'Average Days to Close'},
-                            title='Staff Performance: Average Ticket Resolution Time',
-                            color=avg_by_staff.values,
-                            color_continuous_scale='Reds'
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Identify performance differences
-                        slowest_staff = avg_by_staff.index[0]
-                        slowest_time = avg_by_staff.values[0]
-                        team_average = avg_by_staff.mean()
-                        
-                        if slowest_time > team_average * 1.2:
-                            st.error(f"🚨 **Performance Anomaly Detected:** {slowest_staff} average resolution time is {slowest_time:.1f} days - {slowest_time/team_average:.1f}x slower than the teams average ({team_average:.1f} days). This requires immediate investigation.")
-                        else:
-                            st.success(f"✅ Team performance is balanced. Average resolution time: {team_average:.1f} days")
-            else:
-                st.info("No closed tickets yet to analyze resolution time")
+                # Identify performance differences
+                slowest_staff = avg_by_staff['assigned_to'].iloc[0]
+                slowest_time = avg_by_staff['avg_days'].iloc[0]
+                team_average = avg_by_staff['avg_days'].mean()
+                
+                if slowest_time > team_average * 1.2:
+                    st.error(f"🚨 **Performance Anomaly Detected:** {slowest_staff} average resolution time is {slowest_time:.1f} days - {slowest_time/team_average:.1f}x slower than the teams average ({team_average:.1f} days). This requires immediate investigation.")
+                else:
+                    st.success(f"✅ Team performance is balanced. Average resolution time: {team_average:.1f} days")
+        else:
+            st.info("No closed tickets yet to analyze resolution time")
+        
+        # Week 12 - Ticket queue (priority, then age) - sorted by SQLite using an index
+        st.markdown("#### 📥 Open Ticket Queue")
+        ticket_queue = analytics.get_ticket_queue(limit=10)
+        if not ticket_queue.empty:
+            st.dataframe(ticket_queue, use_container_width=True, hide_index=True)
+        else:
+            st.success("✅ No open tickets - Great work!")
 
 # TAB 3: Datasets
 with tab3:
     st.subheader("Dataset Analytics")
     
-    if datasets_df.empty:
+    if total_datasets == 0:
         st.info("No datasets yet. Add some datasets to see charts!")
     else:
         # Show summary numbers
+        totals = analytics.get_dataset_totals()
         col1, col2 = st.columns(2)
         
         with col1:
-            total_records = datasets_df['record_count'].sum()
+            total_records = int(totals['total_records'])
             st.metric("📊 Total Records", f"{total_records:,}")
         
         with col2:
-            total_size = datasets_df['file_size_mb'].sum()
+            total_size = totals['total_size_mb']
             st.metric("💾 Total Size", f"{total_size:.1f} MB")
         
         st.divider()
@@ -364,13 +356,13 @@ with tab3:
         with col1:
             st.markdown("#### Datasets by Category")
             # Count how many of each category
-            category_counts = datasets_df['category'].value_counts()
+            category_counts = analytics.count_by('datasets_metadata', 'category')
             # Make a bar chart
             fig = px.bar(
-                x=category_counts.index,
-                y=category_counts.values,
+                x=category_counts['value'],
+                y=category_counts['count'],
                 labels={'x': 'Category', 'y': 'Count'},
-                color=category_counts.values,
+                color=category_counts['count'],
                 color_continuous_scale='Teal'
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -378,7 +370,7 @@ with tab3:
         with col2:
             st.markdown("#### Top 5 Largest Datasets")
             # Get the 5 biggest datasets
-            top5 = datasets_df.nlargest(5, 'file_size_mb')
+            top5 = analytics.get_largest_datasets(5)
             # Make a bar chart
             fig = px.bar(
                 top5,
@@ -396,45 +388,81 @@ with tab3:
         st.markdown("#### 🗄️ Data Governance & Resource Management")
         
         # Identify large datasets
-        large_datasets = datasets_df[datasets_df['file_size_mb'] > 100]
+        large_datasets = analytics.get_large_dataset_summary(100)
+        large_count = int(large_datasets['count'])
         
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Datasets >100MB", len(large_datasets))
-            st.metric("Storage Consumed", f"{large_datasets['file_size_mb'].sum():.1f} MB")
+            st.metric("Datasets >100MB", large_count)
+            st.metric("Storage Consumed", f"{large_datasets['total_size_mb']:.1f} MB")
         
         with col2:
             # Resource by source
-            if 'source' in datasets_df.columns:
-                source_consumption = datasets_df.groupby('source')['file_size_mb'].sum().sort_values(ascending=False)
-                if not source_consumption.empty:
-                    st.metric("Top Source", source_consumption.index[0])
-                    st.metric("Source Storage", f"{source_consumption.iloc[0]:.1f} MB")
-                    
-                    # Show chart of consumption by source
-                    st.markdown("##### Resource Consumption by Data Source")
-                    fig = px.pie(
-                        values=source_consumption.values,
-                        names=source_consumption.index,
-                        title='Storage Usage by Department/Source'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+            source_consumption = analytics.get_storage_by_source()
+            if not source_consumption.empty:
+                st.metric("Top Source", source_consumption['source'].iloc[0])
+                st.metric("Source Storage", f"{source_consumption['total_size_mb'].iloc[0]:.1f} MB")
+                
+                # Show chart of consumption by source
+                st.markdown("##### Resource Consumption by Data Source")
+                fig = px.pie(
+                    values=source_consumption['total_size_mb'],
+                    names=source_consumption['source'],
+                    title='Storage Usage by Department/Source'
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         # Governance Recommendation
-        if len(large_datasets) > 0:
-            st.info(f"📋 **Governance Recommendation:** Consider archiving {len(large_datasets)} datasets exceeding 100MB to optimize storage. Review datasets from high-consumption sources.")
+        if large_count > 0:
+            st.info(f"📋 **Governance Recommendation:** Consider archiving {large_count} datasets exceeding 100MB to optimize storage. Review datasets from high-consumption sources.")
         
         # Data quality check
         st.markdown("##### Data Quality Analysis")
         # Check for datasets with unusually low record count for their size
-        datasets_df['bytes_per_record'] = (datasets_df['file_size_mb'] * 1024 * 1024) / datasets_df['record_count']
-        quality_issues = datasets_df[datasets_df['bytes_per_record'] > 10000]  # More than 10KB per record is unusual
+        quality_issues = analytics.count_dataset_quality_issues(10000)  # More than 10KB per record is unusual
         
-        if not quality_issues.empty:
-            st.warning(f"⚠️ **Quality Alert:** {len(quality_issues)} datasets have unusually large file size relative to record counts, suggesting potential data quality issues or need to improve.")
+        if quality_issues > 0:
+            st.warning(f"⚠️ **Quality Alert:** {quality_issues} datasets have unusually large file size relative to record counts, suggesting potential data quality issues or need to improve.")
         else:
             st.success("✅ All datasets show normal ratios")
 
+# Week 12 - Slow maintenance tasks run on the background job queue
+# Admins only - the users.txt import creates accounts
+current_user = DatabaseManager().get_user_by_username(st.session_state.username)
+if current_user is not None and current_user.get_role() == "admin":
+    st.divider()
+    with st.expander("🛠️ Maintenance"):
+        st.markdown("These tasks run in the background - you can keep using the app while they finish.")
+        col1, col2 = st.columns(2)
+        job_queue = get_job_queue()
+
+        with col1:
+            if st.button("🔄 Rebuild summary tables", use_container_width=True):
+                # One job per minute, so double clicks don't queue the rebuild twice
+                job_id = job_queue.submit("rebuild_rollups", {"requested": datetime.now().strftime("%Y-%m-%d %H:%M")})
+                st.session_state.maintenance_job_id = job_id
+
+        with col2:
+            if st.button("📥 Import users from users.txt", use_container_width=True):
+                # Keyed on the file's contents - importing the same file again reuses the last job
+                job_id = job_queue.submit(
+                    "migrate_users",
+                    {"filepath": "DATA/users.txt"},
+                    key=users_file_job_key("DATA/users.txt")
+                )
+                st.session_state.maintenance_job_id = job_id
+
+        if 'maintenance_job_id' in st.session_state:
+            job = job_queue.get_job(st.session_state.maintenance_job_id)
+            if job is not None:
+                st.write(f"**Job #{job['id']}** ({job['job_type']}): {job['status']}")
+                if job['status'] == "done":
+                    st.json(job['result'])
+                elif job['status'] == "failed":
+                    st.error(f"❌ {job['error']}")
+                else:
+                    st.button("🔄 Refresh", key="refresh_maintenance_job")
+
 # Footer
 st.markdown("---")
 st.caption(f"🔐 Logged in as: {st.session_state.username} | Powered by AngryPanda🐼")
@@ -7,6 +7,7 @@ from datetime import datetime
 # Week 11 - Import OOP classes
 from app.services.database_manager import DatabaseManager
 from models.dataset import Dataset
+from app.services.session_manager import check_login
 
 # Page configuration
 st.set_page_config(
@@ -16,7 +17,8 @@ st.set_page_config(
 )
 
 # Check if user is logged in
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+# Week 12 - checks the session token, so a reconnected tab stays logged in
+if not check_login():
     st.error("🔒 Please login first!")
     st.info("👈 Go to Home page to login")
     st.stop()
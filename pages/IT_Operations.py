@@ -2,11 +2,11 @@
 # Create, Read, Update, Delete IT support tickets using OOP
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 # Week 11 - Import OOP classes
 from app.services.database_manager import DatabaseManager
 from models.it_ticket import ITTicket
+from app.services.session_manager import check_login
 
 # Page configuration
 st.set_page_config(
@@ -16,7 +16,8 @@ st.set_page_config(
 )
 
 # Check if user is logged in
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+# Week 12 - checks the session token, so a reconnected tab stays logged in
+if not check_login():
     st.error("🔒 Please login first!")
     st.info("👈 Go to Home page to login")
     st.stop()
@@ -36,25 +37,12 @@ with tab1:
     st.subheader("All IT Tickets")
     
     try:
-        # Week 11 - Get tickets as objects
-        tickets = db_manager.get_all_tickets()
+        # Week 12 - Get all tickets as one column table (no object or dict per row)
+        tickets = db_manager.get_ticket_table()
         
-        if not tickets:
+        if len(tickets) == 0:
             st.info("No tickets found. Add some tickets using the 'Add New' tab.")
         else:
-            # Convert objects to DataFrame for display
-            ticket_dicts = []
-            for ticket in tickets:
-                ticket_dicts.append({
-                    'id': ticket.get_id(),
-                    'title': ticket.get_title(),
-                    'priority': ticket.get_priority(),
-                    'status': ticket.get_status(),
-                    'category': ticket.get_category(),
-                    'assigned_to': ticket.get_assigned_to(),
-                    'created_date': ticket.get_created_date()
-                })
-            df = pd.DataFrame(ticket_dicts)
             # Filter by status
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -64,11 +52,8 @@ with tab1:
                     default=["Open", "In Progress", "Resolved", "Closed"]
                 )
             
-            # Apply filter
-            if filter_status:
-                filtered_df = df[df['status'].isin(filter_status)]
-            else:
-                filtered_df = df
+            # Apply filter (compares integer codes, then builds the DataFrame once)
+            filtered_df = tickets.filter(status=filter_status).to_dataframe()
             
             st.dataframe(filtered_df, use_container_width=True, hide_index=True)
             st.success(f"Total tickets: {len(filtered_df)}")
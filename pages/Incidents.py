@@ -2,7 +2,6 @@
 # Create, Read, Update, Delete cyber security incidents using OOP
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 # Import Week 8 functions (keep for backward compatibility)
 from app.data.incidents import (
@@ -13,8 +12,10 @@ from app.data.incidents import (
 )
 # Week 11 - Import OOP classes newly created
 from app.services.database_manager import DatabaseManager
-from app.services.ai_service import AIAssistant
+from app.services.ai_service import get_ai_assistant, describe_incident, content_hash
+from app.services.job_queue import get_job_queue, make_job_key
 from models.security_incident import SecurityIncident
+from app.services.session_manager import check_login
 
 # Page configuration
 st.set_page_config(
@@ -24,14 +25,15 @@ st.set_page_config(
 )
 
 # Check if user is logged in
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+# Week 12 - checks the session token, so a reconnected tab stays logged in
+if not check_login():
     st.error("🔒 Please login first!")
     st.info("👈 Go to Home page to login")
     st.stop()
 
 # Week 11 - Create OOP instances
+# Week 12 - The AI assistant is only fetched when an analysis is asked for (see below)
 db_manager = DatabaseManager()
-ai_assistant = AIAssistant()
 
 # Main page
 st.title("🚨 Cyber Incidents Management")
@@ -41,59 +43,81 @@ st.markdown("Create, view, update, and delete cybersecurity incidents")
 tab1, tab2, tab3, tab4 = st.tabs(["📋 View All", "➕ Add New", "✏️ Update", "🗑️ Delete"])
 
 # TAB 1: View All Incidents (OOP Version)
+# Week 12 - Filters run inside the database and only one page is loaded at a time
+PAGE_SIZE = 50
+
 with tab1:
     st.subheader("All Cyber Incidents")
     
     try:
-        # Week 11 - Get incidents as objects
-        incidents = db_manager.get_all_incidents()
+        # Filters
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            filter_severity = st.multiselect(
+                "Filter by Severity",
+                ["Low", "Medium", "High", "Critical"]
+            )
         
-        if not incidents:
+        with col2:
+            filter_status = st.multiselect(
+                "Filter by Status",
+                ["Open", "Investigating", "Resolved", "Closed"]
+            )
+        
+        with col3:
+            filter_type = st.multiselect(
+                "Filter by Type",
+                db_manager.get_incident_types()
+            )
+        
+        filters = {
+            "severity": filter_severity,
+            "status": filter_status,
+            "incident_type": filter_type
+        }
+        
+        # Go back to the first page whenever the filters change
+        # incident_page_cursors holds the last id of every page we've passed
+        if st.session_state.get('incident_filters') != filters:
+            st.session_state.incident_filters = filters
+            st.session_state.incident_page_cursors = [None]
+        cursors = st.session_state.incident_page_cursors
+        
+        # Ask for one extra row so we know if there is a next page
+        # Week 12 - a column table, so no object or dict is built per row
+        incidents = db_manager.get_incident_table(filters, after_id=cursors[-1], limit=PAGE_SIZE + 1)
+        has_next_page = len(incidents) > PAGE_SIZE
+        incidents = incidents.take(slice(0, PAGE_SIZE))
+        
+        if not len(incidents) and len(cursors) > 1:
+            # This page emptied (e.g. its incidents were deleted) - go back a page
+            cursors.pop()
+            st.rerun()
+        elif not len(incidents):
             st.info("No incidents found. Add some incidents using the 'Add New' tab.")
         else:
-            # Convert objects to DataFrame for display
-            incident_dicts = [incident.to_dict() for incident in incidents]
-            df = pd.DataFrame(incident_dicts)
+            # Hand the columns to pandas for display
+            df = incidents.to_dataframe()
             
-            # Filters
-            col1, col2, col3 = st.columns(3)
+            # Display table
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            total = db_manager.count_incidents(filters)
+            st.success(f"Total incidents: {total} (page {len(cursors)}, showing {len(df)})")
             
+            # Page buttons
+            col1, col2 = st.columns(2)
             with col1:
-                filter_severity = st.multiselect(
-                    "Filter by Severity",
-                    ["Low", "Medium", "High", "Critical"]
-                )
-            
+                if st.button("⬅️ Previous page", disabled=len(cursors) == 1, use_container_width=True):
+                    cursors.pop()
+                    st.rerun()
             with col2:
-                filter_status = st.multiselect(
-                    "Filter by Status",
-                    ["Open", "Investigating", "Resolved", "Closed"]
-                )
-            
-            with col3:
-                filter_type = st.multiselect(
-                    "Filter by Type",
-                    df['incident_type'].unique().tolist()
-                )
-            
-            # Apply filters - start with all data
-            filtered_df = df.copy()
-            
-            if filter_severity:
-                filtered_df = filtered_df[filtered_df['severity'].isin(filter_severity)]
-            
-            if filter_status:
-                filtered_df = filtered_df[filtered_df['status'].isin(filter_status)]
-            
-            if filter_type:
-                filtered_df = filtered_df[filtered_df['incident_type'].isin(filter_type)]
-            
-            # Display table
-            st.dataframe(filtered_df, use_container_width=True, hide_index=True)
-            st.success(f"Total incidents: {len(filtered_df)}")
+                if st.button("Next page ➡️", disabled=not has_next_page, use_container_width=True):
+                    cursors.append(int(incidents.column("id")[-1]))
+                    st.rerun()
             
-            # Download button
-            csv = filtered_df.to_csv(index=False)
+            # Download button - every incident matching the filters, not just this page
+            csv = db_manager.get_incidents_dataframe(filters).to_csv(index=False)
             st.download_button(
                 label="📥 Download as CSV",
                 data=csv,
@@ -286,37 +310,132 @@ try:
             list(incident_options.keys())
         )
         
+        # Week 12 - Long analyses can run on the job queue so the page isn't blocked
+        run_in_background = st.checkbox("🕒 Run in background", key="analysis_in_background")
+
         # Button to analyze
         if st.button("🤖 Analyze with AI", type="primary", use_container_width=True):
             # Get the selected incident object
             incident_id = incident_options[selected]
             selected_incident = db_manager.get_incident_by_id(incident_id)
-            
+
             # Create text description for AI using object methods
-            incident_text = f"""Type: {selected_incident.get_incident_type()}
-Severity: {selected_incident.get_severity()}
-Description: {selected_incident.get_description()}
-Date: {selected_incident.get_date()}
-Severity Level: {selected_incident.get_severity_level()}/4"""
-            
-            # Show loading message
-            with st.spinner("🤖 AI is analyzing the incident... This may take 10-20 seconds..."):
-                # Use OOP AI assistant
-                analysis = ai_assistant.analyze_incident(incident_text)
-            
-            # Show results
-            st.success("✅ Analysis Complete!")
-            st.markdown("### 🎯 AI Analysis Results")
-            st.info(analysis)
-            
-            # Show incident object info
-            st.caption(f"Analyzed: {selected_incident}")
+            incident_text = describe_incident(selected_incident)
+
+            if run_in_background:
+                # Same incident text = same job, so clicking twice doesn't analyze twice
+                job_id = get_job_queue().submit(
+                    "analyze_incident",
+                    {"incident_id": incident_id},
+                    key=make_job_key("analyze_incident", {"incident_id": incident_id, "hash": content_hash(incident_text)})
+                )
+                st.session_state.setdefault('background_jobs', {})[job_id] = f"AI analysis of incident #{incident_id}"
+                st.info(f"🕒 Analysis queued as job #{job_id} - see Background Jobs below")
+            else:
+                # Week 12 - Show the analysis while the AI is still writing it
+                st.markdown("### 🎯 AI Analysis Results")
+                with st.container(border=True):
+                    st.write_stream(get_ai_assistant().stream_incident_analysis(incident_text))
+                st.success("✅ Analysis Complete!")
+
+                # Show incident object info
+                st.caption(f"Analyzed: {selected_incident}")
     else:
         st.info("📝 No incidents available. Add an incident first to use AI analysis.")
         
 except Exception as e:
     st.error(f"Error loading AI analysis: {e}")
 
+# Week 12 - Batch triage of the open High/Critical backlog
+st.divider()
+st.subheader("⚡ Batch AI Triage")
+st.markdown("Analyze every open High and Critical incident at once. Analyses are saved, so unchanged incidents are not sent to the AI again.")
+
+TRIAGE_LIMIT = 20
+
+try:
+    # The most urgent open incidents first (see IncidentTable.backlog())
+    backlog = db_manager.get_incident_table(
+        {"severity": ["High", "Critical"], "status": ["Open", "Investigating"]}
+    ).backlog()
+    triage_queue = [backlog.get_object(i) for i in range(min(len(backlog), TRIAGE_LIMIT))]
+    
+    triage_in_background = st.checkbox("🕒 Run in background", key="triage_in_background")
+
+    if not triage_queue:
+        st.success("✅ No open High or Critical incidents to triage")
+    elif triage_in_background:
+        if st.button(f"⚡ Queue triage of {len(triage_queue)} open High/Critical incidents", use_container_width=True):
+            # The key covers every incident's text, so the job only runs again if something changed
+            triage_hashes = {incident.get_id(): content_hash(describe_incident(incident)) for incident in triage_queue}
+            job_id = get_job_queue().submit(
+                "triage_incidents",
+                {"incident_ids": sorted(triage_hashes)},
+                key=make_job_key("triage_incidents", sorted(triage_hashes.items()))
+            )
+            st.session_state.setdefault('background_jobs', {})[job_id] = f"Batch triage of {len(triage_queue)} incidents"
+            st.info(f"🕒 Triage queued as job #{job_id} - see Background Jobs below")
+    elif st.button(f"⚡ Triage {len(triage_queue)} open High/Critical incidents", use_container_width=True):
+        progress = st.progress(0.0, text="Starting triage...")
+        finished = []
+        
+        def show_progress(incident_id, result):
+            finished.append(incident_id)
+            progress.progress(
+                len(finished) / len(triage_queue),
+                text=f"Analyzed {len(finished)} of {len(triage_queue)} incidents"
+            )
+        
+        results = get_ai_assistant().analyze_incidents_batch(triage_queue, on_result=show_progress)
+        progress.empty()
+        
+        failed = sum(1 for result in results.values() if result["source"] == "failed")
+        reused = sum(1 for result in results.values() if result["source"] in ("saved", "cache"))
+        st.success(f"✅ Triage complete - {len(results) - failed} analyzed ({reused} reused), {failed} failed")
+        
+        # Show the results in backlog order (most severe first)
+        for incident in triage_queue:
+            result = results[incident.get_id()]
+            with st.expander(str(incident)):
+                if result["analysis"]:
+                    st.markdown(result["analysis"])
+                else:
+                    st.error(f"❌ Analysis failed: {result['error']}")
+
+except Exception as e:
+    st.error(f"Error running batch triage: {e}")
+
+# Week 12 - Jobs this user queued (the ids are kept in session_state, the jobs in the database)
+if st.session_state.get('background_jobs'):
+    st.divider()
+    st.subheader("🕒 Background Jobs")
+    st.button("🔄 Refresh", key="refresh_jobs")
+
+    STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌"}
+    try:
+        job_queue = get_job_queue()
+        for job_id, label in reversed(list(st.session_state.background_jobs.items())):
+            job = job_queue.get_job(job_id)
+            if job is None:
+                continue
+            with st.expander(f"{STATUS_ICONS.get(job['status'], '')} Job #{job_id}: {label} ({job['status']})"):
+                if job['status'] == "failed":
+                    st.error(f"❌ {job['error']}")
+                elif job['status'] != "done":
+                    st.info("Still working - press Refresh to check again")
+                elif job['job_type'] == "analyze_incident":
+                    st.markdown(job['result']['analysis'])
+                else:
+                    # Triage results: incident id -> {"analysis", "source", "error"}
+                    for incident_id, result in job['result'].items():
+                        st.markdown(f"**Incident #{incident_id}** ({result['source']})")
+                        if result['analysis']:
+                            st.markdown(result['analysis'])
+                        else:
+                            st.error(f"❌ Analysis failed: {result['error']}")
+    except Exception as e:
+        st.error(f"Error loading background jobs: {e}")
+
 # Footer
 st.markdown("---")
 st.caption(f"🔐 Logged in as: {st.session_state.username} | Powered by AngryPanda🐼")
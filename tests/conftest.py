@@ -0,0 +1,22 @@
+# Week 12 - Shared test fixtures
+# Every test that touches the database gets its own empty copy in a temporary
+# folder, so the real DATA/intelligence_platform.db is never used
+
+import pytest
+from app.data import cache
+from app.data.db import DB_PATH, get_pool
+from app.data.stats import invalidate_stats
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Run the test inside tmp_path, so the default DB_PATH ("DATA/...") points at a new file
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / DB_PATH.parent).mkdir()
+    get_pool(DB_PATH)     # creates the file and runs every migration
+
+    # The process-wide caches are keyed by the (same) relative path - start them empty
+    monkeypatch.setattr(cache, "_watchers", {})
+    cache.query_cache.clear()
+    invalidate_stats()
+    return DB_PATH
@@ -0,0 +1,92 @@
+# Week 12 - Tests for the connection pool (app/data/db.py)
+
+import sqlite3
+import threading
+import pytest
+from app.data.db import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=2, timeout=0.2)
+    yield pool
+    pool.close_all()
+
+
+def test_nested_checkout_shares_one_connection(pool):
+    outer = pool.acquire()
+    inner = pool.acquire()
+    assert inner is outer
+    pool.release(inner)
+    assert pool.get_stats()['in_use'] == 1
+    pool.release(outer)
+    assert pool.get_stats()['in_use'] == 0
+    assert pool.get_stats()['idle'] == 1
+
+
+def test_nested_broken_release_keeps_the_outer_connection_open(pool):
+    outer = pool.acquire()
+    inner = pool.acquire()
+    pool.release(inner, broken=True)
+
+    # The outer caller can keep using it...
+    assert outer.execute("SELECT 1").fetchone() == (1,)
+
+    # ...and it is only replaced when the outer caller gives it back
+    pool.release(outer)
+    stats = pool.get_stats()
+    assert stats['recycled'] == 1
+    assert stats['idle'] == 0
+
+
+def test_release_from_another_thread_raises(pool):
+    conn = pool.acquire()
+    errors = []
+
+    def release_elsewhere():
+        try:
+            pool.release(conn)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=release_elsewhere)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+
+    # Still checked out by this thread, which can give it back normally
+    assert pool.get_stats()['in_use'] == 1
+    pool.release(conn)
+    assert pool.get_stats()['in_use'] == 0
+
+
+def test_double_release_is_ignored(pool):
+    conn = pool.acquire()
+    pool.release(conn)
+    pool.release(conn)
+    assert pool.get_stats()['idle'] == 1
+
+
+def test_full_pool_times_out(pool):
+    # Two other threads hold both connections
+    holding = threading.Barrier(3, timeout=5)
+    done = threading.Event()
+
+    def hold():
+        conn = pool.acquire()
+        holding.wait()
+        done.wait(timeout=5)
+        pool.release(conn)
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        holding.wait()
+        with pytest.raises(sqlite3.OperationalError):
+            pool.acquire()
+    finally:
+        # Let the holders go even if the check failed, so the test can't hang
+        done.set()
+        for thread in threads:
+            thread.join()
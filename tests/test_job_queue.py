@@ -0,0 +1,81 @@
+# Week 12 - Tests for the background job queue (app/services/job_queue.py)
+
+import time
+import pytest
+from app.services import job_queue as jobs
+from app.services.job_queue import JobQueue, users_file_job_key
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # A job type that records every run, and fails while "fail" is set
+    calls = []
+
+    def run_echo(payload):
+        calls.append(payload)
+        if payload.get("fail"):
+            raise RuntimeError("asked to fail")
+        return {"echo": payload}
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "echo", run_echo)
+    return calls
+
+
+def wait_for(queue, job_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get_job(job_id)
+        if job['status'] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} never became {status}: {queue.get_job(job_id)}")
+
+
+def test_same_job_submitted_twice_runs_once(db_path, calls):
+    queue = JobQueue(db_path, workers=1)
+    first = queue.submit("echo", {"n": 1})
+    second = queue.submit("echo", {"n": 1})
+    assert first == second
+
+    queue.start()
+    try:
+        job = wait_for(queue, first, "done")
+        # Submitting a finished job again doesn't run it again
+        assert queue.submit("echo", {"n": 1}) == first
+        time.sleep(0.1)
+    finally:
+        queue.stop()
+    assert job['result'] == {"echo": {"n": 1}}
+    assert calls == [{"n": 1}]
+    assert queue.get_stats() == {"done": 1}
+
+
+def test_failed_job_is_retried_when_submitted_again(db_path, calls):
+    queue = JobQueue(db_path, workers=1)
+    queue.start()
+    try:
+        job_id = queue.submit("echo", {"fail": True}, key="flaky")
+        job = wait_for(queue, job_id, "failed")
+        assert job['error'] == "asked to fail"
+
+        assert queue.submit("echo", {"fail": True}, key="flaky") == job_id
+        job = wait_for(queue, job_id, "failed")
+    finally:
+        queue.stop()
+    assert job['attempts'] == 2
+    assert len(calls) == 2
+
+
+def test_unknown_job_type_is_refused(db_path):
+    with pytest.raises(ValueError):
+        JobQueue(db_path).submit("no_such_job")
+
+
+def test_users_file_key_follows_the_file_contents(tmp_path):
+    users_file = tmp_path / "users.txt"
+    users_file.write_text("alice,hash,user\n")
+    first = users_file_job_key(users_file)
+    assert users_file_job_key(users_file) == first
+
+    users_file.write_text("alice,hash,user\nbob,hash,admin\n")
+    assert users_file_job_key(users_file) != first
@@ -0,0 +1,67 @@
+# Week 12 - Tests for login throttling (LoginThrottle in app/services/rate_limit.py)
+
+from app.services.rate_limit import LoginThrottle
+
+LIMITS = {"user": (3, 60.0), "client": (5, 6.0)}
+
+
+def make_throttle():
+    # One shard of 8 buckets, so a handful of usernames fills it
+    return LoginThrottle(limits=LIMITS, max_entries=8, shards=1, flush_seconds=3600)
+
+
+def lock_out(throttle, username):
+    for _ in range(3):
+        assert throttle.check_attempt(username) == 0
+    assert throttle.check_attempt(username) > 0
+
+
+def spray(throttle, count=50):
+    # Other usernames, enough to push every earlier bucket out of memory
+    for i in range(count):
+        throttle.check_attempt(f"spray{i}")
+
+
+def test_locked_out_user_stays_locked_out_after_eviction(db_path):
+    throttle = make_throttle()
+    lock_out(throttle, "victim")
+
+    # Pushed out before it was saved...
+    spray(throttle)
+    assert throttle.check_attempt("victim") > 0
+
+    # ...and after it was saved
+    throttle.flush()
+    spray(throttle)
+    assert throttle.check_attempt("victim") > 0
+
+
+def test_lockout_survives_a_restart(db_path):
+    throttle = make_throttle()
+    lock_out(throttle, "victim")
+    throttle.flush()
+
+    restarted = make_throttle()
+    assert restarted.check_attempt("victim") > 0
+
+
+def test_success_refills_the_username(db_path):
+    throttle = make_throttle()
+    lock_out(throttle, "alice")
+    throttle.flush()
+    throttle.record_success("alice")
+
+    # Even after being pushed out, the refill wins over the old saved copy
+    spray(throttle)
+    assert throttle.check_attempt("alice") == 0
+
+
+def test_refused_client_attempt_doesnt_charge_the_username(db_path):
+    throttle = make_throttle()
+    for i in range(5):
+        assert throttle.check_attempt(f"user{i}", client_id="1.2.3.4") == 0
+    assert throttle.check_attempt("alice", client_id="1.2.3.4") > 0
+
+    # alice's bucket is still full
+    for _ in range(3):
+        assert throttle.check_attempt("alice") == 0
@@ -0,0 +1,64 @@
+# Week 12 - Tests for the query cache (app/data/cache.py)
+
+import sqlite3
+from app.data.cache import (
+    query_cache,
+    check_outside_writes,
+    fetch_one_cached,
+    invalidate_tables
+)
+from app.data.db import pooled_connection
+
+COUNT_SQL = "SELECT COUNT(*) FROM it_tickets"
+
+
+def add_ticket(conn, ticket_id):
+    conn.execute(
+        "INSERT INTO it_tickets (ticket_id, priority, status, category, subject, created_date) "
+        "VALUES (?, 'High', 'Open', 'Network', 'test', '2024-01-01')",
+        (ticket_id,)
+    )
+    conn.commit()
+
+
+def outside_connection(db_path):
+    # Another process's connection - the pool and the cache don't know about it
+    return sqlite3.connect(str(db_path.resolve()))
+
+
+def test_outside_write_clears_the_cache(db_path):
+    assert fetch_one_cached(COUNT_SQL, db_path=db_path) == (0,)
+
+    outside = outside_connection(db_path)
+    add_ticket(outside, "T-1")
+    outside.close()
+
+    assert fetch_one_cached(COUNT_SQL, db_path=db_path) == (1,)
+
+
+def test_outside_write_next_to_our_own_write_is_not_missed(db_path):
+    check_outside_writes(db_path)
+
+    # One of our writes and one outside write land between two checks
+    with pooled_connection(db_path) as conn:
+        add_ticket(conn, "T-1")
+    invalidate_tables("it_tickets")
+    assert fetch_one_cached(COUNT_SQL, db_path=db_path) == (1,)
+
+    with pooled_connection(db_path) as conn:
+        add_ticket(conn, "T-2")
+    outside = outside_connection(db_path)
+    add_ticket(outside, "T-3")
+    outside.close()
+    # (no invalidate_tables - only data_version can notice this one)
+
+    assert check_outside_writes(db_path) is True
+    assert fetch_one_cached(COUNT_SQL, db_path=db_path) == (3,)
+
+
+def test_no_commit_means_no_clear(db_path):
+    fetch_one_cached(COUNT_SQL, db_path=db_path)
+    assert check_outside_writes(db_path) is False
+    hits = query_cache.get_stats()['hits']
+    fetch_one_cached(COUNT_SQL, db_path=db_path)
+    assert query_cache.get_stats()['hits'] == hits + 1
@@ -0,0 +1,88 @@
+# Week 12 - Tests for the rollup tables and their triggers (app/data/rollups.py)
+
+import sqlite3
+import pytest
+from app.data.incidents import insert_incident, update_incident_status, delete_incident
+from app.data.rollups import rebuild_rollups
+from models.codes import RESOLVED_CODE
+
+
+@pytest.fixture
+def conn(db_path):
+    # A plain connection for reading the rollups straight from the file
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def backlog(conn):
+    # backlog_rollup as {(incident_type, severity): count}
+    rows = conn.execute("SELECT incident_type, severity, count FROM backlog_rollup")
+    return {(incident_type, severity): count for incident_type, severity, count in rows}
+
+
+def weekly(conn):
+    # incident_weekly_rollup as {(week, incident_type): count}
+    rows = conn.execute("SELECT week, incident_type, count FROM incident_weekly_rollup")
+    return {(week, incident_type): count for week, incident_type, count in rows}
+
+
+def incident_count(conn):
+    return conn.execute(
+        "SELECT row_count FROM table_counts WHERE table_name = 'cyber_incidents'"
+    ).fetchone()[0]
+
+
+def test_insert_update_delete_keep_counts(conn):
+    first = insert_incident("2024-03-05", "Phishing", "High", "Open", "one")
+    insert_incident("2024-03-06", "Phishing", "High", "Investigating", "two")
+    assert backlog(conn) == {("Phishing", "High"): 2}
+    assert weekly(conn) == {("2024-03-10", "Phishing"): 2}
+    assert incident_count(conn) == 2
+
+    # Resolving leaves the backlog but not the weekly trend
+    update_incident_status(first, "Resolved")
+    assert backlog(conn) == {("Phishing", "High"): 1}
+    assert weekly(conn) == {("2024-03-10", "Phishing"): 2}
+
+    # Rows that reach zero are removed
+    delete_incident(first)
+    assert weekly(conn) == {("2024-03-10", "Phishing"): 1}
+    assert incident_count(conn) == 1
+
+
+def test_backlog_ignores_status_capitalisation(conn):
+    incident = insert_incident("2024-03-05", "Malware", "Critical", "resolved", "lower case")
+    insert_incident("2024-03-05", "Malware", "Critical", "CLOSED", "upper case")
+    assert backlog(conn) == {}
+
+    # Reopening and resolving again with other capitalisation
+    update_incident_status(incident, "open")
+    assert backlog(conn) == {("Malware", "Critical"): 1}
+    update_incident_status(incident, "Resolved")
+    assert backlog(conn) == {}
+
+    # The rollup agrees with the status_code column
+    unresolved = conn.execute(
+        "SELECT COUNT(*) FROM cyber_incidents WHERE status_code < ?", (RESOLVED_CODE,)
+    ).fetchone()[0]
+    assert unresolved == 0
+
+
+def test_triggers_match_a_full_rebuild(conn):
+    ids = [
+        insert_incident(f"2024-03-{day:02d}", incident_type, severity, status, "x")
+        for day, incident_type, severity, status in [
+            (1, "Phishing", "Low", "Open"),
+            (8, "Phishing", "High", "closed"),
+            (9, "Malware", "High", None),
+            (15, "DDoS", "Medium", "Investigating"),
+        ]
+    ]
+    update_incident_status(ids[0], "RESOLVED")
+    update_incident_status(ids[1], "Open")
+    delete_incident(ids[2])
+
+    by_triggers = (backlog(conn), weekly(conn), incident_count(conn))
+    rebuild_rollups(conn)
+    assert (backlog(conn), weekly(conn), incident_count(conn)) == by_triggers
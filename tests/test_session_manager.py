@@ -0,0 +1,97 @@
+# Week 12 - Tests for login session rotation (app/services/session_manager.py)
+
+import time
+import pytest
+from app.services import session_manager as sessions
+from app.services.session_manager import SessionManager, hash_token
+from app.data.sessions import get_session
+
+
+@pytest.fixture
+def clock(db_path, monkeypatch):
+    # A clock the test moves by hand
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_token_is_rotated_after_renew_interval(clock):
+    manager = SessionManager()
+    token = manager.create_session("alice")
+
+    # Before the renew interval the same token keeps working
+    clock[0] += 10
+    assert manager.validate_session(token) == ("alice", token)
+
+    # After it, a new token is handed out
+    clock[0] += sessions.SESSION_RENEW_INTERVAL
+    username, new_token = manager.validate_session(token)
+    assert username == "alice"
+    assert new_token != token
+    assert manager.get_stats()['rotated'] == 1
+
+
+def test_grace_token_leads_back_to_its_successor(clock):
+    manager = SessionManager()
+    token = manager.create_session("alice")
+    clock[0] += sessions.SESSION_RENEW_INTERVAL + 1
+    _, new_token = manager.validate_session(token)
+
+    # Another tab still using the old token gets the same new token,
+    # no matter how often it asks - it never starts a session of its own
+    for _ in range(3):
+        clock[0] += 10
+        assert manager.validate_session(token) == ("alice", new_token)
+    assert manager.get_stats()['rotated'] == 1
+
+
+def test_grace_token_expires(clock):
+    manager = SessionManager()
+    token = manager.create_session("alice")
+    clock[0] += sessions.SESSION_RENEW_INTERVAL + 1
+    _, new_token = manager.validate_session(token)
+
+    clock[0] += sessions.SESSION_ROTATION_GRACE + 1
+    assert manager.validate_session(token) is None
+    assert manager.validate_session(new_token) == ("alice", new_token)
+
+
+def test_grace_token_from_another_process_is_not_renewed(clock):
+    manager = SessionManager()
+    token = manager.create_session("alice")
+    clock[0] += sessions.SESSION_RENEW_INTERVAL + 1
+    manager.validate_session(token)
+
+    # A second process doesn't know the new token - the old one works
+    # unchanged until its grace period runs out, and nothing new is created
+    other = SessionManager()
+    clock[0] += 10
+    assert other.validate_session(token) == ("alice", token)
+    assert other.get_stats()['rotated'] == 0
+    clock[0] += sessions.SESSION_ROTATION_GRACE
+    assert other.validate_session(token) is None
+
+
+def test_logout_ends_every_token_of_the_login(clock):
+    manager = SessionManager()
+    first = manager.create_session("alice")
+    clock[0] += sessions.SESSION_RENEW_INTERVAL + 1
+    _, second = manager.validate_session(first)
+    clock[0] += sessions.SESSION_RENEW_INTERVAL + 1
+    _, third = manager.validate_session(second)
+
+    # Logging out with the old token still ends the current one
+    manager.end_session(second)
+    for token in (first, second, third):
+        assert get_session(hash_token(token)) is None
+        assert manager.validate_session(token) is None
+
+
+def test_logout_leaves_other_logins_alone(clock):
+    manager = SessionManager()
+    laptop = manager.create_session("alice")
+    phone = manager.create_session("alice")
+
+    manager.end_session(laptop)
+    assert manager.validate_session(laptop) is None
+    assert manager.validate_session(phone) == ("alice", phone)
@@ -0,0 +1,37 @@
+# Week 12 - Tests for user writes and the user cache (app/data/users.py)
+
+from app.data.users import get_user_by_username, delete_user
+from app.services.database_manager import DatabaseManager
+
+
+def test_manager_inserts_into_its_own_database(db_path, tmp_path):
+    other_path = tmp_path / "other.db"
+    other = DatabaseManager(other_path)
+    assert other.insert_user("alice", "hash") is not None
+
+    assert get_user_by_username("alice", other_path) is not None
+    assert get_user_by_username("alice", db_path) is None
+
+
+def test_unknown_user_is_cached_until_it_is_added(db_path):
+    manager = DatabaseManager(db_path)
+    assert get_user_by_username("bob") is None
+    manager.insert_user("bob", "hash", "admin")
+
+    row = get_user_by_username("bob")
+    assert row[1] == "bob"
+    assert [user.get_username() for user in manager.get_users_by_role("admin")] == ["bob"]
+
+
+def test_taken_username_returns_none(db_path):
+    manager = DatabaseManager(db_path)
+    assert manager.insert_user("carol", "hash") is not None
+    assert manager.insert_user("carol", "other hash") is None
+
+
+def test_delete_user_forgets_the_user(db_path):
+    manager = DatabaseManager(db_path)
+    manager.insert_user("dave", "hash")
+    assert get_user_by_username("dave") is not None
+    assert delete_user("dave") == 1
+    assert get_user_by_username("dave") is None